@@ -0,0 +1,122 @@
+"""Benchmark the memory used while loading a video's detections and by the loaded
+detections, to size worker pools and caches"""
+
+import argparse
+import gc
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from epic_kitchens.hoa import io
+from epic_kitchens.hoa.memory import memory_usage
+
+from harness import find_regressions, write_results
+from synthetic import make_releasable_video_detections
+
+parser = argparse.ArgumentParser(
+    description="Benchmark the memory used by loading detections",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "--output", type=Path, help="Path to write JSON results to, defaults to stdout"
+)
+parser.add_argument(
+    "--frames",
+    type=int,
+    nargs="+",
+    default=[1000, 10000],
+    help="Number of frames in each synthetic video",
+)
+parser.add_argument(
+    "--mean-hands", type=float, default=1.5, help="Mean number of hands per frame"
+)
+parser.add_argument(
+    "--mean-objects", type=float, default=5, help="Mean number of objects per frame"
+)
+parser.add_argument(
+    "--baseline",
+    type=Path,
+    help="Previous results file, exits with an error if any benchmark regressed",
+)
+parser.add_argument(
+    "--tolerance",
+    type=float,
+    default=1.1,
+    help="Growth factor of peak memory relative to --baseline counted as a "
+    "regression",
+)
+
+LOADERS: Dict[str, Callable[[Path], Any]] = {
+    "load_detections": io.load_detections,
+    "load_detection_arrays": io.load_detection_arrays,
+}
+
+
+def measure_load(load: Callable[[Path], Any], path: Path) -> Dict[str, Any]:
+    """Measure the memory allocated while loading detections with tracemalloc.
+
+    Returns:
+        The peak bytes allocated during the load, which includes the unpickled
+        list of serialized detections coexisting with the decoded detections,
+        and the bytes still allocated once it returns.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        detections = load(path)
+        retained_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    usage = memory_usage(detections)
+    return {
+        "peak_bytes": peak_bytes,
+        "retained_bytes": retained_bytes,
+        "hands_bytes": usage.hands,
+        "objects_bytes": usage.objects,
+        "frames_bytes": usage.frames,
+        "total_bytes": usage.total,
+    }
+
+
+def main(args):
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_frames in args.frames:
+            path = Path(tmp_dir) / f"{n_frames}.pkl"
+            detections = make_releasable_video_detections(
+                n_frames, args.mean_hands, args.mean_objects
+            )
+            io.save_detections(detections, path)
+            del detections
+            for loader_name, load in LOADERS.items():
+                name = f"{loader_name}/frames={n_frames}"
+                stats = measure_load(load, path)
+                print(
+                    f"{name}: peak {stats['peak_bytes'] / 2 ** 20:.1f}MiB, "
+                    f"retained {stats['retained_bytes'] / 2 ** 20:.1f}MiB",
+                    file=sys.stderr,
+                )
+                results.append(
+                    {
+                        "name": name,
+                        "loader": loader_name,
+                        "n_frames": n_frames,
+                        "file_bytes": path.stat().st_size,
+                        "peak_bytes_per_frame": stats["peak_bytes"] / n_frames,
+                        **stats,
+                    }
+                )
+    write_results(args.output, "memory", results)
+    if args.baseline is not None:
+        regressions = find_regressions(
+            results, args.baseline, args.tolerance, metric="peak_bytes"
+        )
+        if regressions:
+            print("Regressions found:\n" + "\n".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
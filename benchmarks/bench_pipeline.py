@@ -0,0 +1,249 @@
+"""Benchmark the end-to-end processing of a synthetic video, from raw detections
+through conversion to loading, querying and rendering the releasable detections"""
+
+import argparse
+import copy
+import os.path
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import PIL.Image
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # isort:skip
+sys.path.insert(0, os.path.join(repo_root, "src", "scripts"))  # isort:skip
+
+from convert_raw_to_releasable_detections import Converter, VectorisedConverter
+from epic_kitchens.hoa import io
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from epic_kitchens.hoa.smoothing import (
+    smooth_bboxes_ema,
+    smooth_states_majority,
+    smooth_states_viterbi,
+)
+from epic_kitchens.hoa.spatial import ObjectGrid
+from epic_kitchens.hoa.tracking import track
+from epic_kitchens.hoa.types import FrameDetections
+from epic_kitchens.hoa.visualisation import DetectionRenderer
+from raw_detections import io as raw_io
+from raw_detections.columnar import RawVideoDetectionArrays
+from raw_detections.types import FrameDetections as RawFrameDetections
+
+from harness import find_regressions, time_calls, write_results
+from synthetic import (
+    DETECTOR_FRAME_HEIGHT,
+    DETECTOR_FRAME_WIDTH,
+    make_raw_video_detections,
+    make_releasable_video_detections,
+)
+
+parser = argparse.ArgumentParser(
+    description="Benchmark the processing of a synthetic video's detections",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "--output", type=Path, help="Path to write JSON results to, defaults to stdout"
+)
+parser.add_argument(
+    "--frames",
+    type=int,
+    default=10000,
+    help="Number of frames in the synthetic video, EPIC-KITCHENS videos have "
+    "around 30,000 on average",
+)
+parser.add_argument(
+    "--mean-hands", type=float, default=1.5, help="Mean number of hands per frame"
+)
+parser.add_argument(
+    "--mean-objects", type=float, default=5, help="Mean number of objects per frame"
+)
+parser.add_argument(
+    "--render-frames",
+    type=int,
+    default=100,
+    help="Number of frames to render, rendering is timed on a prefix of the video",
+)
+parser.add_argument(
+    "--repeats", type=int, default=5, help="Number of timed calls per benchmark"
+)
+parser.add_argument(
+    "--baseline",
+    type=Path,
+    help="Previous results file, exits with an error if any benchmark regressed",
+)
+parser.add_argument(
+    "--tolerance",
+    type=float,
+    default=1.25,
+    help="Slowdown factor relative to --baseline counted as a regression",
+)
+
+
+def make_benchmarks(
+    raw_detections: List[RawFrameDetections],
+    detections: List[FrameDetections],
+    tmp_dir: Path,
+    n_render_frames: int,
+) -> Dict[str, Callable[[], Any]]:
+    """Each benchmark is a function processing the whole synthetic video once,
+    apart from rendering which processes its first ``n_render_frames`` frames."""
+    raw_pkl = tmp_dir / "raw.pkl"
+    raw_io.save_detections(raw_detections, raw_pkl)
+    raw_pb_strs = [d.to_protobuf().SerializeToString() for d in raw_detections]
+    pkl = tmp_dir / "releasable.pkl"
+    io.save_detections(detections, pkl)
+    pb_strs = [d.to_protobuf().SerializeToString() for d in detections]
+    arrays = VideoDetectionArrays.from_protobuf_strs(pb_strs)
+    object_grid = ObjectGrid.from_detections(
+        arrays, object_threshold=0.01, cell_size=0.1
+    )
+    # scale() works in place, so scale copies to keep the benchmarked detections
+    # unchanged
+    scaled_detections = copy.deepcopy(detections)
+    converter = Converter(
+        frame_height=DETECTOR_FRAME_HEIGHT, frame_width=DETECTOR_FRAME_WIDTH
+    )
+    vectorised_converter = VectorisedConverter(
+        frame_height=DETECTOR_FRAME_HEIGHT, frame_width=DETECTOR_FRAME_WIDTH
+    )
+    raw_arrays = RawVideoDetectionArrays.from_protobuf_strs(raw_pb_strs)
+    renderer = DetectionRenderer()
+    frame = PIL.Image.new(
+        "RGB", (DETECTOR_FRAME_WIDTH, DETECTOR_FRAME_HEIGHT), (128, 128, 128)
+    )
+
+    def scale():
+        for frame_detections in scaled_detections:
+            frame_detections.scale(width_factor=1920, height_factor=1080)
+        for frame_detections in scaled_detections:
+            frame_detections.scale(width_factor=1 / 1920, height_factor=1 / 1080)
+
+    def render():
+        for frame_detections in detections[:n_render_frames]:
+            renderer.render_detections(frame, frame_detections)
+
+    return {
+        "raw/save_detections": lambda: raw_io.save_detections(
+            raw_detections, tmp_dir / "raw-out.pkl"
+        ),
+        "raw/load_detections": lambda: raw_io.load_detections(raw_pkl),
+        "raw/from_protobuf_str": lambda: [
+            RawFrameDetections.from_protobuf_str(pb_str) for pb_str in raw_pb_strs
+        ],
+        "raw/columnar_from_protobuf_strs": lambda: (
+            RawVideoDetectionArrays.from_protobuf_strs(raw_pb_strs)
+        ),
+        "convert/converter": lambda: converter.convert_video_annotations(
+            raw_detections
+        ),
+        "convert/vectorised_converter": lambda: (
+            vectorised_converter.convert_video_arrays(raw_arrays)
+        ),
+        "releasable/save_detections": lambda: io.save_detections(
+            detections, tmp_dir / "releasable-out.pkl"
+        ),
+        "releasable/load_detections": lambda: io.load_detections(pkl),
+        "releasable/load_detection_arrays": lambda: io.load_detection_arrays(pkl),
+        "releasable/from_protobuf_str": lambda: [
+            FrameDetections.from_protobuf_str(pb_str) for pb_str in pb_strs
+        ],
+        "releasable/get_hand_object_interactions": lambda: [
+            frame_detections.get_hand_object_interactions(
+                object_threshold=0.01, hand_threshold=0.1
+            )
+            for frame_detections in detections
+        ],
+        "releasable/columnar_get_hand_object_interactions": lambda: (
+            arrays.get_hand_object_interactions(
+                object_threshold=0.01, hand_threshold=0.1
+            )
+        ),
+        "releasable/columnar_get_hand_object_interactions_optimal": lambda: (
+            arrays.get_hand_object_interactions(
+                object_threshold=0.01, hand_threshold=0.1, method="optimal"
+            )
+        ),
+        "releasable/columnar_get_hand_object_interactions_max_distance": lambda: (
+            arrays.get_hand_object_interactions(
+                object_threshold=0.01, hand_threshold=0.1, max_distance=0.1
+            )
+        ),
+        "releasable/columnar_get_hand_object_interactions_object_grid": lambda: (
+            arrays.get_hand_object_interactions(
+                object_threshold=0.01,
+                hand_threshold=0.1,
+                max_distance=0.1,
+                object_grid=object_grid,
+            )
+        ),
+        "releasable/object_grid_from_detections": lambda: (
+            ObjectGrid.from_detections(arrays, object_threshold=0.01, cell_size=0.1)
+        ),
+        "releasable/track_greedy": lambda: track(
+            arrays, hand_threshold=0.1, object_threshold=0.01, method="greedy"
+        ),
+        "releasable/track_optimal": lambda: track(
+            arrays, hand_threshold=0.1, object_threshold=0.01, method="optimal"
+        ),
+        "releasable/smooth_states_majority": lambda: smooth_states_majority(
+            arrays, hand_threshold=0.1
+        ),
+        "releasable/smooth_states_viterbi": lambda: smooth_states_viterbi(
+            arrays, hand_threshold=0.1
+        ),
+        "releasable/smooth_bboxes_ema": lambda: smooth_bboxes_ema(
+            arrays, hand_threshold=0.1
+        ),
+        # Scales up and back down, so this is two passes over the video
+        "releasable/scale": scale,
+        "render/render_detections": render,
+    }
+
+
+def main(args):
+    print(f"Generating {args.frames} frames of detections", file=sys.stderr)
+    raw_detections = make_raw_video_detections(
+        args.frames, args.mean_hands, args.mean_objects
+    )
+    detections = make_releasable_video_detections(
+        args.frames, args.mean_hands, args.mean_objects
+    )
+    n_hands = sum(len(d.hands) for d in detections)
+    n_objects = sum(len(d.objects) for d in detections)
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        benchmarks = make_benchmarks(
+            raw_detections, detections, Path(tmp_dir), args.render_frames
+        )
+        for name, fn in benchmarks.items():
+            stats = time_calls(fn, n_repeats=args.repeats, n_warmup=1)
+            n_frames = args.frames
+            if name.startswith("render/"):
+                n_frames = min(args.render_frames, args.frames)
+            frames_per_second = n_frames / stats["median_s"]
+            print(
+                f"{name}: {stats['median_s'] * 1e3:.1f}ms "
+                f"({frames_per_second:,.0f} frames/s)",
+                file=sys.stderr,
+            )
+            results.append(
+                {
+                    "name": name,
+                    "n_frames": n_frames,
+                    "n_hands": n_hands,
+                    "n_objects": n_objects,
+                    "frames_per_second": frames_per_second,
+                    **stats,
+                }
+            )
+    write_results(args.output, "pipeline", results)
+    if args.baseline is not None:
+        regressions = find_regressions(results, args.baseline, args.tolerance)
+        if regressions:
+            print("Regressions found:\n" + "\n".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
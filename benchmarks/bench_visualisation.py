@@ -0,0 +1,142 @@
+"""Benchmark per-frame rendering latency across frame sizes and detection
+densities"""
+
+import argparse
+import sys
+import tempfile
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import PIL.Image
+
+from epic_kitchens.hoa.render_cache import CachedRenderer, RenderCache
+from epic_kitchens.hoa.types import FrameDetections
+from epic_kitchens.hoa.visualisation import DetectionRenderer, render_thumbnail
+
+from harness import find_regressions, time_calls, write_results
+from synthetic import make_frame_detections
+
+parser = argparse.ArgumentParser(
+    description="Benchmark rendering of hand-object detections",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "--output", type=Path, help="Path to write JSON results to, defaults to stdout"
+)
+parser.add_argument(
+    "--resolutions",
+    nargs="+",
+    default=["456x256", "1280x720", "1920x1080"],
+    help="Frame resolutions as WIDTHxHEIGHT",
+)
+parser.add_argument(
+    "--densities",
+    nargs="+",
+    default=["0x0", "2x2", "2x10", "4x50"],
+    help="Detections per frame as N_HANDSxN_OBJECTS",
+)
+parser.add_argument(
+    "--repeats", type=int, default=20, help="Number of timed calls per benchmark"
+)
+parser.add_argument(
+    "--baseline",
+    type=Path,
+    help="Previous results file, exits with an error if any benchmark regressed",
+)
+parser.add_argument(
+    "--tolerance",
+    type=float,
+    default=1.25,
+    help="Slowdown factor relative to --baseline counted as a regression",
+)
+
+THUMBNAIL_SIZE = (228, 128)
+
+
+def parse_pair(text: str) -> Tuple[int, int]:
+    first, second = text.lower().split("x")
+    return int(first), int(second)
+
+
+def make_backends(
+    cache_dir: Path, exit_stack: ExitStack
+) -> Dict[str, Callable[[PIL.Image.Image, FrameDetections], Callable[[], Any]]]:
+    """Each backend takes a frame and its detections and returns a function
+    rendering them once. Resources held by the functions are released when
+    ``exit_stack`` closes."""
+    interacted_renderer = DetectionRenderer(hand_threshold=0.5, object_threshold=0.5)
+    all_objects_renderer = DetectionRenderer(
+        hand_threshold=0.5, object_threshold=0.01, only_interacted_objects=False
+    )
+    thumbnail_renderer = DetectionRenderer(font_size=10, border=1, text_padding=1)
+
+    def cached_hit(frame, detections):
+        # Every density's detections have the same frame number, so each frame
+        # size and density needs its own cache to hit the frame rendered with them
+        density = f"{len(detections.hands)}x{len(detections.objects)}"
+        cached_renderer = CachedRenderer(
+            interacted_renderer,
+            [frame],
+            [detections],
+            RenderCache(cache_dir / f"{frame.width}x{frame.height}" / density),
+            prefetch=0,
+        )
+        exit_stack.enter_context(cached_renderer)
+        cached_renderer[0]
+        return lambda: cached_renderer[0]
+
+    return {
+        "render_detections": lambda frame, detections: (
+            lambda: interacted_renderer.render_detections(frame, detections)
+        ),
+        "render_detections_all_objects": lambda frame, detections: (
+            lambda: all_objects_renderer.render_detections(frame, detections)
+        ),
+        "render_thumbnail": lambda frame, detections: (
+            lambda: render_thumbnail(
+                thumbnail_renderer, frame, detections, THUMBNAIL_SIZE
+            )
+        ),
+        "cached_renderer_hit": cached_hit,
+    }
+
+
+def main(args):
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as cache_dir, ExitStack() as exit_stack:
+        backends = make_backends(Path(cache_dir), exit_stack)
+        for width, height in map(parse_pair, args.resolutions):
+            frame = PIL.Image.new("RGB", (width, height), (128, 128, 128))
+            for n_hands, n_objects in map(parse_pair, args.densities):
+                detections = make_frame_detections(n_hands, n_objects)
+                for backend_name, make_call in backends.items():
+                    name = (
+                        f"{backend_name}/{width}x{height}/"
+                        f"hands={n_hands},objects={n_objects}"
+                    )
+                    stats = time_calls(
+                        make_call(frame, detections), n_repeats=args.repeats
+                    )
+                    print(f"{name}: {stats['median_s'] * 1e3:.2f}ms", file=sys.stderr)
+                    results.append(
+                        {
+                            "name": name,
+                            "backend": backend_name,
+                            "frame_width": width,
+                            "frame_height": height,
+                            "n_hands": n_hands,
+                            "n_objects": n_objects,
+                            **stats,
+                        }
+                    )
+    write_results(args.output, "visualisation", results)
+    if args.baseline is not None:
+        regressions = find_regressions(results, args.baseline, args.tolerance)
+        if regressions:
+            print("Regressions found:\n" + "\n".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
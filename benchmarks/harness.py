@@ -0,0 +1,111 @@
+"""Shared helpers for timing benchmarks and recording their results as JSON"""
+
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+def time_calls(
+    fn: Callable[[], Any], n_repeats: int = 20, n_warmup: int = 2
+) -> Dict[str, float]:
+    """Time ``fn`` over ``n_repeats`` calls after ``n_warmup`` untimed calls.
+
+    Returns:
+        Latency statistics of a call in seconds.
+    """
+    for _ in range(n_warmup):
+        fn()
+    timings = []
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "n_repeats": n_repeats,
+        "mean_s": statistics.mean(timings),
+        "median_s": statistics.median(timings),
+        "p90_s": timings[min(len(timings) - 1, int(0.9 * len(timings)))],
+        "min_s": timings[0],
+        "max_s": timings[-1],
+    }
+
+
+def environment_metadata() -> Dict[str, Any]:
+    """Describe where and on what code the benchmarks ran"""
+    import numpy
+    import PIL
+    import google.protobuf
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+            universal_newlines=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "numpy": numpy.__version__,
+        "pillow": PIL.__version__,
+        "protobuf": google.protobuf.__version__,
+    }
+
+
+def write_results(path: Optional[Path], suite: str, results: List[Dict[str, Any]]):
+    document = {
+        "suite": suite,
+        "environment": environment_metadata(),
+        "results": results,
+    }
+    text = json.dumps(document, indent=2)
+    if path is None:
+        print(text)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def find_regressions(
+    results: List[Dict[str, Any]],
+    baseline_path: Path,
+    tolerance: float,
+    metric: str = "median_s",
+) -> List[str]:
+    """Compare results against a previous results file, matching benchmarks by
+    name.
+
+    Returns:
+        A description of each benchmark whose ``metric`` is more than ``tolerance``
+        times slower than the baseline.
+    """
+    baseline = {
+        result["name"]: result
+        for result in json.loads(baseline_path.read_text())["results"]
+    }
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["name"])
+        if previous is None:
+            continue
+        ratio = result[metric] / previous[metric]
+        if ratio > tolerance:
+            regressions.append(
+                f"{result['name']}: {metric} {previous[metric]:.6f}s -> "
+                f"{result[metric]:.6f}s ({ratio:.2f}x)"
+            )
+    return regressions
@@ -0,0 +1,187 @@
+"""Generate synthetic detections for benchmarking"""
+
+import os.path
+import sys
+from typing import List
+
+import numpy as np
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # isort:skip
+sys.path.insert(0, os.path.join(repo_root, "src"))  # isort:skip
+
+from epic_kitchens.hoa.types import (
+    BBox,
+    FloatVector,
+    FrameDetections,
+    HandDetection,
+    HandSide,
+    HandState,
+    ObjectDetection,
+)
+from raw_detections.types import FrameDetections as RawFrameDetections
+
+
+def random_bbox(rng: np.random.RandomState, max_size: float = 0.3) -> BBox:
+    width, height = rng.uniform(0.02, max_size, size=2)
+    left = rng.uniform(0, 1 - width)
+    top = rng.uniform(0, 1 - height)
+    return BBox(left=left, top=top, right=left + width, bottom=top + height)
+
+
+def make_frame_detections(
+    n_hands: int,
+    n_objects: int,
+    frame_number: int = 1,
+    video_id: str = "P01_101",
+    rng: np.random.RandomState = None,
+) -> FrameDetections:
+    """Make detections for a frame with exactly ``n_hands`` hands and ``n_objects``
+    objects, all scoring high enough to be drawn by the default renderer."""
+    if rng is None:
+        rng = np.random.RandomState(frame_number)
+    return FrameDetections(
+        video_id=video_id,
+        frame_number=frame_number,
+        hands=[
+            HandDetection(
+                bbox=random_bbox(rng),
+                score=rng.uniform(0.8, 1),
+                state=HandState(rng.randint(len(HandState))),
+                side=HandSide(i % len(HandSide)),
+                object_offset=FloatVector(*rng.uniform(-0.3, 0.3, size=2)),
+            )
+            for i in range(n_hands)
+        ],
+        objects=[
+            ObjectDetection(bbox=random_bbox(rng), score=rng.uniform(0.01, 1))
+            for _ in range(n_objects)
+        ],
+    )
+
+
+def make_video_detections(
+    n_frames: int, n_hands: int, n_objects: int, video_id: str = "P01_101", seed=0
+) -> List[FrameDetections]:
+    rng = np.random.RandomState(seed)
+    return [
+        make_frame_detections(n_hands, n_objects, frame_number, video_id, rng)
+        for frame_number in range(1, n_frames + 1)
+    ]
+
+
+# Detections scoring below these thresholds were discarded during extraction
+HAND_SCORE_THRESHOLD = 0.1
+OBJECT_SCORE_THRESHOLD = 0.01
+
+# Size of the frames the detector was run on
+DETECTOR_FRAME_WIDTH = 456
+DETECTOR_FRAME_HEIGHT = 256
+
+
+def random_scores(
+    rng: np.random.RandomState, threshold: float, size: int
+) -> np.ndarray:
+    """Scores above the extraction ``threshold``, skewed towards low scores like
+    those of the real detections where most kept detections are weak."""
+    return threshold + (1 - threshold) * rng.beta(0.7, 1.5, size=size)
+
+
+def make_raw_frame_detections(
+    n_hands: int,
+    n_objects: int,
+    frame_number: int = 1,
+    video_id: str = "P01_101",
+    rng: np.random.RandomState = None,
+) -> RawFrameDetections:
+    """Make raw detections, in pixels of the detector's frame, for a frame with
+    ``n_hands`` hands and ``n_objects`` objects."""
+    if rng is None:
+        rng = np.random.RandomState(frame_number)
+
+    def make_rows(n: int, threshold: float) -> np.ndarray:
+        rows = np.zeros((n, 10), dtype=np.float32)
+        sizes = rng.uniform(0.02, 0.3, size=(n, 2)) * [
+            DETECTOR_FRAME_WIDTH,
+            DETECTOR_FRAME_HEIGHT,
+        ]
+        rows[:, 0] = rng.uniform(0, DETECTOR_FRAME_WIDTH - sizes[:, 0])
+        rows[:, 1] = rng.uniform(0, DETECTOR_FRAME_HEIGHT - sizes[:, 1])
+        rows[:, 2:4] = rows[:, 0:2] + sizes
+        rows[:, 4] = random_scores(rng, threshold, n)
+        return rows
+
+    hands = make_rows(n_hands, HAND_SCORE_THRESHOLD)
+    hands[:, 5] = rng.randint(len(HandState), size=n_hands)
+    # Offsets are in the detector's output units: magnitudes in thousands of pixels
+    # and unit directions scaled by 0.1
+    hands[:, 6] = rng.uniform(0, 0.2, size=n_hands)
+    directions = rng.normal(size=(n_hands, 2))
+    hands[:, 7:9] = 0.1 * directions / np.linalg.norm(directions, axis=1, keepdims=True)
+    hands[:, 9] = np.arange(n_hands) % len(HandSide)
+    objects = make_rows(n_objects, OBJECT_SCORE_THRESHOLD)
+    # Round trip through protobuf as raw detections are always loaded from files
+    return RawFrameDetections.from_protobuf_str(
+        RawFrameDetections.from_detections(
+            video_id=video_id,
+            frame_number=frame_number,
+            hand_detections=list(hands) or None,
+            object_detections=list(objects) or None,
+        )
+        .to_protobuf()
+        .SerializeToString()
+    )
+
+
+def make_raw_video_detections(
+    n_frames: int,
+    mean_hands: float = 1.5,
+    mean_objects: float = 5,
+    video_id: str = "P01_101",
+    seed=0,
+) -> List[RawFrameDetections]:
+    """Make raw detections for a video, with the number of hands and objects in
+    each frame drawn from Poisson distributions with the given means."""
+    rng = np.random.RandomState(seed)
+    return [
+        make_raw_frame_detections(
+            min(rng.poisson(mean_hands), 4),
+            rng.poisson(mean_objects),
+            frame_number,
+            video_id,
+            rng,
+        )
+        for frame_number in range(1, n_frames + 1)
+    ]
+
+
+def make_releasable_video_detections(
+    n_frames: int,
+    mean_hands: float = 1.5,
+    mean_objects: float = 5,
+    video_id: str = "P01_101",
+    seed=0,
+) -> List[FrameDetections]:
+    """Make releasable detections for a video, with the same distributions of
+    detection counts and scores as :func:`make_raw_video_detections`."""
+    rng = np.random.RandomState(seed)
+    detections = []
+    for frame_number in range(1, n_frames + 1):
+        frame_detections = make_frame_detections(
+            min(rng.poisson(mean_hands), 4),
+            rng.poisson(mean_objects),
+            frame_number,
+            video_id,
+            rng,
+        )
+        hand_scores = random_scores(
+            rng, HAND_SCORE_THRESHOLD, len(frame_detections.hands)
+        )
+        object_scores = random_scores(
+            rng, OBJECT_SCORE_THRESHOLD, len(frame_detections.objects)
+        )
+        for hand, score in zip(frame_detections.hands, hand_scores):
+            hand.score = float(score)
+        for obj, score in zip(frame_detections.objects, object_scores):
+            obj.score = float(score)
+        detections.append(frame_detections)
+    return detections
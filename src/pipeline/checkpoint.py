@@ -0,0 +1,41 @@
+"""Record which videos have been processed so interrupted runs can resume"""
+
+import os
+from pathlib import Path
+from typing import Set, Union
+
+__all__ = [
+    "Checkpoint",
+]
+
+
+class Checkpoint:
+    """An append-only file listing the IDs of completed videos, one per line. Each
+    ID is flushed to disk as soon as it is recorded, so after a crash only the
+    videos in flight are redone."""
+
+    def __init__(self, path: Union[Path, str]):
+        self.path = Path(path)
+        self.completed: Set[str] = set()
+        if self.path.exists():
+            contents = self.path.read_text()
+            complete_contents = contents[: contents.rfind("\n") + 1]
+            if complete_contents != contents:
+                # The last line was being written when we crashed, drop it so the
+                # next recorded ID starts on its own line.
+                self.path.write_text(complete_contents)
+            self.completed = set(complete_contents.split())
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self.completed
+
+    def __len__(self) -> int:
+        return len(self.completed)
+
+    def record(self, video_id: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(video_id + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.completed.add(video_id)
@@ -0,0 +1,191 @@
+"""Per-stage timing and throughput of the pipeline scripts, to tell whether a
+rebuild is I/O or CPU bound"""
+
+import argparse
+import json
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+__all__ = [
+    "StageStats",
+    "Instrumentation",
+    "add_instrumentation_arguments",
+]
+
+
+@dataclass
+class StageStats:
+    """Totals over every run of a stage"""
+
+    name: str
+    calls: int = 0
+    wall_seconds: float = 0.0
+    #: CPU time of this process and of any worker processes that exited during
+    #: the stage
+    cpu_seconds: float = 0.0
+    frames: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+
+    @property
+    def frames_per_second(self) -> float:
+        if self.wall_seconds == 0:
+            return 0.0
+        return self.frames / self.wall_seconds
+
+    @property
+    def cpu_utilisation(self) -> float:
+        """CPU time over wall time, well below 1 for I/O bound stages and above 1
+        for stages running in several processes."""
+        if self.wall_seconds == 0:
+            return 0.0
+        return self.cpu_seconds / self.wall_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        stats["frames_per_second"] = self.frames_per_second
+        stats["cpu_utilisation"] = self.cpu_utilisation
+        return stats
+
+
+class Instrumentation:
+    """Collects :class:`StageStats` for the stages of a script, e.g. load, decode,
+    fixup, convert, encode and write.
+
+    Example:
+        >>> instrumentation = Instrumentation("convert")
+        >>> with instrumentation.stage("load") as stats:
+        ...     data = path.read_bytes()
+        ...     stats.bytes_read += len(data)
+
+    Args:
+        script: Name of the script being instrumented, used to label the metrics.
+    """
+
+    def __init__(self, script: str):
+        self.script = script
+        self.stages: Dict[str, StageStats] = OrderedDict()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        """Time a run of a stage. The yielded stats can be used to count the frames
+        and bytes the stage processed."""
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(name)
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        try:
+            yield stats
+        finally:
+            stats.calls += 1
+            stats.wall_seconds += time.perf_counter() - wall_start
+            stats.cpu_seconds += _cpu_seconds() - cpu_start
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "script": self.script,
+            "wall_seconds": time.perf_counter() - self._start,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": [stats.to_dict() for stats in self.stages.values()],
+        }
+
+    def format_prometheus(self) -> str:
+        """Format the stage stats in the Prometheus text exposition format, as read
+        by e.g. the node exporter's textfile collector."""
+        summary = self.summary()
+        lines = []
+        for field, metric_type, description in [
+            ("calls", "counter", "Number of runs of the stage"),
+            ("wall_seconds", "counter", "Wall time spent in the stage"),
+            ("cpu_seconds", "counter", "CPU time spent in the stage"),
+            ("frames", "counter", "Frames processed by the stage"),
+            ("bytes_read", "counter", "Bytes read by the stage"),
+            ("bytes_written", "counter", "Bytes written by the stage"),
+            ("frames_per_second", "gauge", "Frames processed per second of wall time"),
+        ]:
+            metric = f"hoa_pipeline_stage_{field}"
+            if metric_type == "counter":
+                # Prometheus naming convention for counters
+                metric += "_total"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for stats in summary["stages"]:
+                lines.append(
+                    f'{metric}{{script="{self.script}",stage="{stats["name"]}"}} '
+                    f"{stats[field]}"
+                )
+        if summary["peak_rss_bytes"] is not None:
+            metric = "hoa_pipeline_peak_rss_bytes"
+            lines.append(f"# HELP {metric} Peak resident set size of the script")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(
+                f'{metric}{{script="{self.script}"}} {summary["peak_rss_bytes"]}'
+            )
+        return "\n".join(lines) + "\n"
+
+    def save(
+        self,
+        json_path: Optional[Path] = None,
+        prometheus_path: Optional[Path] = None,
+    ) -> None:
+        """Write the stage stats as JSON and/or in the Prometheus text format."""
+        if json_path is not None:
+            with open(json_path, "w") as f:
+                json.dump(self.summary(), f, indent=2)
+        if prometheus_path is not None:
+            # Write atomically so a collector never scrapes a partial file
+            tmp_path = Path(str(prometheus_path) + ".tmp")
+            tmp_path.write_text(self.format_prometheus())
+            os.replace(tmp_path, prometheus_path)
+
+
+def add_instrumentation_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the ``--metrics`` and ``--prometheus-metrics`` options to a script."""
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help="Path to write a JSON summary of the time, throughput and memory use "
+        "of each stage to",
+    )
+    parser.add_argument(
+        "--prometheus-metrics",
+        type=Path,
+        help="Path to write the stage metrics to in the Prometheus text format",
+    )
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process or of its largest waited-for child,
+    or ``None`` where it isn't available."""
+    if resource is None:
+        return None
+    max_rss = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is in kilobytes on Linux but bytes on macOS
+    if os.uname().sysname == "Darwin":
+        return max_rss
+    return max_rss * 1024
+
+
+def _cpu_seconds() -> float:
+    if resource is None:
+        return time.process_time()
+    total = 0.0
+    for who in [resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN]:
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
@@ -0,0 +1,113 @@
+"""Deterministic assignment of videos to shards balanced by frame count, for
+splitting dataset rebuilds across several machines"""
+
+import heapq
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+__all__ = [
+    "assign_shards",
+    "select_shard",
+    "write_shard_manifest",
+    "load_shard_manifests",
+]
+
+
+def assign_shards(
+    video_ids: Iterable[str], frame_counts: Dict[str, int], num_shards: int
+) -> Dict[str, int]:
+    """Assign videos to shards so every shard has a similar total number of frames.
+
+    Videos with a known frame count are assigned greedily, longest first, to the
+    shard with the fewest frames so far. The assignment only depends on
+    ``frame_counts``, so every node computes the same assignment regardless of
+    which videos it happens to see. Videos missing from ``frame_counts`` are
+    assigned by a stable hash of their ID.
+
+    Args:
+        video_ids: Videos to assign.
+        frame_counts: Number of frames of each video in the dataset.
+        num_shards: Number of shards.
+
+    Returns:
+        A mapping from each video in ``video_ids`` to its shard index.
+    """
+    if num_shards < 1:
+        raise ValueError(f"Expected at least one shard, but got {num_shards}")
+    balanced_assignment = {}
+    # (total frames, shard index), ties are broken by the lowest shard index
+    shard_totals = [(0, shard_index) for shard_index in range(num_shards)]
+    for video_id in sorted(frame_counts, key=lambda v: (-frame_counts[v], v)):
+        total, shard_index = heapq.heappop(shard_totals)
+        balanced_assignment[video_id] = shard_index
+        heapq.heappush(shard_totals, (total + frame_counts[video_id], shard_index))
+
+    assignment = {}
+    for video_id in video_ids:
+        if video_id in balanced_assignment:
+            assignment[video_id] = balanced_assignment[video_id]
+        else:
+            assignment[video_id] = zlib.crc32(video_id.encode("utf8")) % num_shards
+    return assignment
+
+
+def select_shard(
+    video_ids: Iterable[str],
+    frame_counts: Dict[str, int],
+    shard_index: int,
+    num_shards: int,
+) -> List[str]:
+    """Select the videos belonging to shard ``shard_index``, keeping their order.
+
+    Args:
+        video_ids: Videos to select from.
+        frame_counts: Number of frames of each video in the dataset.
+        shard_index: Index of the shard to select, from 0 to ``num_shards - 1``.
+        num_shards: Number of shards.
+
+    Returns:
+        The videos assigned to the shard.
+    """
+    if not 0 <= shard_index < num_shards:
+        raise ValueError(
+            f"Expected shard index between 0 and {num_shards - 1}, but got "
+            f"{shard_index}"
+        )
+    video_ids = list(video_ids)
+    assignment = assign_shards(video_ids, frame_counts, num_shards)
+    return [video_id for video_id in video_ids if assignment[video_id] == shard_index]
+
+
+def get_shard_manifest_path(
+    output_dir: Path, shard_index: int, num_shards: int
+) -> Path:
+    return output_dir / f".shard-{shard_index}-of-{num_shards}.json"
+
+
+def write_shard_manifest(
+    output_dir: Path, shard_index: int, num_shards: int, video_ids: List[str]
+) -> None:
+    """Record in a shard's output directory which videos the shard is responsible
+    for, so merging shards can check every video was produced exactly once."""
+    output_dir.mkdir(exist_ok=True, parents=True)
+    with open(get_shard_manifest_path(output_dir, shard_index, num_shards), "w") as f:
+        json.dump(
+            {
+                "shard_index": shard_index,
+                "num_shards": num_shards,
+                "video_ids": sorted(video_ids),
+            },
+            f,
+            indent=2,
+        )
+
+
+def load_shard_manifests(output_dir: Path) -> List[Dict]:
+    """Load the manifests of the shards written to ``output_dir``."""
+    manifests = []
+    for path in sorted(output_dir.glob(".shard-*-of-*.json")):
+        with open(path) as f:
+            manifests.append(json.load(f))
+    return manifests
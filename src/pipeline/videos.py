@@ -0,0 +1,69 @@
+"""Discovery of the videos making up the dataset and their expected lengths"""
+
+import csv
+import re
+from pathlib import Path
+from typing import Dict, Iterator, Union
+
+from raw_detections.archive import get_archive_stem, is_archive
+
+__all__ = [
+    "iter_video_dirs",
+    "is_video_id",
+    "get_video_id",
+    "get_participant_id",
+    "load_frame_counts",
+]
+
+_PERSON_DIR_PATTERN = re.compile(r"P\d+")
+_VIDEO_ID_PATTERN = re.compile(r"P\d+_\d+")
+
+
+def is_video_id(name: str) -> bool:
+    return _VIDEO_ID_PATTERN.fullmatch(name) is not None
+
+
+def get_video_id(path: Union[Path, str]) -> str:
+    """Get the video ID of a directory or archive of raw per-frame detections, e.g.
+    P01_101 for P01_101/ or P01_101.tar"""
+    if is_archive(path):
+        return get_archive_stem(path)
+    return Path(path).name
+
+
+def get_participant_id(video_id: str) -> str:
+    """Get the participant ID of a video, e.g. P01 for P01_101"""
+    return video_id.split("_")[0]
+
+
+def iter_video_dirs(root_dir: Union[Path, str]) -> Iterator[Path]:
+    """Iterate over the per-video directories or archives of raw detections laid
+    out as ``{root_dir}/{participant_id}/{video_id}/`` or
+    ``{root_dir}/{participant_id}/{video_id}.tar`` (or any other archive suffix).
+    Use :func:`get_video_id` to get their video IDs. If a video has both a
+    directory and an archive, only the directory is yielded."""
+    root_dir = Path(root_dir)
+
+    def is_person_dir(p: Path) -> bool:
+        return _PERSON_DIR_PATTERN.fullmatch(p.name) is not None
+
+    for person_dir in sorted(filter(is_person_dir, root_dir.iterdir())):
+        seen_video_ids = set()
+        for video_dir in sorted(person_dir.iterdir()):
+            if not (video_dir.is_dir() or is_archive(video_dir)):
+                continue
+            video_id = get_video_id(video_dir)
+            if is_video_id(video_id) and video_id not in seen_video_ids:
+                seen_video_ids.add(video_id)
+                yield video_dir
+
+
+def load_frame_counts(path: Union[Path, str]) -> Dict[str, int]:
+    """Load the number of RGB frames of each video from a CSV like
+    ``EPIC_100_frame_counts.csv``
+
+    Returns:
+        A mapping from video ID to number of frames.
+    """
+    with open(path, newline="") as f:
+        return {row["video_id"]: int(row["rgb_n_frames"]) for row in csv.DictReader(f)}
@@ -1,3 +1,53 @@
-from .io import load_detections, save_detections
-from .types import FrameDetections, HandDetection, ObjectDetection, HandSide, HandState
-from .visualisation import DetectionRenderer
\ No newline at end of file
+"""Hand-object detections for EPIC-KITCHENS-100.
+
+The public classes and functions are imported from their submodules on first
+access, so e.g. importing :func:`load_detections` doesn't import Pillow for
+rendering.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .columnar import VideoDetectionArrays
+    from .io import load_detection_arrays, load_detections, save_detections
+    from .types import (
+        FrameDetections,
+        HandDetection,
+        ObjectDetection,
+        HandSide,
+        HandState,
+    )
+    from .visualisation import DetectionRenderer, MontageRenderer
+
+# Public attribute name -> submodule defining it
+_LAZY_ATTRIBUTES = {
+    "VideoDetectionArrays": "columnar",
+    "load_detection_arrays": "io",
+    "load_detections": "io",
+    "save_detections": "io",
+    "FrameDetections": "types",
+    "HandDetection": "types",
+    "ObjectDetection": "types",
+    "HandSide": "types",
+    "HandState": "types",
+    "DetectionRenderer": "visualisation",
+    "MontageRenderer": "visualisation",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    try:
+        submodule = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{submodule}", __name__), name)
+    # Cache the attribute so __getattr__ is only called on first access
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,296 @@
+"""One-to-one assignment of detections to detections, e.g. hands to objects or
+objects to the objects of the next frame, solved greedily or optimally over many
+small problems at once."""
+
+from typing import Tuple
+
+import numpy as np
+
+__all__ = [
+    "ASSIGNMENT_METHODS",
+    "linear_sum_assignment",
+    "match_pairs",
+]
+
+#: Methods supported by :func:`match_pairs`
+ASSIGNMENT_METHODS = ("greedy", "optimal")
+
+# Maximum number of cost matrix elements in each batch of assignment problems
+_MAX_BATCH_ELEMENTS = 1 << 20
+
+
+def linear_sum_assignment(
+    cost: np.ndarray, maximize: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Solve the linear sum assignment problem, matching every row of a cost matrix
+    to a distinct column (or every column to a distinct row if there are fewer
+    columns) with the least total cost.
+
+    This follows :func:`scipy.optimize.linear_sum_assignment` and implements the
+    same shortest augmenting path algorithm, so scipy isn't required.
+
+    Args:
+        cost: ``(N, M)`` cost matrix, ``inf`` forbidding assignments.
+        maximize: Whether to maximise the total cost instead.
+
+    Returns:
+        Row indices and column indices of the assignment, sorted by row.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.ndim != 2:
+        raise ValueError(f"Expected a 2D cost matrix but got shape {cost.shape}")
+    if np.isnan(cost).any() or (cost == (np.inf if maximize else -np.inf)).any():
+        raise ValueError("Cost matrix contains invalid values")
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    if maximize:
+        cost = -cost
+    n_rows, n_cols = cost.shape
+    # Pad with rows costing nothing to make the matrix square, the rows assigned to
+    # the padding columns are dropped
+    square_cost = np.zeros((1, n_cols, n_cols))
+    square_cost[0, :n_rows] = cost
+    col4row = _solve_square(square_cost)[0, :n_rows]
+    if transposed:
+        order = np.argsort(col4row)
+        return col4row[order], order
+    return np.arange(n_rows), col4row
+
+
+def match_pairs(
+    groups: np.ndarray,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    costs: np.ndarray,
+    method: str = "greedy",
+) -> np.ndarray:
+    """Match rows to columns one-to-one within many independent groups of
+    candidate pairs, e.g. the hands and objects of each frame.
+
+    Args:
+        groups: ``(P,)`` group of each candidate pair. Rows and columns must belong
+            to a single group.
+        rows: ``(P,)`` row of each candidate pair, e.g. a hand's row.
+        cols: ``(P,)`` column of each candidate pair, e.g. an object's row.
+        costs: ``(P,)`` cost of matching each candidate pair.
+        method: ``"greedy"`` to repeatedly match the cheapest pair whose row and
+            column are both unmatched, or ``"optimal"`` to match as many pairs as
+            possible in each group with the least total cost.
+
+    Returns:
+        ``(P,)`` boolean mask of the matched pairs.
+    """
+    if method == "greedy":
+        return _match_greedy(rows, cols, costs)
+    if method == "optimal":
+        return _match_optimal(groups, rows, cols, costs)
+    raise ValueError(
+        f"Unknown assignment method {method!r}, expected one of "
+        f"{', '.join(ASSIGNMENT_METHODS)}"
+    )
+
+
+def _match_greedy(rows: np.ndarray, cols: np.ndarray, costs: np.ndarray) -> np.ndarray:
+    # Rank pairs by cost, ties going to the first row then column. A pair that is
+    # the best ranked remaining pair of both its row and its column is matched by
+    # the sequential greedy algorithm, as any better ranked pair sharing its row or
+    # column would have to be matched first. Matching all such pairs at once,
+    # dropping the pairs they conflict with, and repeating gives the same result
+    # in a few vectorised rounds.
+    order = np.lexsort((cols, rows, costs))
+    matched = np.zeros(len(rows), dtype=bool)
+    remaining = order
+    while len(remaining) > 0:
+        remaining_rows = rows[remaining]
+        remaining_cols = cols[remaining]
+        is_best_for_row = _is_first_occurrence(remaining_rows)
+        is_best_for_col = _is_first_occurrence(remaining_cols)
+        new_matches = remaining[is_best_for_row & is_best_for_col]
+        matched[new_matches] = True
+        remaining = remaining[
+            ~np.isin(remaining_rows, rows[new_matches])
+            & ~np.isin(remaining_cols, cols[new_matches])
+        ]
+    return matched
+
+
+def _match_optimal(
+    groups: np.ndarray, rows: np.ndarray, cols: np.ndarray, costs: np.ndarray
+) -> np.ndarray:
+    # Groups in which no two pairs share a row or column are solved by matching
+    # every pair, only groups with competing pairs need solving
+    _, row_idxs, row_counts = np.unique(rows, return_inverse=True, return_counts=True)
+    _, col_idxs, col_counts = np.unique(cols, return_inverse=True, return_counts=True)
+    competes = (row_counts[row_idxs] > 1) | (col_counts[col_idxs] > 1)
+    matched = np.ones(len(rows), dtype=bool)
+    contested = np.isin(groups, np.unique(groups[competes]))
+    if not contested.any():
+        return matched
+    pairs = np.flatnonzero(contested)
+    group_idxs = np.unique(groups[pairs], return_inverse=True)[1].reshape(-1)
+    n_groups = group_idxs.max() + 1
+    local_rows, n_rows = _local_indices(group_idxs, rows[pairs], n_groups)
+    local_cols, n_cols = _local_indices(group_idxs, cols[pairs], n_groups)
+    # Forbid non-candidate pairs with a cost higher than any set of candidates in
+    # the group, so as many candidates as possible are matched
+    forbidden_costs = (
+        np.bincount(group_idxs, np.abs(costs[pairs]), minlength=n_groups) * 2 + 1
+    )
+    sizes = np.maximum(n_rows, n_cols)
+
+    # Renumber groups by size so the pairs of groups of the same size are
+    # contiguous once sorted, and can be solved in batches
+    group_order = np.argsort(sizes, kind="stable")
+    ranks = np.empty(n_groups, dtype=np.int64)
+    ranks[group_order] = np.arange(n_groups)
+    pair_order = np.argsort(ranks[group_idxs], kind="stable")
+    pairs = pairs[pair_order]
+    pair_ranks = ranks[group_idxs[pair_order]]
+    local_rows = local_rows[pair_order]
+    local_cols = local_cols[pair_order]
+    pair_starts = np.searchsorted(pair_ranks, np.arange(n_groups + 1))
+    n_rows, n_cols = n_rows[group_order], n_cols[group_order]
+    forbidden_costs, sizes = forbidden_costs[group_order], sizes[group_order]
+
+    pair_matched = np.zeros(len(pairs), dtype=bool)
+    size_starts = np.searchsorted(sizes, np.unique(sizes))
+    size_ends = np.append(size_starts[1:], n_groups)
+    for size_start, size_end in zip(size_starts, size_ends):
+        size = sizes[size_start]
+        batch_size = max(1, _MAX_BATCH_ELEMENTS // size ** 2)
+        for start in range(size_start, size_end, batch_size):
+            end = min(start + batch_size, size_end)
+            batch_pairs = slice(pair_starts[start], pair_starts[end])
+            batch_groups = pair_ranks[batch_pairs] - start
+            batch_rows = local_rows[batch_pairs]
+            batch_cols = local_cols[batch_pairs]
+            # Pad groups to square matrices with rows and columns that cost
+            # nothing to be assigned to
+            is_real = (
+                np.arange(size)[None, :, None] < n_rows[start:end, None, None]
+            ) & (np.arange(size)[None, None, :] < n_cols[start:end, None, None])
+            cost_matrices = np.where(
+                is_real, forbidden_costs[start:end, None, None], 0.0
+            )
+            cost_matrices[batch_groups, batch_rows, batch_cols] = costs[
+                pairs[batch_pairs]
+            ]
+            col4row = _solve_square(cost_matrices)
+            pair_matched[batch_pairs] = col4row[batch_groups, batch_rows] == batch_cols
+    matched[pairs] = pair_matched
+    return matched
+
+
+def _solve_square(cost: np.ndarray) -> np.ndarray:
+    """Solve a batch of square linear sum assignment problems with the shortest
+    augmenting path algorithm of Crouse, "On implementing 2D rectangular
+    assignment algorithms" (2016), stepping every problem of the batch at once.
+
+    Args:
+        cost: ``(B, N, N)`` cost matrices, ``inf`` forbidding assignments.
+
+    Returns:
+        ``(B, N)`` column assigned to each row of each problem.
+    """
+    n_problems, size, _ = cost.shape
+    u = np.zeros((n_problems, size))
+    v = np.zeros((n_problems, size))
+    col4row = np.full((n_problems, size), -1, dtype=np.int64)
+    row4col = np.full((n_problems, size), -1, dtype=np.int64)
+    for current_row in range(size):
+        # Dijkstra-like search for the shortest augmenting path from current_row to
+        # an unassigned column using reduced costs, in each problem still searching
+        shortest = np.full((n_problems, size), np.inf)
+        path = np.full((n_problems, size), -1, dtype=np.int64)
+        scanned_cols = np.zeros((n_problems, size), dtype=bool)
+        scanned_rows = np.zeros((n_problems, size), dtype=bool)
+        min_values = np.zeros(n_problems)
+        rows = np.full(n_problems, current_row, dtype=np.int64)
+        sinks = np.full(n_problems, -1, dtype=np.int64)
+        searching = np.arange(n_problems)
+        while len(searching) > 0:
+            search_rows = rows[searching]
+            scanned_rows[searching, search_rows] = True
+            reduced = (
+                min_values[searching, None]
+                + cost[searching, search_rows]
+                - u[searching, search_rows][:, None]
+                - v[searching]
+            )
+            search_shortest = shortest[searching]
+            search_scanned_cols = scanned_cols[searching]
+            improved = ~search_scanned_cols & (reduced < search_shortest)
+            path[searching] = np.where(improved, search_rows[:, None], path[searching])
+            search_shortest = np.where(improved, reduced, search_shortest)
+            shortest[searching] = search_shortest
+            candidates = np.where(search_scanned_cols, np.inf, search_shortest)
+            search_min_values = candidates.min(axis=1)
+            if np.isinf(search_min_values).any():
+                raise ValueError("Cost matrix is infeasible")
+            # Prefer unassigned columns to finish the path as early as possible
+            is_closest = candidates == search_min_values[:, None]
+            is_closest_unassigned = is_closest & (row4col[searching] == -1)
+            cols = np.where(
+                is_closest_unassigned.any(axis=1),
+                is_closest_unassigned.argmax(axis=1),
+                is_closest.argmax(axis=1),
+            )
+            min_values[searching] = search_min_values
+            scanned_cols[searching, cols] = True
+            next_rows = row4col[searching, cols]
+            found = next_rows == -1
+            sinks[searching[found]] = cols[found]
+            rows[searching[~found]] = next_rows[~found]
+            searching = searching[~found]
+
+        u[:, current_row] += min_values
+        scanned_rows[:, current_row] = False
+        problem_idxs, row_idxs = np.nonzero(scanned_rows)
+        u[problem_idxs, row_idxs] += (
+            min_values[problem_idxs]
+            - shortest[problem_idxs, col4row[problem_idxs, row_idxs]]
+        )
+        v -= np.where(scanned_cols, min_values[:, None] - shortest, 0)
+
+        # Augment along the path back from the sink to current_row
+        cols = sinks
+        augmenting = np.arange(n_problems)
+        while len(augmenting) > 0:
+            augment_cols = cols[augmenting]
+            augment_rows = path[augmenting, augment_cols]
+            row4col[augmenting, augment_cols] = augment_rows
+            cols[augmenting] = col4row[augmenting, augment_rows]
+            col4row[augmenting, augment_rows] = augment_cols
+            augmenting = augmenting[augment_rows != current_row]
+    return col4row
+
+
+def _local_indices(
+    group_idxs: np.ndarray, values: np.ndarray, n_groups: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Number the distinct values within each group from 0 in sorted order.
+
+    Returns:
+        The number of each value within its group, and the number of distinct
+        values in each group.
+    """
+    order = np.lexsort((values, group_idxs))
+    sorted_values = values[order]
+    sorted_groups = group_idxs[order]
+    is_new = np.ones(len(values), dtype=bool)
+    is_new[1:] = (sorted_values[1:] != sorted_values[:-1]) | (
+        sorted_groups[1:] != sorted_groups[:-1]
+    )
+    value_idxs = np.cumsum(is_new) - 1
+    counts = np.bincount(sorted_groups[is_new], minlength=n_groups)
+    first_value_idxs = np.cumsum(counts) - counts
+    local_idxs = np.empty(len(values), dtype=np.int64)
+    local_idxs[order] = value_idxs - first_value_idxs[sorted_groups]
+    return local_idxs, counts
+
+
+def _is_first_occurrence(values: np.ndarray) -> np.ndarray:
+    is_first = np.zeros(len(values), dtype=bool)
+    is_first[np.unique(values, return_index=True)[1]] = True
+    return is_first
@@ -0,0 +1,502 @@
+"""A columnar (struct-of-arrays) representation of a video's detections for
+vectorised processing over whole videos"""
+
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from dataclasses import dataclass
+
+import epic_kitchens.hoa.types_pb2 as pb
+
+from . import profiling
+from .assignment import match_pairs
+from .spatial import ObjectGrid
+from .types import (
+    HAND_OBJECT_MATCHING_METHODS,
+    BBox,
+    FloatVector,
+    FrameDetections,
+    HandDetection,
+    HandSide,
+    HandState,
+    ObjectDetection,
+)
+
+__all__ = [
+    "VideoDetectionArrays",
+]
+
+
+@dataclass
+class VideoDetectionArrays:
+    """Dataclass holding all the detections of a video as flat arrays, one row per
+    hand/object detection. Rows are ordered by frame, and each row references its
+    frame through an index into :attr:`frame_numbers`.
+
+    Bounding boxes are stored as ``(left, top, right, bottom)`` and offsets as
+    ``(x, y)``, in the same coordinate space as the :class:`FrameDetections` they
+    were built from. Track IDs have no equivalent in :class:`FrameDetections` and
+    are dropped when converting to them or to protobuf.
+    """
+
+    video_id: str
+    #: ``(F,)`` frame numbers of the video's frames
+    frame_numbers: np.ndarray
+    #: ``(H,)`` index into :attr:`frame_numbers` of each hand's frame
+    hand_frame_idxs: np.ndarray
+    #: ``(H, 4)`` hand bounding boxes
+    hand_bboxes: np.ndarray
+    #: ``(H,)`` hand scores
+    hand_scores: np.ndarray
+    #: ``(H,)`` :class:`HandState` values
+    hand_states: np.ndarray
+    #: ``(H,)`` :class:`HandSide` values
+    hand_sides: np.ndarray
+    #: ``(H, 2)`` offsets from the hand center to the interacted object
+    hand_offsets: np.ndarray
+    #: ``(O,)`` index into :attr:`frame_numbers` of each object's frame
+    object_frame_idxs: np.ndarray
+    #: ``(O, 4)`` object bounding boxes
+    object_bboxes: np.ndarray
+    #: ``(O,)`` object scores
+    object_scores: np.ndarray
+    #: ``(H,)`` track of each hand, -1 for untracked hands, or ``None`` if the
+    #: hands haven't been tracked, see :mod:`epic_kitchens.hoa.tracking`
+    hand_track_ids: Optional[np.ndarray] = None
+    #: ``(O,)`` track of each object, -1 for untracked objects, or ``None`` if the
+    #: objects haven't been tracked
+    object_track_ids: Optional[np.ndarray] = None
+
+    @property
+    def n_frames(self) -> int:
+        return len(self.frame_numbers)
+
+    @property
+    def n_hands(self) -> int:
+        return len(self.hand_scores)
+
+    @property
+    def n_objects(self) -> int:
+        return len(self.object_scores)
+
+    @property
+    def hand_frame_offsets(self) -> np.ndarray:
+        """``(F + 1,)`` array such that the hands of frame ``i`` are the rows
+        ``hand_frame_offsets[i]:hand_frame_offsets[i + 1]``"""
+        return _frame_offsets(self.hand_frame_idxs, self.n_frames)
+
+    @property
+    def object_frame_offsets(self) -> np.ndarray:
+        """``(F + 1,)`` array such that the objects of frame ``i`` are the rows
+        ``object_frame_offsets[i]:object_frame_offsets[i + 1]``"""
+        return _frame_offsets(self.object_frame_idxs, self.n_frames)
+
+    @property
+    def hand_centers(self) -> np.ndarray:
+        """``(H, 2)`` centers of the hand bounding boxes"""
+        return _bbox_centers(self.hand_bboxes)
+
+    @property
+    def object_centers(self) -> np.ndarray:
+        """``(O, 2)`` centers of the object bounding boxes"""
+        return _bbox_centers(self.object_bboxes)
+
+    @staticmethod
+    def from_frame_detections(
+        detections: List[FrameDetections],
+    ) -> "VideoDetectionArrays":
+        """
+        Args:
+            detections: A video's detections, ordered by frame.
+
+        Returns:
+            The detections in columnar form.
+        """
+        if len(detections) == 0:
+            raise ValueError("Expected at least one frame of detections")
+        builder = _ArrayBuilder()
+        for frame_idx, frame_detections in enumerate(detections):
+            builder.frame_numbers.append(frame_detections.frame_number)
+            for hand in frame_detections.hands:
+                builder.add_hand(
+                    frame_idx,
+                    hand.bbox.left,
+                    hand.bbox.top,
+                    hand.bbox.right,
+                    hand.bbox.bottom,
+                    hand.score,
+                    hand.state.value,
+                    hand.side.value,
+                    hand.object_offset.x,
+                    hand.object_offset.y,
+                )
+            for obj in frame_detections.objects:
+                builder.add_object(
+                    frame_idx,
+                    obj.bbox.left,
+                    obj.bbox.top,
+                    obj.bbox.right,
+                    obj.bbox.bottom,
+                    obj.score,
+                )
+        return builder.build(detections[0].video_id)
+
+    @staticmethod
+    def from_protobuf_strs(pb_strs: Iterable[bytes]) -> "VideoDetectionArrays":
+        """Build the arrays straight from serialized protobuf detections (as stored in
+        detection pickles) without creating the intermediate dataclasses.
+
+        Args:
+            pb_strs: Serialized :class:`pb.Detections`, ordered by frame.
+
+        Returns:
+            The detections in columnar form.
+        """
+        builder = _ArrayBuilder()
+        video_id = None
+        pb_detections = pb.Detections()
+        for frame_idx, pb_str in enumerate(pb_strs):
+            pb_detections.Clear()
+            pb_detections.MergeFromString(pb_str)
+            if video_id is None:
+                video_id = pb_detections.video_id
+            builder.frame_numbers.append(pb_detections.frame_number)
+            for hand in pb_detections.hands:
+                bbox = hand.bbox
+                builder.add_hand(
+                    frame_idx,
+                    bbox.left,
+                    bbox.top,
+                    bbox.right,
+                    bbox.bottom,
+                    hand.score,
+                    hand.state,
+                    hand.side,
+                    hand.object_offset.x,
+                    hand.object_offset.y,
+                )
+            for obj in pb_detections.objects:
+                bbox = obj.bbox
+                builder.add_object(
+                    frame_idx, bbox.left, bbox.top, bbox.right, bbox.bottom, obj.score
+                )
+        if video_id is None:
+            raise ValueError("Expected at least one frame of detections")
+        return builder.build(video_id)
+
+    def to_frame_detections(self) -> List[FrameDetections]:
+        """
+        Returns:
+            The detections as a list of :class:`FrameDetections`, one per frame.
+        """
+        hand_offsets = self.hand_frame_offsets
+        object_offsets = self.object_frame_offsets
+        hand_bboxes = self.hand_bboxes.tolist()
+        hand_scores = self.hand_scores.tolist()
+        hand_states = self.hand_states.tolist()
+        hand_sides = self.hand_sides.tolist()
+        hand_object_offsets = self.hand_offsets.tolist()
+        object_bboxes = self.object_bboxes.tolist()
+        object_scores = self.object_scores.tolist()
+        return [
+            FrameDetections(
+                video_id=self.video_id,
+                frame_number=frame_number,
+                hands=[
+                    HandDetection(
+                        bbox=BBox(*hand_bboxes[i]),
+                        score=hand_scores[i],
+                        state=HandState(hand_states[i]),
+                        side=HandSide(hand_sides[i]),
+                        object_offset=FloatVector(*hand_object_offsets[i]),
+                    )
+                    for i in range(hand_offsets[frame_idx], hand_offsets[frame_idx + 1])
+                ],
+                objects=[
+                    ObjectDetection(bbox=BBox(*object_bboxes[i]), score=object_scores[i])
+                    for i in range(
+                        object_offsets[frame_idx], object_offsets[frame_idx + 1]
+                    )
+                ],
+            )
+            for frame_idx, frame_number in enumerate(self.frame_numbers.tolist())
+        ]
+
+    def to_protobuf_strs(self) -> List[bytes]:
+        """Serialize the detections of each frame without creating the intermediate
+        dataclasses.
+
+        Returns:
+            Serialized :class:`pb.Detections`, one per frame, as stored in detection
+            pickles.
+        """
+        hand_offsets = self.hand_frame_offsets.tolist()
+        object_offsets = self.object_frame_offsets.tolist()
+        hand_bboxes = self.hand_bboxes.tolist()
+        hand_scores = self.hand_scores.tolist()
+        hand_states = self.hand_states.tolist()
+        hand_sides = self.hand_sides.tolist()
+        hand_object_offsets = self.hand_offsets.tolist()
+        object_bboxes = self.object_bboxes.tolist()
+        object_scores = self.object_scores.tolist()
+        pb_strs = []
+        pb_detections = pb.Detections()
+        for frame_idx, frame_number in enumerate(self.frame_numbers.tolist()):
+            pb_detections.Clear()
+            pb_detections.video_id = self.video_id
+            pb_detections.frame_number = frame_number
+            for i in range(hand_offsets[frame_idx], hand_offsets[frame_idx + 1]):
+                hand = pb_detections.hands.add()
+                bbox = hand.bbox
+                bbox.left, bbox.top, bbox.right, bbox.bottom = hand_bboxes[i]
+                hand.score = hand_scores[i]
+                hand.state = hand_states[i]
+                hand.object_offset.x, hand.object_offset.y = hand_object_offsets[i]
+                hand.side = hand_sides[i]
+            for i in range(object_offsets[frame_idx], object_offsets[frame_idx + 1]):
+                obj = pb_detections.objects.add()
+                bbox = obj.bbox
+                bbox.left, bbox.top, bbox.right, bbox.bottom = object_bboxes[i]
+                obj.score = object_scores[i]
+            pb_strs.append(pb_detections.SerializeToString())
+        return pb_strs
+
+    def get_best_hand_rows(self, hand_threshold: float = 0) -> np.ndarray:
+        """Find the highest scoring hand of each side in every frame.
+
+        Args:
+            hand_threshold: Hand score threshold above which to consider hands.
+
+        Returns:
+            ``(F, len(HandSide))`` array holding the row of the best hand of each
+            :class:`HandSide` value in each frame, or -1 where there is none. Ties
+            go to the first row.
+        """
+        rows = np.flatnonzero(self.hand_scores > hand_threshold)
+        frame_idxs = self.hand_frame_idxs[rows]
+        sides = self.hand_sides[rows].astype(np.int64)
+        # lexsort is stable, so equal scores keep their row order
+        order = np.lexsort((-self.hand_scores[rows], sides, frame_idxs))
+        rows, frame_idxs, sides = rows[order], frame_idxs[order], sides[order]
+        is_first = np.ones(len(rows), dtype=bool)
+        is_first[1:] = (frame_idxs[1:] != frame_idxs[:-1]) | (sides[1:] != sides[:-1])
+        best_rows = np.full((self.n_frames, len(HandSide)), -1, dtype=np.int64)
+        best_rows[frame_idxs[is_first], sides[is_first]] = rows[is_first]
+        return best_rows
+
+    def get_hand_object_interactions(
+        self,
+        object_threshold: float = 0,
+        hand_threshold: float = 0,
+        width_factor: float = 1,
+        height_factor: float = 1,
+        max_distance: Optional[float] = None,
+        method: str = "nearest",
+        object_grid: Optional[ObjectGrid] = None,
+    ) -> np.ndarray:
+        """Batched equivalent of :meth:`FrameDetections.get_hand_object_interactions`
+        over every frame of the video: each in-contact hand is matched to an object
+        in the same frame whose center is close to the position predicted by the
+        hand's offset vector.
+
+        Args:
+            object_threshold: Object score threshold above which to consider objects
+                for matching
+            hand_threshold: Hand score threshold above which to consider hands for
+                matching.
+            width_factor: Factor x components are scaled by before computing
+                distances, e.g. the frame width to match in pixel space.
+            height_factor: Factor y components are scaled by before computing
+                distances.
+            max_distance: Maximum distance between an object's center and the
+                position predicted by the hand's offset vector for them to be
+                matched, after scaling.
+            method: ``"nearest"`` to match each hand to the closest object, even if
+                another hand is matched to it too, or ``"optimal"`` to match the
+                hands of each frame to distinct objects, matching as many hands as
+                possible with the least total distance. Frames in which no two
+                hands compete for an object are matched in one vectorised step, and
+                the rest are solved in batches, see
+                :func:`epic_kitchens.hoa.assignment.match_pairs`.
+            object_grid: Grid over these detections' objects, built by
+                :meth:`ObjectGrid.from_detections` with an ``object_threshold`` at
+                most this one and the same ``width_factor`` and ``height_factor``,
+                used to only pair each hand with the objects near its predicted
+                position rather than every object in its frame. This pays off when
+                matching several times with the same grid, e.g. with different
+                hand thresholds or methods. Requires ``max_distance``.
+
+        Returns:
+            ``(H,)`` array holding the object row matched to each hand row, or -1
+            for hands that aren't matched.
+        """
+        if method not in HAND_OBJECT_MATCHING_METHODS:
+            raise ValueError(
+                f"Unknown matching method {method!r}, expected one of "
+                f"{', '.join(HAND_OBJECT_MATCHING_METHODS)}"
+            )
+        if object_grid is not None and max_distance is None:
+            raise ValueError("Matching with an object_grid requires a max_distance")
+        scale = np.array([width_factor, height_factor], dtype=np.float64)
+        if object_grid is not None:
+            hand_rows, object_rows = self._nearby_candidate_pairs(
+                object_grid, object_threshold, hand_threshold, scale, max_distance
+            )
+        else:
+            hand_rows, object_rows = self._candidate_pairs(
+                object_threshold, hand_threshold
+            )
+        estimated_object_positions = (
+            self.hand_centers[hand_rows] + self.hand_offsets[hand_rows]
+        ) * scale
+        squared_distances = (
+            (self.object_centers[object_rows] * scale - estimated_object_positions) ** 2
+        ).sum(axis=-1)
+        if max_distance is not None:
+            is_candidate = squared_distances <= max_distance ** 2
+            hand_rows = hand_rows[is_candidate]
+            object_rows = object_rows[is_candidate]
+            squared_distances = squared_distances[is_candidate]
+        # Sort candidates by hand, then distance, then object so the first candidate
+        # for each hand is the closest object, ties going to the first object as
+        # with np.argmin.
+        order = np.lexsort((object_rows, squared_distances, hand_rows))
+        sorted_hand_rows = hand_rows[order]
+        is_first = np.ones(len(order), dtype=bool)
+        is_first[1:] = sorted_hand_rows[1:] != sorted_hand_rows[:-1]
+        matches = np.full(self.n_hands, -1, dtype=np.int64)
+        matches[sorted_hand_rows[is_first]] = object_rows[order][is_first]
+        if method == "nearest":
+            return matches
+
+        # Matching each hand to its nearest object is optimal in frames where no two
+        # hands share their nearest object, so only the other frames are solved
+        matched_objects, counts = np.unique(matches[matches >= 0], return_counts=True)
+        contested_frame_idxs = self.object_frame_idxs[matched_objects[counts > 1]]
+        is_contested = np.isin(self.hand_frame_idxs[hand_rows], contested_frame_idxs)
+        hand_rows = hand_rows[is_contested]
+        object_rows = object_rows[is_contested]
+        matches[hand_rows] = -1
+        matched = match_pairs(
+            self.hand_frame_idxs[hand_rows],
+            hand_rows,
+            object_rows,
+            np.sqrt(squared_distances[is_contested]),
+            method="optimal",
+        )
+        matches[hand_rows[matched]] = object_rows[matched]
+        return matches
+
+    def _candidate_pairs(
+        self, object_threshold: float, hand_threshold: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """All (hand row, object row) pairs of in-contact hands above
+        ``hand_threshold`` and objects at or above ``object_threshold`` within the
+        same frame."""
+        hand_rows = self._in_contact_hand_rows(hand_threshold)
+        object_rows = np.flatnonzero(self.object_scores >= object_threshold)
+        object_offsets = _frame_offsets(
+            self.object_frame_idxs[object_rows], self.n_frames
+        )
+        hand_frame_idxs = self.hand_frame_idxs[hand_rows]
+        starts = object_offsets[hand_frame_idxs]
+        counts = object_offsets[hand_frame_idxs + 1] - starts
+        pair_hand_rows = np.repeat(hand_rows, counts)
+        # Position of each pair within its hand's run of candidate objects
+        run_starts = np.cumsum(counts) - counts
+        within_run = np.arange(counts.sum()) - np.repeat(run_starts, counts)
+        pair_object_rows = object_rows[np.repeat(starts, counts) + within_run]
+        return pair_hand_rows, pair_object_rows
+
+    def _nearby_candidate_pairs(
+        self,
+        grid: ObjectGrid,
+        object_threshold: float,
+        hand_threshold: float,
+        scale: np.ndarray,
+        max_distance: float,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """The pairs of :meth:`_candidate_pairs` whose object center is within
+        about ``max_distance`` of the position predicted by the hand's offset
+        vector, after scaling, looked up in ``grid``."""
+        hand_rows = self._in_contact_hand_rows(hand_threshold)
+        estimated_object_positions = (
+            self.hand_centers[hand_rows] + self.hand_offsets[hand_rows]
+        ) * scale
+        # Pad the radius so rounding differences with the exact distances computed
+        # by the caller can't drop pairs
+        queries, object_rows = grid.within_radius(
+            self.hand_frame_idxs[hand_rows],
+            estimated_object_positions,
+            max_distance * (1 + 1e-6),
+        )
+        is_candidate = self.object_scores[object_rows] >= object_threshold
+        return hand_rows[queries[is_candidate]], object_rows[is_candidate]
+
+    def _in_contact_hand_rows(self, hand_threshold: float) -> np.ndarray:
+        return np.flatnonzero(
+            (self.hand_states != HandState.NO_CONTACT.value)
+            & (self.hand_scores > hand_threshold)
+        )
+
+
+profiling.register_methods(
+    VideoDetectionArrays, "from_protobuf_strs", "get_hand_object_interactions"
+)
+
+
+class _ArrayBuilder:
+    """Accumulates detections row by row in lists before building the arrays in
+    one go"""
+
+    def __init__(self):
+        self.frame_numbers: List[int] = []
+        self.hand_frame_idxs: List[int] = []
+        self.hand_bboxes: List[Tuple[float, float, float, float]] = []
+        self.hand_scores: List[float] = []
+        self.hand_states: List[int] = []
+        self.hand_sides: List[int] = []
+        self.hand_offsets: List[Tuple[float, float]] = []
+        self.object_frame_idxs: List[int] = []
+        self.object_bboxes: List[Tuple[float, float, float, float]] = []
+        self.object_scores: List[float] = []
+
+    def add_hand(
+        self, frame_idx, left, top, right, bottom, score, state, side, offset_x, offset_y
+    ) -> None:
+        self.hand_frame_idxs.append(frame_idx)
+        self.hand_bboxes.append((left, top, right, bottom))
+        self.hand_scores.append(score)
+        self.hand_states.append(state)
+        self.hand_sides.append(side)
+        self.hand_offsets.append((offset_x, offset_y))
+
+    def add_object(self, frame_idx, left, top, right, bottom, score) -> None:
+        self.object_frame_idxs.append(frame_idx)
+        self.object_bboxes.append((left, top, right, bottom))
+        self.object_scores.append(score)
+
+    def build(self, video_id: str) -> VideoDetectionArrays:
+        return VideoDetectionArrays(
+            video_id=video_id,
+            frame_numbers=np.array(self.frame_numbers, dtype=np.int32),
+            hand_frame_idxs=np.array(self.hand_frame_idxs, dtype=np.int64),
+            hand_bboxes=np.array(self.hand_bboxes, dtype=np.float32).reshape(-1, 4),
+            hand_scores=np.array(self.hand_scores, dtype=np.float32),
+            hand_states=np.array(self.hand_states, dtype=np.int8),
+            hand_sides=np.array(self.hand_sides, dtype=np.int8),
+            hand_offsets=np.array(self.hand_offsets, dtype=np.float32).reshape(-1, 2),
+            object_frame_idxs=np.array(self.object_frame_idxs, dtype=np.int64),
+            object_bboxes=np.array(self.object_bboxes, dtype=np.float32).reshape(
+                -1, 4
+            ),
+            object_scores=np.array(self.object_scores, dtype=np.float32),
+        )
+
+
+def _frame_offsets(frame_idxs: np.ndarray, n_frames: int) -> np.ndarray:
+    return np.searchsorted(frame_idxs, np.arange(n_frames + 1))
+
+
+def _bbox_centers(bboxes: np.ndarray) -> np.ndarray:
+    return (bboxes[:, :2] + bboxes[:, 2:]) / 2
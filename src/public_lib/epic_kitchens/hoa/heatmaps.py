@@ -0,0 +1,158 @@
+"""Spatial occupancy heatmaps of hands and interacted objects accumulated over
+videos"""
+
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+
+import numpy as np
+from dataclasses import dataclass
+
+from .columnar import VideoDetectionArrays
+from .types import HandSide, HandState
+
+__all__ = [
+    "OccupancyHeatmaps",
+]
+
+
+@dataclass
+class OccupancyHeatmaps:
+    """Dataclass of histograms counting where in the frame hands (split by side and
+    state) and interacted objects appear. Positions are taken as bounding box
+    centers in normalised coordinates, so heatmaps from videos of different
+    resolutions can be combined.
+
+    Heatmaps are accumulated incrementally with :meth:`accumulate`, and heatmaps
+    computed in different processes can be combined with ``+`` or
+    :meth:`merge`.
+    """
+
+    #: ``(n_sides, n_states, height, width)`` hand counts, indexed by
+    #: :class:`HandSide` and :class:`HandState` values.
+    hands: np.ndarray
+    #: ``(height, width)`` interacted object counts
+    objects: np.ndarray
+    #: Number of frames accumulated
+    n_frames: int = 0
+
+    @staticmethod
+    def empty(height: int = 64, width: int = 64) -> "OccupancyHeatmaps":
+        """
+        Args:
+            height: Number of bins along the y axis
+            width: Number of bins along the x axis
+
+        Returns:
+            Heatmaps with no counts.
+        """
+        return OccupancyHeatmaps(
+            hands=np.zeros((len(HandSide), len(HandState), height, width)),
+            objects=np.zeros((height, width)),
+        )
+
+    @staticmethod
+    def merge(heatmaps: Iterable["OccupancyHeatmaps"]) -> "OccupancyHeatmaps":
+        """Sum heatmaps, e.g. those computed per video by worker processes."""
+        heatmaps = iter(heatmaps)
+        total = next(heatmaps)
+        for heatmap in heatmaps:
+            total = total + heatmap
+        return total
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """The ``(height, width)`` of the heatmaps in bins"""
+        return self.objects.shape
+
+    def __add__(self, other: "OccupancyHeatmaps") -> "OccupancyHeatmaps":
+        if self.shape != other.shape:
+            raise ValueError(
+                f"Cannot add heatmaps of shape {self.shape} and {other.shape}"
+            )
+        return OccupancyHeatmaps(
+            hands=self.hands + other.hands,
+            objects=self.objects + other.objects,
+            n_frames=self.n_frames + other.n_frames,
+        )
+
+    def accumulate(
+        self,
+        detections: VideoDetectionArrays,
+        hand_threshold: float = 0,
+        object_threshold: float = 0,
+        weight_by_score: bool = False,
+    ) -> None:
+        """Add a video's detections to the heatmaps in place.
+
+        Args:
+            detections: Detections of a video in normalised coordinates.
+            hand_threshold: Only count hands scoring above this threshold.
+            object_threshold: Only count objects scoring at or above this threshold.
+            weight_by_score: Weight each detection by its score instead of counting
+                it once.
+        """
+        hand_rows = np.flatnonzero(detections.hand_scores > hand_threshold)
+        x, y = self._bin(detections.hand_centers[hand_rows])
+        np.add.at(
+            self.hands,
+            (
+                detections.hand_sides[hand_rows],
+                detections.hand_states[hand_rows],
+                y,
+                x,
+            ),
+            detections.hand_scores[hand_rows] if weight_by_score else 1,
+        )
+
+        matches = detections.get_hand_object_interactions(
+            object_threshold=object_threshold, hand_threshold=hand_threshold
+        )
+        # An object interacted with by both hands is only counted once.
+        object_rows = np.unique(matches[matches >= 0])
+        x, y = self._bin(detections.object_centers[object_rows])
+        np.add.at(
+            self.objects,
+            (y, x),
+            detections.object_scores[object_rows] if weight_by_score else 1,
+        )
+        self.n_frames += detections.n_frames
+
+    def hand_heatmap(
+        self, side: Optional[HandSide] = None, state: Optional[HandState] = None
+    ) -> np.ndarray:
+        """
+        Args:
+            side: Only include hands of this side, defaults to both sides.
+            state: Only include hands in this state, defaults to all states.
+
+        Returns:
+            ``(height, width)`` hand counts.
+        """
+        hands = self.hands
+        if side is not None:
+            hands = hands[side.value : side.value + 1]
+        if state is not None:
+            hands = hands[:, state.value : state.value + 1]
+        return hands.sum(axis=(0, 1))
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save heatmaps to a ``.npz`` file."""
+        np.savez_compressed(
+            path, hands=self.hands, objects=self.objects, n_frames=self.n_frames
+        )
+
+    @staticmethod
+    def load(path: Union[str, Path]) -> "OccupancyHeatmaps":
+        """Load heatmaps saved with :meth:`save`."""
+        with np.load(path) as data:
+            return OccupancyHeatmaps(
+                hands=data["hands"],
+                objects=data["objects"],
+                n_frames=int(data["n_frames"]),
+            )
+
+    def _bin(self, centers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        height, width = self.shape
+        x = np.clip((centers[:, 0] * width).astype(np.int64), 0, width - 1)
+        y = np.clip((centers[:, 1] * height).astype(np.int64), 0, height - 1)
+        return x, y
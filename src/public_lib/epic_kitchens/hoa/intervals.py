@@ -0,0 +1,173 @@
+"""Contiguous intervals of frames in which a hand is in a given contact state,
+e.g. holding a portable object, extracted over whole videos at once and stored as
+a compact index for overlap queries."""
+
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+
+import numpy as np
+from dataclasses import dataclass, field
+
+from .columnar import VideoDetectionArrays
+from .types import HandSide, HandState
+
+__all__ = [
+    "ContactIntervals",
+    "extract_contact_intervals",
+]
+
+
+@dataclass
+class ContactIntervals:
+    """Dataclass holding the contact intervals of a video as flat arrays, one row
+    per interval, ordered by start frame then hand side.
+
+    Intervals span the frame numbers ``start_frames[i]`` to ``end_frames[i]``
+    inclusive.
+    """
+
+    video_id: str
+    #: ``(N,)`` :class:`HandSide` values
+    sides: np.ndarray
+    #: ``(N,)`` :class:`HandState` values
+    states: np.ndarray
+    #: ``(N,)`` first frame number of each interval
+    start_frames: np.ndarray
+    #: ``(N,)`` last frame number of each interval
+    end_frames: np.ndarray
+    _max_duration: int = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._max_duration = int(self.durations.max()) if len(self) > 0 else 0
+
+    def __len__(self) -> int:
+        return len(self.start_frames)
+
+    @property
+    def durations(self) -> np.ndarray:
+        """``(N,)`` number of frames spanned by each interval"""
+        return self.end_frames - self.start_frames + 1
+
+    def overlapping(
+        self,
+        start_frame: int,
+        end_frame: int,
+        side: Optional[HandSide] = None,
+        state: Optional[HandState] = None,
+    ) -> np.ndarray:
+        """Find the intervals overlapping a range of frames.
+
+        Args:
+            start_frame: First frame number of the range.
+            end_frame: Last frame number of the range, inclusive.
+            side: Only return intervals of this hand side.
+            state: Only return intervals of this hand state.
+
+        Returns:
+            Sorted indices of the overlapping intervals.
+        """
+        # Intervals are sorted by start frame and none is longer than
+        # _max_duration, so only those starting in this window can overlap
+        lo = np.searchsorted(self.start_frames, start_frame - self._max_duration + 1)
+        hi = np.searchsorted(self.start_frames, end_frame, side="right")
+        mask = self.end_frames[lo:hi] >= start_frame
+        if side is not None:
+            mask &= self.sides[lo:hi] == side.value
+        if state is not None:
+            mask &= self.states[lo:hi] == state.value
+        return lo + np.flatnonzero(mask)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the intervals to a compressed ``.npz`` file."""
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                video_id=np.array(self.video_id),
+                sides=self.sides,
+                states=self.states,
+                start_frames=self.start_frames,
+                end_frames=self.end_frames,
+            )
+
+    @staticmethod
+    def load(path: Union[str, Path]) -> "ContactIntervals":
+        """Load intervals saved with :meth:`save`."""
+        with np.load(path) as data:
+            return ContactIntervals(
+                video_id=str(data["video_id"]),
+                sides=data["sides"],
+                states=data["states"],
+                start_frames=data["start_frames"],
+                end_frames=data["end_frames"],
+            )
+
+
+def extract_contact_intervals(
+    detections: VideoDetectionArrays,
+    states: Iterable[HandState] = (HandState.PORTABLE_OBJECT,),
+    hand_threshold: float = 0,
+    min_duration: int = 1,
+    max_gap: int = 0,
+) -> ContactIntervals:
+    """Find the intervals of frames in which each hand is in one of ``states``.
+
+    The state of a hand side in a frame is that of the highest scoring hand of that
+    side, see :meth:`VideoDetectionArrays.get_best_hand_rows`.
+
+    Args:
+        detections: A video's detections.
+        states: Hand states to extract intervals of, each state gets its own
+            intervals.
+        hand_threshold: Hand score threshold above which to consider hands.
+        min_duration: Minimum number of frames spanned by an interval, shorter
+            intervals are dropped after bridging gaps.
+        max_gap: Maximum number of frames between two intervals of the same side
+            and state for them to be merged, the frames in between can have another
+            or no state.
+
+    Returns:
+        The video's intervals.
+    """
+    if min_duration < 1:
+        raise ValueError(f"Expected min_duration >= 1 but was {min_duration}")
+    if max_gap < 0:
+        raise ValueError(f"Expected max_gap >= 0 but was {max_gap}")
+    best_rows = detections.get_best_hand_rows(hand_threshold)
+    frame_numbers = detections.frame_numbers.astype(np.int64)
+    sides, interval_states, start_frames, end_frames = [], [], [], []
+    for side in HandSide:
+        rows = best_rows[:, side.value]
+        has_hand = rows >= 0
+        side_states = np.full(detections.n_frames, -1, dtype=np.int64)
+        side_states[has_hand] = detections.hand_states[rows[has_hand]]
+        for state in states:
+            starts, ends = _runs(frame_numbers[side_states == state.value], max_gap)
+            keep = ends - starts + 1 >= min_duration
+            start_frames.append(starts[keep])
+            end_frames.append(ends[keep])
+            sides.append(np.full(keep.sum(), side.value, dtype=np.int8))
+            interval_states.append(np.full(keep.sum(), state.value, dtype=np.int8))
+    order = np.lexsort((np.concatenate(sides), np.concatenate(start_frames)))
+    return ContactIntervals(
+        video_id=detections.video_id,
+        sides=np.concatenate(sides)[order],
+        states=np.concatenate(interval_states)[order],
+        start_frames=np.concatenate(start_frames)[order].astype(np.int32),
+        end_frames=np.concatenate(end_frames)[order].astype(np.int32),
+    )
+
+
+def _runs(frame_numbers: np.ndarray, max_gap: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Split sorted frame numbers into runs, starting a new run wherever more than
+    ``max_gap`` frames are missing.
+
+    Returns:
+        The first and last frame number of each run.
+    """
+    if len(frame_numbers) == 0:
+        return frame_numbers, frame_numbers
+    is_start = np.ones(len(frame_numbers), dtype=bool)
+    is_start[1:] = np.diff(frame_numbers) > max_gap + 1
+    is_end = np.ones(len(frame_numbers), dtype=bool)
+    is_end[:-1] = is_start[1:]
+    return frame_numbers[is_start], frame_numbers[is_end]
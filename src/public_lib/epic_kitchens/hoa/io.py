@@ -1,11 +1,16 @@
 """Functions for loading and saving detections to/from files."""
 
 from pathlib import Path
-from typing import List, Union
+from typing import TYPE_CHECKING, List, Union
 
+from . import profiling
 from .types import FrameDetections
 
+if TYPE_CHECKING:  # pragma: no cover
+    from .columnar import VideoDetectionArrays
 
+
+@profiling.profiled("io.load_detections")
 def load_detections(path: Union[str, Path]) -> List[FrameDetections]:
     """
     Load detections from file.
@@ -23,6 +28,28 @@ def load_detections(path: Union[str, Path]) -> List[FrameDetections]:
         return [FrameDetections.from_protobuf_str(s) for s in pickle.load(f)]
 
 
+@profiling.profiled("io.load_detection_arrays")
+def load_detection_arrays(path: Union[str, Path]) -> "VideoDetectionArrays":
+    """
+    Load detections from file straight into columnar form.
+
+    Args:
+        path: Path to detections pickle. This should contain a pickled list of
+            serialized protobuf descriptions of detections
+
+    Returns:
+        Deserialized detections contained in pickle as arrays.
+    """
+    import pickle
+
+    # Imported here so loading detections doesn't import the columnar code
+    from .columnar import VideoDetectionArrays
+
+    with open(path, "rb") as f:
+        return VideoDetectionArrays.from_protobuf_strs(pickle.load(f))
+
+
+@profiling.profiled("io.save_detections")
 def save_detections(
     detections: List[FrameDetections], path: Union[str, Path]
 ) -> None:
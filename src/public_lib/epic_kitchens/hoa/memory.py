@@ -0,0 +1,113 @@
+"""Report the memory used by a loaded video's detections, to size worker pools and
+caches holding many videos"""
+
+import sys
+from enum import Enum
+from typing import Any, List, Set, Union
+
+from dataclasses import dataclass, fields, is_dataclass
+
+from .columnar import VideoDetectionArrays
+from .types import FrameDetections
+
+__all__ = [
+    "MemoryUsage",
+    "memory_usage",
+]
+
+
+@dataclass
+class MemoryUsage:
+    """Bytes used by a video's detections, split by what they describe"""
+
+    #: Bytes used by hand detections
+    hands: int = 0
+    #: Bytes used by object detections
+    objects: int = 0
+    #: Bytes used by per-frame data and containers, e.g. frame numbers
+    frames: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.hands + self.objects + self.frames
+
+    def __add__(self, other: "MemoryUsage") -> "MemoryUsage":
+        return MemoryUsage(
+            hands=self.hands + other.hands,
+            objects=self.objects + other.objects,
+            frames=self.frames + other.frames,
+        )
+
+
+def memory_usage(
+    detections: Union[List[FrameDetections], VideoDetectionArrays]
+) -> MemoryUsage:
+    """Measure the memory used by a video's detections.
+
+    For a list of :class:`FrameDetections`, every Python object reachable from the
+    detections is counted once with :func:`sys.getsizeof`, apart from shared enum
+    members. This leaves out allocator overheads, so the process typically uses a
+    little more, see ``benchmarks/bench_memory.py`` for measurements with
+    :mod:`tracemalloc`.
+    For :class:`VideoDetectionArrays`, the bytes of the arrays' data are counted.
+
+    Args:
+        detections: A video's detections, as loaded by
+            :func:`epic_kitchens.hoa.io.load_detections` or
+            :func:`epic_kitchens.hoa.io.load_detection_arrays`.
+
+    Returns:
+        The bytes used by hands, objects and per-frame data.
+    """
+    if isinstance(detections, VideoDetectionArrays):
+        return MemoryUsage(
+            hands=sum(
+                array.nbytes
+                for array in [
+                    detections.hand_frame_idxs,
+                    detections.hand_bboxes,
+                    detections.hand_scores,
+                    detections.hand_states,
+                    detections.hand_sides,
+                    detections.hand_offsets,
+                    detections.hand_track_ids,
+                ]
+                if array is not None
+            ),
+            objects=sum(
+                array.nbytes
+                for array in [
+                    detections.object_frame_idxs,
+                    detections.object_bboxes,
+                    detections.object_scores,
+                    detections.object_track_ids,
+                ]
+                if array is not None
+            ),
+            frames=detections.frame_numbers.nbytes,
+        )
+    seen: Set[int] = set()
+    usage = MemoryUsage(frames=sys.getsizeof(detections))
+    for frame_detections in detections:
+        usage.hands += _deep_getsizeof(frame_detections.hands, seen)
+        usage.objects += _deep_getsizeof(frame_detections.objects, seen)
+        usage.frames += _deep_getsizeof(frame_detections, seen)
+    return usage
+
+
+def _deep_getsizeof(obj: Any, seen: Set[int]) -> int:
+    if id(obj) in seen or isinstance(obj, Enum):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        size += sum(_deep_getsizeof(item, seen) for item in obj)
+    elif is_dataclass(obj):
+        # Accessing __dict__ would materialise it on Python 3.11+, where instance
+        # attributes are otherwise stored inline
+        if sys.version_info < (3, 11):
+            size += sys.getsizeof(obj.__dict__)
+        size += sum(
+            _deep_getsizeof(getattr(obj, field.name), seen) for field in fields(obj)
+        )
+    return size
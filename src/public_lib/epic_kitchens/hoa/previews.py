@@ -0,0 +1,118 @@
+"""Build short animated previews of detections over a range of frames"""
+
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import PIL.Image
+
+from .types import FrameDetections
+from .visualisation import DetectionRenderer, render_thumbnail
+
+__all__ = [
+    "PreviewBuilder",
+]
+
+
+class PreviewBuilder:
+    """A class to build animated GIF/WebP previews of the detections within a range
+    of frames, e.g. an action segment. Frames are sampled at a reduced frame rate
+    and rendered at a reduced resolution."""
+
+    def __init__(
+        self,
+        renderer: Optional[DetectionRenderer] = None,
+        fps: float = 5,
+        source_fps: float = 50,
+        size: Tuple[int, int] = (228, 128),
+    ):
+        """
+
+        Args:
+            renderer: Renderer used to annotate the preview frames. Its font size,
+                border and padding are applied at the preview resolution. Defaults to
+                a renderer suited to the default size.
+            fps: Frame rate of the preview.
+            source_fps: Frame rate the video's frames were extracted at.
+            size: The ``(width, height)`` of the preview.
+        """
+        if renderer is None:
+            renderer = DetectionRenderer(font_size=10, border=1, text_padding=1)
+        self.renderer = renderer
+        self.fps = fps
+        self.source_fps = source_fps
+        self.size = size
+
+    def select_frame_numbers(self, start_frame: int, stop_frame: int) -> List[int]:
+        """
+        Args:
+            start_frame: First frame number of the range
+            stop_frame: Last frame number of the range (inclusive)
+
+        Returns:
+            Frame numbers within the range sampled at :attr:`fps`, always including
+            at least ``start_frame``.
+        """
+        step = max(self.source_fps / self.fps, 1)
+        offsets = np.arange(0, stop_frame - start_frame + 1, step)
+        return sorted(set((start_frame + np.floor(offsets)).astype(int).tolist()))
+
+    def build(
+        self,
+        frames: Any,
+        detections: Sequence[FrameDetections],
+        start_frame: int,
+        stop_frame: int,
+    ) -> List[PIL.Image.Image]:
+        """
+        Args:
+            frames: Indexable collection of frames such that ``frames[i]`` is the
+                frame with frame number ``i + 1``, e.g. a lazy frame loader.
+            detections: Detections of the video, ordered by frame such that
+                ``detections[i]`` has frame number ``i + 1``.
+            start_frame: First frame number of the preview
+            stop_frame: Last frame number of the preview (inclusive)
+
+        Returns:
+            The rendered preview frames.
+
+        Raises:
+            ValueError: If ``detections`` isn't ordered by frame number from 1, in
+                which case ``frames`` is unlikely to be indexed as expected either.
+        """
+        preview = []
+        for frame_number in self.select_frame_numbers(start_frame, stop_frame):
+            frame_detections = detections[frame_number - 1]
+            if frame_detections.frame_number != frame_number:
+                raise ValueError(
+                    f"Expected detections for frame {frame_number} at index "
+                    f"{frame_number - 1}, but got frame "
+                    f"{frame_detections.frame_number}"
+                )
+            preview.append(
+                render_thumbnail(
+                    self.renderer, frames[frame_number - 1], frame_detections, self.size
+                )
+            )
+        return preview
+
+    def save(self, preview: List[PIL.Image.Image], path: Union[str, Path]) -> None:
+        """Save preview frames as an animation, the format (GIF or WebP) is
+        determined by the extension of ``path``.
+
+        Args:
+            preview: Frames returned by :meth:`build`
+            path: Path to write the animation to. Non-existent folders in the path
+                are created.
+        """
+        if len(preview) == 0:
+            raise ValueError("Cannot save a preview with no frames")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        preview[0].save(
+            path,
+            save_all=True,
+            append_images=preview[1:],
+            duration=round(1000 / self.fps),
+            loop=0,
+        )
@@ -0,0 +1,213 @@
+"""Opt-in profiling of the library's hot paths, counting calls and accumulating
+their time so the cost of loading, decoding, matching, scaling and rendering
+detections can be attributed inside e.g. a data loader.
+
+Profiling is enabled by setting the ``EPIC_HOA_PROFILE`` environment variable, in
+which case a report is printed to stderr at exit, or for a block of code with
+:func:`profile`::
+
+    with profiling.profile() as stats:
+        detections = load_detections(path)
+    print(profiling.format_stats(stats))
+
+Per-frame methods are only wrapped with timers while profiling is enabled, so
+they cost nothing otherwise. Per-video functions like :func:`load_detections`
+check whether profiling is enabled on each call. Times are inclusive, e.g.
+``FrameDetections.scale`` includes the time spent in ``BBox.scale``.
+"""
+
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+__all__ = [
+    "CallStats",
+    "enable",
+    "disable",
+    "is_enabled",
+    "reset",
+    "get_stats",
+    "format_stats",
+    "profile",
+]
+
+ENV_VAR = "EPIC_HOA_PROFILE"
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    total_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        if self.calls == 0:
+            return 0.0
+        return self.total_seconds / self.calls
+
+
+_enabled = False
+_stats: Dict[str, CallStats] = {}
+_stats_lock = threading.Lock()
+# (class, attribute, name) of the methods to wrap while profiling is enabled
+_method_hooks: List[Tuple[type, str, str]] = []
+_original_methods: Dict[Tuple[type, str], Any] = {}
+
+
+def enable() -> None:
+    """Start counting calls to the profiled functions and methods."""
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+    for hook in _method_hooks:
+        _wrap_method(*hook)
+
+
+def disable() -> None:
+    """Stop counting calls, keeping the stats collected so far."""
+    global _enabled
+    if not _enabled:
+        return
+    _enabled = False
+    for cls, attribute, _ in _method_hooks:
+        setattr(cls, attribute, _original_methods.pop((cls, attribute)))
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """Discard the stats collected so far."""
+    with _stats_lock:
+        _stats.clear()
+
+
+def get_stats() -> Dict[str, CallStats]:
+    """Get a snapshot of the stats of every profiled function called so far."""
+    with _stats_lock:
+        return {
+            name: CallStats(stats.calls, stats.total_seconds)
+            for name, stats in _stats.items()
+        }
+
+
+def format_stats(stats: Optional[Dict[str, CallStats]] = None) -> str:
+    """Format stats as a table, most expensive first.
+
+    Args:
+        stats: Stats to format, defaults to those collected so far.
+    """
+    if stats is None:
+        stats = get_stats()
+    rows = sorted(stats.items(), key=lambda item: -item[1].total_seconds)
+    name_width = max([len("function")] + [len(name) for name, _ in rows])
+    lines = [
+        f"{'function':<{name_width}} {'calls':>10} {'total s':>10} {'mean us':>10}"
+    ]
+    for name, call_stats in rows:
+        lines.append(
+            f"{name:<{name_width}} {call_stats.calls:>10} "
+            f"{call_stats.total_seconds:>10.3f} "
+            f"{call_stats.mean_seconds * 1e6:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+@contextmanager
+def profile(clear: bool = True) -> Iterator[Dict[str, CallStats]]:
+    """Profile a block of code.
+
+    Args:
+        clear: Whether to discard previously collected stats first.
+
+    Yields:
+        A dictionary that is filled with the stats when the block exits.
+    """
+    was_enabled = _enabled
+    if clear:
+        reset()
+    enable()
+    stats: Dict[str, CallStats] = {}
+    try:
+        yield stats
+    finally:
+        stats.update(get_stats())
+        if not was_enabled:
+            disable()
+
+
+def profiled(name: str) -> Callable[[Callable], Callable]:
+    """Decorator profiling a function under ``name`` while profiling is enabled.
+    Only use this for coarse grained functions as checking whether profiling is
+    enabled has a small cost on every call, use :func:`register_methods` for
+    methods called per frame or per detection."""
+
+    def decorator(fn: Callable) -> Callable:
+        timed = _timed(fn, name)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _enabled:
+                return timed(*args, **kwargs)
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def register_methods(cls: type, *attributes: str) -> None:
+    """Register methods of ``cls`` to be wrapped with timers while profiling is
+    enabled, named ``ClassName.method``."""
+    for attribute in attributes:
+        hook = (cls, attribute, f"{cls.__name__}.{attribute}")
+        _method_hooks.append(hook)
+        if _enabled:
+            _wrap_method(*hook)
+
+
+def _wrap_method(cls: type, attribute: str, name: str) -> None:
+    original = cls.__dict__[attribute]
+    _original_methods[(cls, attribute)] = original
+    if isinstance(original, staticmethod):
+        wrapped = staticmethod(_timed(original.__func__, name))
+    elif isinstance(original, classmethod):
+        wrapped = classmethod(_timed(original.__func__, name))
+    else:
+        wrapped = _timed(original, name)
+    setattr(cls, attribute, wrapped)
+
+
+def _timed(fn: Callable, name: str) -> Callable:
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with _stats_lock:
+                stats = _stats.get(name)
+                if stats is None:
+                    stats = _stats[name] = CallStats()
+                stats.calls += 1
+                stats.total_seconds += elapsed
+
+    return wrapper
+
+
+def _print_stats_at_exit() -> None:
+    print(format_stats(), file=sys.stderr)
+
+
+if os.environ.get(ENV_VAR, "") not in ("", "0"):
+    enable()
+    atexit.register(_print_stats_at_exit)
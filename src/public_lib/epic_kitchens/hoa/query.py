@@ -0,0 +1,349 @@
+"""Vectorised queries over the hand and object detections of videos.
+
+Predicates are built from the fields of :data:`hands` and :data:`objects` and
+evaluated as boolean masks over the rows of a :class:`VideoDetectionArrays`::
+
+    from epic_kitchens.hoa.query import hands, find_frames
+
+    predicate = (
+        (hands.side == HandSide.LEFT)
+        & (hands.state == HandState.PORTABLE_OBJECT)
+        & (hands.score >= 0.5)
+    )
+    frame_numbers = find_frames(arrays, predicate)
+
+Predicates can be combined with ``&``, ``|`` and ``~``. Python's chained
+comparisons and ``and``/``or``/``not`` don't work on predicates, use
+:meth:`Field.between` and the operators instead.
+"""
+
+import operator
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from .columnar import VideoDetectionArrays
+
+__all__ = [
+    "Field",
+    "Predicate",
+    "hands",
+    "objects",
+    "evaluate",
+    "find_rows",
+    "find_frames",
+    "query_dataset",
+]
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], Any]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _bbox_fields(bboxes: str) -> Dict[str, Callable[[VideoDetectionArrays], Any]]:
+    def column(i: int):
+        return lambda arrays: getattr(arrays, bboxes)[:, i]
+
+    def width(arrays):
+        return getattr(arrays, bboxes)[:, 2] - getattr(arrays, bboxes)[:, 0]
+
+    def height(arrays):
+        return getattr(arrays, bboxes)[:, 3] - getattr(arrays, bboxes)[:, 1]
+
+    return {
+        "left": column(0),
+        "top": column(1),
+        "right": column(2),
+        "bottom": column(3),
+        "width": width,
+        "height": height,
+        "area": lambda arrays: width(arrays) * height(arrays),
+        "center_x": lambda arrays: (column(0)(arrays) + column(2)(arrays)) / 2,
+        "center_y": lambda arrays: (column(1)(arrays) + column(3)(arrays)) / 2,
+    }
+
+
+# Functions computing the values of each field for every row of a video
+_FIELDS: Dict[str, Dict[str, Callable[[VideoDetectionArrays], np.ndarray]]] = {
+    "hand": {
+        "frame_number": lambda arrays: arrays.frame_numbers[arrays.hand_frame_idxs],
+        "score": lambda arrays: arrays.hand_scores,
+        "side": lambda arrays: arrays.hand_sides,
+        "state": lambda arrays: arrays.hand_states,
+        "offset_x": lambda arrays: arrays.hand_offsets[:, 0],
+        "offset_y": lambda arrays: arrays.hand_offsets[:, 1],
+        **_bbox_fields("hand_bboxes"),
+    },
+    "object": {
+        "frame_number": lambda arrays: arrays.frame_numbers[arrays.object_frame_idxs],
+        "score": lambda arrays: arrays.object_scores,
+        **_bbox_fields("object_bboxes"),
+    },
+}
+
+
+class Predicate(ABC):
+    """A condition on the hand or object detections of a video, evaluated to a
+    boolean mask over their rows"""
+
+    #: ``"hand"`` or ``"object"``, the detections the predicate applies to
+    kind: str
+
+    @abstractmethod
+    def evaluate(self, arrays: VideoDetectionArrays) -> np.ndarray:
+        """
+        Args:
+            arrays: Detections of a video.
+
+        Returns:
+            A boolean mask over the rows of the :attr:`kind` detections.
+        """
+
+    def __and__(self, other: "Predicate") -> "Predicate":
+        return _BinaryPredicate("&", self, other)
+
+    def __or__(self, other: "Predicate") -> "Predicate":
+        return _BinaryPredicate("|", self, other)
+
+    def __invert__(self) -> "Predicate":
+        return _Not(self)
+
+    def __bool__(self):
+        raise TypeError(
+            "Predicates can't be used as booleans, combine them with &, | and ~ "
+            "rather than and, or and not"
+        )
+
+
+class Field:
+    """A field of the hand or object detections, compared to values to build
+    predicates"""
+
+    def __init__(self, kind: str, name: str):
+        if name not in _FIELDS[kind]:
+            raise AttributeError(
+                f"{kind.capitalize()} detections have no field {name!r}, expected "
+                f"one of {', '.join(_FIELDS[kind])}"
+            )
+        self.kind = kind
+        self.name = name
+
+    def values(self, arrays: VideoDetectionArrays) -> np.ndarray:
+        return _FIELDS[self.kind][self.name](arrays)
+
+    def __eq__(self, value: Any) -> Predicate:  # type: ignore
+        return _Comparison(self, "==", value)
+
+    def __ne__(self, value: Any) -> Predicate:  # type: ignore
+        return _Comparison(self, "!=", value)
+
+    def __lt__(self, value: Any) -> Predicate:
+        return _Comparison(self, "<", value)
+
+    def __le__(self, value: Any) -> Predicate:
+        return _Comparison(self, "<=", value)
+
+    def __gt__(self, value: Any) -> Predicate:
+        return _Comparison(self, ">", value)
+
+    def __ge__(self, value: Any) -> Predicate:
+        return _Comparison(self, ">=", value)
+
+    __hash__ = None  # type: ignore
+
+    def between(self, low: Any, high: Any) -> Predicate:
+        """Values between ``low`` and ``high`` inclusive"""
+        return (self >= low) & (self <= high)
+
+    def isin(self, values: Iterable[Any]) -> Predicate:
+        return _IsIn(self, [_to_value(value) for value in values])
+
+    def __repr__(self) -> str:
+        return f"{self.kind}s.{self.name}"
+
+
+class _Fields:
+    def __init__(self, kind: str):
+        self._kind = kind
+
+    def __getattr__(self, name: str) -> Field:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return Field(self._kind, name)
+
+    def __dir__(self) -> List[str]:
+        return list(_FIELDS[self._kind])
+
+
+#: Fields of the hand detections: ``frame_number``, ``score``, ``side``, ``state``,
+#: ``offset_x``, ``offset_y``, ``left``, ``top``, ``right``, ``bottom``, ``width``,
+#: ``height``, ``area``, ``center_x`` and ``center_y``
+hands = _Fields("hand")
+#: Fields of the object detections: ``frame_number``, ``score``, ``left``,
+#: ``top``, ``right``, ``bottom``, ``width``, ``height``, ``area``, ``center_x``
+#: and ``center_y``
+objects = _Fields("object")
+
+
+class _Comparison(Predicate):
+    def __init__(self, field: Field, op: str, value: Any):
+        self.kind = field.kind
+        self.field = field
+        self.op = op
+        self.value = _to_value(value)
+
+    def evaluate(self, arrays: VideoDetectionArrays) -> np.ndarray:
+        return _COMPARISONS[self.op](self.field.values(arrays), self.value)
+
+    def __repr__(self) -> str:
+        return f"({self.field!r} {self.op} {self.value!r})"
+
+
+class _IsIn(Predicate):
+    def __init__(self, field: Field, values: List[Any]):
+        self.kind = field.kind
+        self.field = field
+        self.values = values
+
+    def evaluate(self, arrays: VideoDetectionArrays) -> np.ndarray:
+        return np.isin(self.field.values(arrays), self.values)
+
+    def __repr__(self) -> str:
+        return f"{self.field!r}.isin({self.values!r})"
+
+
+class _BinaryPredicate(Predicate):
+    def __init__(self, op: str, left: Predicate, right: Predicate):
+        if left.kind != right.kind:
+            raise ValueError(
+                f"Can't combine predicates on {left.kind} and {right.kind} "
+                "detections, find the frames matching each and intersect them instead"
+            )
+        self.kind = left.kind
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def evaluate(self, arrays: VideoDetectionArrays) -> np.ndarray:
+        left = self.left.evaluate(arrays)
+        right = self.right.evaluate(arrays)
+        return left & right if self.op == "&" else left | right
+
+    def __repr__(self) -> str:
+        return f"({self.left!r} {self.op} {self.right!r})"
+
+
+class _Not(Predicate):
+    def __init__(self, predicate: Predicate):
+        self.kind = predicate.kind
+        self.predicate = predicate
+
+    def evaluate(self, arrays: VideoDetectionArrays) -> np.ndarray:
+        return ~self.predicate.evaluate(arrays)
+
+    def __repr__(self) -> str:
+        return f"~{self.predicate!r}"
+
+
+def _to_value(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+VideoSource = Union[VideoDetectionArrays, str, Path]
+
+
+def _as_arrays(video: VideoSource) -> VideoDetectionArrays:
+    if isinstance(video, VideoDetectionArrays):
+        return video
+    from .io import load_detection_arrays
+
+    return load_detection_arrays(video)
+
+
+def evaluate(video: VideoSource, predicate: Predicate) -> np.ndarray:
+    """Evaluate a predicate over a video's detections.
+
+    Args:
+        video: The video's detections, or the path of a detections pickle.
+        predicate: Predicate to evaluate.
+
+    Returns:
+        A boolean mask over the video's hand rows, or object rows for predicates on
+        objects.
+    """
+    return np.asarray(predicate.evaluate(_as_arrays(video)), dtype=bool)
+
+
+def find_rows(video: VideoSource, predicate: Predicate) -> np.ndarray:
+    """Find the hand or object rows of a video matching a predicate.
+
+    Returns:
+        Indices of the matching rows of the video's hand or object arrays.
+    """
+    return np.flatnonzero(evaluate(video, predicate))
+
+
+def find_frames(
+    video: VideoSource, predicate: Predicate, min_count: int = 1
+) -> np.ndarray:
+    """Find the frames with detections matching a predicate.
+
+    Args:
+        video: The video's detections, or the path of a detections pickle.
+        predicate: Predicate to evaluate.
+        min_count: Minimum number of matching detections in a frame.
+
+    Returns:
+        Sorted frame numbers of the frames with at least ``min_count`` matching
+        detections.
+    """
+    arrays = _as_arrays(video)
+    mask = evaluate(arrays, predicate)
+    if predicate.kind == "hand":
+        frame_idxs = arrays.hand_frame_idxs
+    else:
+        frame_idxs = arrays.object_frame_idxs
+    counts = np.bincount(frame_idxs[mask], minlength=arrays.n_frames)
+    return np.sort(arrays.frame_numbers[counts >= min_count])
+
+
+def query_dataset(
+    paths: Iterable[Union[str, Path]],
+    predicate: Predicate,
+    min_count: int = 1,
+    n_workers: Optional[int] = 1,
+) -> Dict[str, np.ndarray]:
+    """Find the frames with detections matching a predicate across many videos.
+
+    Args:
+        paths: Paths of the videos' detections pickles, named after the videos.
+        predicate: Predicate to evaluate.
+        min_count: Minimum number of matching detections in a frame.
+        n_workers: Number of processes to load and query videos with, ``None``
+            uses one per CPU.
+
+    Returns:
+        The frame numbers matching the predicate in each video with any matches.
+    """
+    paths = [Path(path) for path in paths]
+    predicates = [predicate] * len(paths)
+    min_counts = [min_count] * len(paths)
+    if n_workers == 1:
+        results = list(map(find_frames, paths, predicates, min_counts))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(find_frames, paths, predicates, min_counts))
+    return {
+        path.stem: frame_numbers
+        for path, frame_numbers in zip(paths, results)
+        if len(frame_numbers) > 0
+    }
@@ -0,0 +1,259 @@
+"""A disk-backed cache of rendered frames for interactively scrubbing through
+videos"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import PIL.Image
+
+from .types import FrameDetections
+from .visualisation import DetectionRenderer
+
+__all__ = [
+    "RenderCache",
+    "CachedRenderer",
+    "renderer_config_hash",
+]
+
+
+def renderer_config_hash(renderer: DetectionRenderer) -> str:
+    """A short, stable hash of a renderer's configuration so that frames rendered
+    with different settings are cached separately"""
+    config = json.dumps(renderer.config, sort_keys=True).encode("utf8")
+    return hashlib.sha1(config).hexdigest()[:12]
+
+
+class RenderCache:
+    """A least-recently-used cache of rendered frames stored as image files in a
+    directory, bounded by the total size of those files. Entries left in the
+    directory by previous sessions are reused."""
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        max_bytes: int = 1024 ** 3,
+        image_format: str = "JPEG",
+        save_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        """
+
+        Args:
+            cache_dir: Directory to store rendered frames in, created if it doesn't
+                exist.
+            max_bytes: Size budget of the cache, least recently used frames are
+                deleted to stay within it.
+            image_format: Pillow format to store frames in.
+            save_kwargs: Extra arguments passed to :meth:`PIL.Image.Image.save`,
+                defaults to ``{"quality": 90}`` for JPEGs.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.image_format = image_format
+        if save_kwargs is None:
+            save_kwargs = {"quality": 90} if image_format == "JPEG" else {}
+        self.save_kwargs = save_kwargs
+        self._suffix = "." + image_format.lower()
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._n_bytes = 0
+        existing = sorted(
+            self.cache_dir.glob("*" + self._suffix), key=lambda p: p.stat().st_mtime
+        )
+        for path in existing:
+            self._add_entry(path.name, path.stat().st_size)
+        self._evict()
+
+    @property
+    def n_bytes(self) -> int:
+        """Total size of the cached frames"""
+        return self._n_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self._filename(key) in self._entries
+
+    def key(self, video_id: str, frame_number: int, config_hash: str) -> str:
+        return f"{video_id}_{frame_number:010d}_{config_hash}"
+
+    def get(self, key: str) -> Optional[PIL.Image.Image]:
+        """
+        Args:
+            key: Cache key from :meth:`key`
+
+        Returns:
+            The cached frame, or ``None`` if it isn't cached.
+        """
+        filename = self._filename(key)
+        with self._lock:
+            if filename not in self._entries:
+                return None
+            self._entries.move_to_end(filename)
+        try:
+            with PIL.Image.open(self.cache_dir / filename) as img:
+                img.load()
+                return img
+        except FileNotFoundError:
+            # Deleted from under us, e.g. by another process sharing the directory.
+            with self._lock:
+                self._remove_entry(filename)
+            return None
+
+    def put(self, key: str, img: PIL.Image.Image) -> None:
+        """Store a rendered frame under ``key``, evicting the least recently used
+        frames if the cache is over budget."""
+        filename = self._filename(key)
+        path = self.cache_dir / filename
+        tmp_path = path.with_name(f".{filename}.{threading.get_ident()}.tmp")
+        img.convert("RGB").save(tmp_path, format=self.image_format, **self.save_kwargs)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._remove_entry(filename)
+            self._add_entry(filename, path.stat().st_size)
+            self._evict()
+
+    def clear(self) -> None:
+        """Delete every cached frame."""
+        with self._lock:
+            for filename in list(self._entries):
+                self._delete(filename)
+
+    def _filename(self, key: str) -> str:
+        return key + self._suffix
+
+    def _add_entry(self, filename: str, n_bytes: int) -> None:
+        self._entries[filename] = n_bytes
+        self._n_bytes += n_bytes
+
+    def _remove_entry(self, filename: str) -> None:
+        self._n_bytes -= self._entries.pop(filename, 0)
+
+    def _delete(self, filename: str) -> None:
+        self._remove_entry(filename)
+        try:
+            (self.cache_dir / filename).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        while self._n_bytes > self.max_bytes and self._entries:
+            self._delete(next(iter(self._entries)))
+
+
+class CachedRenderer:
+    """Render a video's frames through a :class:`RenderCache`, prefetching the frames
+    following each requested frame in a background thread so scrubbing forwards
+    through a video rarely waits on a render."""
+
+    def __init__(
+        self,
+        renderer: DetectionRenderer,
+        frames: Any,
+        detections: List[FrameDetections],
+        cache: RenderCache,
+        prefetch: int = 8,
+    ):
+        """
+
+        Args:
+            renderer: Renderer used for frames that aren't cached.
+            frames: Indexable collection of frames, e.g. a lazy frame loader, such
+                that ``frames[i]`` corresponds to ``detections[i]``.
+            detections: Detections of the video, ordered by frame.
+            cache: Cache to store rendered frames in.
+            prefetch: Number of frames after each requested frame to render in the
+                background. Set to 0 to disable prefetching. Frames are no longer
+                prefetched once the renderer is closed, but can still be rendered.
+        """
+        self.renderer = renderer
+        self.frames = frames
+        self.detections = detections
+        self.cache = cache
+        self.prefetch = prefetch
+        self.config_hash = renderer_config_hash(renderer)
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._closed = False
+        # The renderer holds per-render state, so the prefetching thread needs its
+        # own.
+        self._prefetch_renderer = DetectionRenderer(**renderer.config)
+
+    def __len__(self) -> int:
+        return len(self.detections)
+
+    def __getitem__(self, idx: int) -> PIL.Image.Image:
+        """
+        Args:
+            idx: Index of the frame in ``detections``
+
+        Returns:
+            The rendered frame.
+        """
+        img = self.cache.get(self._key(idx))
+        if img is None:
+            with self._lock:
+                pending = self._pending.get(idx)
+            if pending is not None:
+                img = pending.result()
+            else:
+                # A prefetch of the frame may have finished since the cache miss, in
+                # which case it cached the frame before it stopped being pending
+                img = self.cache.get(self._key(idx))
+                if img is None:
+                    img = self._render(idx, self.renderer)
+        self._schedule_prefetch(idx)
+        return img
+
+    def close(self) -> None:
+        """Stop prefetching, waiting for any queued frames to finish rendering."""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "CachedRenderer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _key(self, idx: int) -> str:
+        detections = self.detections[idx]
+        return self.cache.key(
+            detections.video_id, detections.frame_number, self.config_hash
+        )
+
+    def _render(self, idx: int, renderer: DetectionRenderer) -> PIL.Image.Image:
+        img = renderer.render_detections(self.frames[idx], self.detections[idx])
+        self.cache.put(self._key(idx), img)
+        return img
+
+    def _prefetch(self, idx: int) -> PIL.Image.Image:
+        try:
+            img = self.cache.get(self._key(idx))
+            if img is None:
+                img = self._render(idx, self._prefetch_renderer)
+            return img
+        finally:
+            with self._lock:
+                del self._pending[idx]
+
+    def _schedule_prefetch(self, idx: int) -> None:
+        last_idx = min(idx + self.prefetch, len(self.detections) - 1)
+        with self._lock:
+            if self._closed:
+                return
+            for next_idx in range(idx + 1, last_idx + 1):
+                if next_idx in self._pending or self._key(next_idx) in self.cache:
+                    continue
+                self._pending[next_idx] = self._executor.submit(
+                    self._prefetch, next_idx
+                )
@@ -0,0 +1,223 @@
+"""Temporal smoothing of per-frame hand predictions over whole videos.
+
+Each hand side is treated as one hand moving through the video, represented in
+each frame by the highest scoring hand of that side (see
+:meth:`VideoDetectionArrays.get_best_hand_rows`). The filters smooth the
+predictions of these hands, leaving any other hands unchanged, and return new
+:class:`VideoDetectionArrays` that can be saved like any other detections.
+
+The majority and EMA filters are vectorised over the whole video. Viterbi
+decoding depends on the previous frame's result, so it steps through frames in
+Python, vectorised only over hand sides and states.
+"""
+
+from typing import Optional
+
+import numpy as np
+from dataclasses import replace
+
+from .columnar import VideoDetectionArrays
+from .types import HandSide, HandState
+
+__all__ = [
+    "smooth_states_majority",
+    "smooth_states_viterbi",
+    "make_transition_matrix",
+    "smooth_bboxes_ema",
+]
+
+N_STATES = len(HandState)
+
+
+def smooth_states_majority(
+    detections: VideoDetectionArrays, window: int = 5, hand_threshold: float = 0
+) -> VideoDetectionArrays:
+    """Replace each hand's state with the most common state of its side in a
+    sliding window centered on its frame.
+
+    Args:
+        detections: A video's detections.
+        window: Odd number of frames in the window, frames without a hand of the
+            side don't vote.
+        hand_threshold: Hand score threshold above which hands are smoothed and
+            vote.
+
+    Returns:
+        The detections with smoothed hand states. Ties are broken in favour of the
+        hand's own state.
+    """
+    if window < 1 or window % 2 == 0:
+        raise ValueError(f"Expected a positive odd window but was {window}")
+    best_rows = detections.get_best_hand_rows(hand_threshold)
+    hand_states = detections.hand_states.copy()
+    radius = window // 2
+    frame_idxs = np.arange(detections.n_frames)
+    window_starts = np.maximum(frame_idxs - radius, 0)
+    window_ends = np.minimum(frame_idxs + radius + 1, detections.n_frames)
+    for side in HandSide:
+        rows = best_rows[:, side.value]
+        has_hand = rows >= 0
+        one_hot = np.zeros((detections.n_frames, N_STATES), dtype=np.int64)
+        one_hot[has_hand, detections.hand_states[rows[has_hand]]] = 1
+        cumulative_counts = np.zeros((detections.n_frames + 1, N_STATES), np.int64)
+        np.cumsum(one_hot, axis=0, out=cumulative_counts[1:])
+        counts = cumulative_counts[window_ends] - cumulative_counts[window_starts]
+        # Every frame votes for its own state, so adding half a vote for it only
+        # breaks ties
+        votes = counts + 0.5 * one_hot
+        hand_states[rows[has_hand]] = votes[has_hand].argmax(axis=1)
+    return replace(detections, hand_states=hand_states)
+
+
+def make_transition_matrix(stay_probability: float = 0.9) -> np.ndarray:
+    """Build a hand state transition matrix in which a hand stays in the same
+    state with ``stay_probability`` and otherwise moves to any other state with
+    equal probability.
+
+    Returns:
+        ``(len(HandState), len(HandState))`` matrix whose element ``[i, j]`` is the
+        probability of moving from state ``i`` to state ``j``.
+    """
+    if not 0 < stay_probability < 1:
+        raise ValueError(
+            f"Expected stay_probability in (0, 1) but was {stay_probability}"
+        )
+    transition_matrix = np.full(
+        (N_STATES, N_STATES), (1 - stay_probability) / (N_STATES - 1)
+    )
+    np.fill_diagonal(transition_matrix, stay_probability)
+    return transition_matrix
+
+
+def smooth_states_viterbi(
+    detections: VideoDetectionArrays,
+    transition_matrix: Optional[np.ndarray] = None,
+    hand_threshold: float = 0,
+) -> VideoDetectionArrays:
+    """Replace the hands' states with the most likely sequence of states of their
+    side under a hidden Markov model, decoded with the Viterbi algorithm.
+
+    Each hand's predicted state is taken to be correct with a probability growing
+    linearly with the hand's score, from chance at a score of 0 to certainty at 1,
+    and otherwise to be any of the other states with equal probability. Frames
+    without a hand of the side carry no evidence.
+
+    Decoding is inherently sequential: each frame's most likely states depend on
+    the previous frame's, so it loops over frames in Python, taking time linear in
+    the number of frames. See ``benchmarks/bench_pipeline.py`` for its timing.
+
+    Args:
+        detections: A video's detections.
+        transition_matrix: ``(len(HandState), len(HandState))`` matrix of the
+            probabilities of moving from each state to each state between frames,
+            defaults to :func:`make_transition_matrix`.
+        hand_threshold: Hand score threshold above which hands are smoothed and
+            used as evidence.
+
+    Returns:
+        The detections with smoothed hand states.
+    """
+    if transition_matrix is None:
+        transition_matrix = make_transition_matrix()
+    transition_matrix = np.asarray(transition_matrix, dtype=np.float64)
+    if transition_matrix.shape != (N_STATES, N_STATES):
+        raise ValueError(
+            f"Expected a ({N_STATES}, {N_STATES}) transition matrix but got shape "
+            f"{transition_matrix.shape}"
+        )
+    best_rows = detections.get_best_hand_rows(hand_threshold)
+    has_hand = best_rows >= 0
+    n_sides = len(HandSide)
+    # (F, sides, states) log probabilities of each frame's prediction
+    log_emissions = np.zeros((detections.n_frames, n_sides, N_STATES))
+    scores = np.clip(detections.hand_scores[best_rows[has_hand]], 0, 1 - 1e-6)
+    p_correct = 1 / N_STATES + (1 - 1 / N_STATES) * scores
+    log_emissions[has_hand] = np.log((1 - p_correct) / (N_STATES - 1))[:, None]
+    frame_idxs, side_idxs = np.nonzero(has_hand)
+    states = detections.hand_states[best_rows[has_hand]]
+    log_emissions[frame_idxs, side_idxs, states] = np.log(p_correct)
+
+    with np.errstate(divide="ignore"):
+        log_transitions = np.log(transition_matrix)
+    # Both sides are decoded at once, vectorised over sides and states
+    backpointers = np.empty((detections.n_frames, n_sides, N_STATES), dtype=np.int8)
+    log_probs = log_emissions[0] - np.log(N_STATES)
+    for frame_idx in range(1, detections.n_frames):
+        candidates = log_probs[:, :, None] + log_transitions
+        backpointers[frame_idx] = candidates.argmax(axis=1)
+        log_probs = candidates.max(axis=1) + log_emissions[frame_idx]
+
+    path = np.empty((detections.n_frames, n_sides), dtype=np.int64)
+    path[-1] = log_probs.argmax(axis=1)
+    side_range = np.arange(n_sides)
+    for frame_idx in range(detections.n_frames - 1, 0, -1):
+        path[frame_idx - 1] = backpointers[frame_idx, side_range, path[frame_idx]]
+
+    hand_states = detections.hand_states.copy()
+    hand_states[best_rows[has_hand]] = path[has_hand]
+    return replace(detections, hand_states=hand_states)
+
+
+def smooth_bboxes_ema(
+    detections: VideoDetectionArrays, alpha: float = 0.5, hand_threshold: float = 0
+) -> VideoDetectionArrays:
+    """Replace each hand's bounding box with an exponential moving average of the
+    boxes of its side, weighted by the hands' scores.
+
+    The smoothed box of a frame is the average of the boxes in that and previous
+    frames, weighting each by its hand's score times ``(1 - alpha) ** age``, where
+    ``age`` is the number of frames since it was detected. With equal scores this
+    is the usual exponential moving average, without bias towards the first box.
+
+    Args:
+        detections: A video's detections.
+        alpha: Smoothing factor in (0, 1], lower values smooth more and 1 disables
+            smoothing.
+        hand_threshold: Hand score threshold above which hands are smoothed and
+            averaged.
+
+    Returns:
+        The detections with smoothed hand bounding boxes.
+    """
+    if not 0 < alpha <= 1:
+        raise ValueError(f"Expected alpha in (0, 1] but was {alpha}")
+    best_rows = detections.get_best_hand_rows(hand_threshold)
+    hand_bboxes = detections.hand_bboxes.copy()
+    for side in HandSide:
+        rows = best_rows[:, side.value]
+        has_hand = rows >= 0
+        weights = np.zeros(detections.n_frames)
+        weights[has_hand] = detections.hand_scores[rows[has_hand]]
+        weighted_bboxes = np.zeros((detections.n_frames, 4))
+        weighted_bboxes[has_hand] = (
+            detections.hand_bboxes[rows[has_hand]] * weights[has_hand, None]
+        )
+        smoothed = _exponential_sum(
+            np.column_stack([weighted_bboxes, weights]), 1 - alpha
+        )
+        hand_bboxes[rows[has_hand]] = (
+            smoothed[has_hand, :4] / smoothed[has_hand, 4:]
+        ).astype(hand_bboxes.dtype)
+    return replace(detections, hand_bboxes=hand_bboxes)
+
+
+def _exponential_sum(values: np.ndarray, decay: float) -> np.ndarray:
+    """Compute ``y[t] = decay * y[t - 1] + values[t]`` along the first axis.
+
+    The recurrence is unrolled to ``y[t] = decay ** t * cumsum(values / decay ** k)``
+    over blocks short enough for ``decay ** -k`` not to overflow, carrying ``y``
+    from one block to the next.
+    """
+    if decay == 0:
+        return values.astype(np.float64)
+    block_size = max(1, int(250 / -np.log10(decay))) if decay < 1 else len(values)
+    sums = np.empty(values.shape, dtype=np.float64)
+    carry = np.zeros(values.shape[1:])
+    for start in range(0, len(values), block_size):
+        block = values[start : start + block_size]
+        powers = decay ** np.arange(1, len(block) + 1, dtype=np.float64)
+        powers = powers.reshape((-1,) + (1,) * (values.ndim - 1))
+        block_sums = (np.cumsum(block / powers, axis=0) + carry) * powers
+        sums[start : start + len(block)] = block_sums
+        carry = block_sums[-1]
+    return sums
@@ -0,0 +1,327 @@
+"""A uniform grid over the object detections of every frame of a video, built in
+one go, for finding the objects containing a point or whose centers are near a
+point without scanning every object in the frame."""
+
+from typing import TYPE_CHECKING, Optional, Tuple, Union
+
+import numpy as np
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .columnar import VideoDetectionArrays
+
+__all__ = [
+    "ObjectGrid",
+]
+
+# Maximum number of cells along each axis, cells are enlarged past this
+_MAX_CELLS_PER_AXIS = 1 << 12
+
+
+class ObjectGrid:
+    """Spatial index over the object detections of a video.
+
+    The coordinate space is divided into square cells, and each object is filed
+    under its frame and the cell containing its center. For containment queries,
+    each object is also lazily filed under every cell its bounding box overlaps in a
+    coarser grid, whose cells are the size of a typical object. Both are stored as
+    sorted arrays of ``(frame, cell)`` keys, so the grid takes memory in
+    proportion to the number of objects rather than cells, and queries are
+    vectorised binary searches.
+
+    Queries are batched: each takes arrays of frame indices and points, and returns
+    the matching ``(query, object row)`` pairs sorted by query then row.
+    """
+
+    def __init__(
+        self,
+        frame_idxs: np.ndarray,
+        bboxes: np.ndarray,
+        n_frames: int,
+        cell_size: float = 0.05,
+        rows: Optional[np.ndarray] = None,
+    ):
+        """
+        Args:
+            frame_idxs: ``(O,)`` frame index of each object.
+            bboxes: ``(O, 4)`` object bounding boxes as ``(left, top, right,
+                bottom)``.
+            n_frames: Number of frames in the video.
+            cell_size: Width and height of the grid's cells, ideally around the
+                radius of :meth:`within_radius` queries.
+            rows: ``(O,)`` row of each object returned by queries, defaults to its
+                position in ``bboxes``.
+        """
+        if cell_size <= 0:
+            raise ValueError(f"Expected a positive cell_size but was {cell_size}")
+        self.n_frames = n_frames
+        self.bboxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+        self.frame_idxs = np.asarray(frame_idxs, dtype=np.int64)
+        self.rows = (
+            np.arange(len(self.bboxes)) if rows is None else np.asarray(rows)
+        )
+        self.centers = (self.bboxes[:, :2] + self.bboxes[:, 2:]) / 2
+        self.cell_size = cell_size
+        self._center_grid = _Grid(self.bboxes, cell_size)
+        self._center_keys, self._center_order = self._center_grid.sort_keys(
+            self.frame_idxs,
+            np.arange(len(self.bboxes)),
+            *self._center_grid.cells(self.centers),
+        )
+        self._bbox_grid: Optional[_Grid] = None
+        self._bbox_keys: Optional[np.ndarray] = None
+        self._bbox_order: Optional[np.ndarray] = None
+
+    @staticmethod
+    def from_detections(
+        detections: "VideoDetectionArrays",
+        object_threshold: float = 0,
+        cell_size: float = 0.05,
+        width_factor: float = 1,
+        height_factor: float = 1,
+    ) -> "ObjectGrid":
+        """Index the objects of a video.
+
+        Args:
+            detections: A video's detections.
+            object_threshold: Object score threshold at or above which to index
+                objects.
+            cell_size: Width and height of the grid's cells, after scaling.
+            width_factor: Factor x coordinates are scaled by, queries are in the
+                scaled coordinate space.
+            height_factor: Factor y coordinates are scaled by.
+
+        Returns:
+            A grid whose queries return rows of the detections' object arrays.
+        """
+        rows = np.flatnonzero(detections.object_scores >= object_threshold)
+        scale = np.array([width_factor, height_factor] * 2, dtype=np.float64)
+        return ObjectGrid(
+            detections.object_frame_idxs[rows],
+            detections.object_bboxes[rows] * scale,
+            detections.n_frames,
+            cell_size=cell_size,
+            rows=rows,
+        )
+
+    def containing(
+        self, frame_idxs: np.ndarray, points: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the objects whose bounding boxes contain points.
+
+        Args:
+            frame_idxs: ``(Q,)`` frame index of each query.
+            points: ``(Q, 2)`` ``(x, y)`` point of each query.
+
+        Returns:
+            Query indices and the rows of the objects in their frame containing
+            their point, boundaries included.
+        """
+        frame_idxs, points = _as_queries(frame_idxs, points)
+        if self._bbox_grid is None:
+            self._build_bbox_grid()
+        grid = self._bbox_grid
+        cell_xs, cell_ys = grid.cells(points)
+        is_inside = (
+            (cell_xs >= 0)
+            & (cell_xs < grid.n_cells_per_axis)
+            & (cell_ys >= 0)
+            & (cell_ys < grid.n_cells_per_axis)
+        )
+        queries = np.flatnonzero(is_inside)
+        keys = grid.keys(frame_idxs[queries], cell_xs[queries], cell_ys[queries])
+        queries, objects = self._lookup(
+            queries, keys, keys, self._bbox_keys, self._bbox_order
+        )
+        bboxes = self.bboxes[objects]
+        query_points = points[queries]
+        is_match = np.all(
+            (bboxes[:, :2] <= query_points) & (query_points <= bboxes[:, 2:]), axis=1
+        )
+        return self._sorted_results(queries[is_match], objects[is_match])
+
+    def within_radius(
+        self,
+        frame_idxs: np.ndarray,
+        points: np.ndarray,
+        radius: Union[float, np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the objects whose centers are within a distance of points.
+
+        Args:
+            frame_idxs: ``(Q,)`` frame index of each query.
+            points: ``(Q, 2)`` ``(x, y)`` point of each query.
+            radius: Maximum distance of the objects' centers from the points,
+                either shared by all queries or ``(Q,)``.
+
+        Returns:
+            Query indices and the rows of the objects in their frame whose centers
+            are within ``radius`` of their point.
+        """
+        frame_idxs, points = _as_queries(frame_idxs, points)
+        radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), len(points))
+        # Scan the block of cells overlapping each query's bounding square, whose
+        # rows are runs of consecutive keys
+        grid = self._center_grid
+        min_xs, min_ys = grid.cells(points - radius[:, None])
+        max_xs, max_ys = grid.cells(points + radius[:, None])
+        min_xs, min_ys = np.maximum(min_xs, 0), np.maximum(min_ys, 0)
+        max_xs = np.minimum(max_xs, grid.n_cells_per_axis - 1)
+        max_ys = np.minimum(max_ys, grid.n_cells_per_axis - 1)
+        heights = np.where(max_xs >= min_xs, np.maximum(max_ys - min_ys + 1, 0), 0)
+        queries, cell_ys = _expand_ranges(min_ys, heights)
+        query_frame_idxs = frame_idxs[queries]
+        queries, objects = self._lookup(
+            queries,
+            grid.keys(query_frame_idxs, min_xs[queries], cell_ys),
+            grid.keys(query_frame_idxs, max_xs[queries], cell_ys),
+            self._center_keys,
+            self._center_order,
+        )
+        squared_distances = ((self.centers[objects] - points[queries]) ** 2).sum(
+            axis=1
+        )
+        is_match = squared_distances <= radius[queries] ** 2
+        return self._sorted_results(queries[is_match], objects[is_match])
+
+    def objects_containing(self, frame_idx: int, x: float, y: float) -> np.ndarray:
+        """Find the objects of a frame whose bounding boxes contain a point.
+
+        Returns:
+            Sorted rows of the objects.
+        """
+        return self.containing(np.array([frame_idx]), np.array([[x, y]]))[1]
+
+    def objects_within_radius(
+        self, frame_idx: int, x: float, y: float, radius: float
+    ) -> np.ndarray:
+        """Find the objects of a frame whose centers are within ``radius`` of a
+        point.
+
+        Returns:
+            Sorted rows of the objects.
+        """
+        return self.within_radius(np.array([frame_idx]), np.array([[x, y]]), radius)[
+            1
+        ]
+
+    def _build_bbox_grid(self) -> None:
+        # Cells the size of the median object keep the number of cells each
+        # object is filed under small, however fine the grid of centers
+        sizes = (self.bboxes[:, 2:] - self.bboxes[:, :2]).max(axis=1)
+        cell_size = max(self.cell_size, np.median(sizes) if len(sizes) > 0 else 0)
+        grid = _Grid(self.bboxes, cell_size)
+        min_xs, min_ys = grid.cells(self.bboxes[:, :2])
+        max_xs, max_ys = grid.cells(self.bboxes[:, 2:])
+        widths = max_xs - min_xs + 1
+        heights = max_ys - min_ys + 1
+        objects, cell_idxs = _expand_ranges(
+            np.zeros(len(self.bboxes)), widths * heights
+        )
+        self._bbox_keys, self._bbox_order = grid.sort_keys(
+            self.frame_idxs[objects],
+            objects,
+            min_xs[objects] + cell_idxs % widths[objects],
+            min_ys[objects] + cell_idxs // widths[objects],
+        )
+        self._bbox_grid = grid
+
+    def _lookup(
+        self,
+        queries: np.ndarray,
+        min_keys: np.ndarray,
+        max_keys: np.ndarray,
+        sorted_keys: np.ndarray,
+        sorted_objects: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the objects filed under each range of keys, bounds included.
+
+        Returns:
+            The query of each range repeated for each object, and the positions of
+            the objects in :attr:`bboxes`.
+        """
+        starts = np.searchsorted(sorted_keys, min_keys, side="left")
+        ends = np.searchsorted(sorted_keys, max_keys, side="right")
+        key_idxs, positions = _expand_ranges(starts, ends - starts)
+        return queries[key_idxs], sorted_objects[positions]
+
+    def _sorted_results(
+        self, queries: np.ndarray, objects: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        rows = self.rows[objects]
+        order = np.lexsort((rows, queries))
+        return queries[order], rows[order]
+
+
+class _Grid:
+    """Square cells covering the bounding boxes of a set of objects, numbered
+    within each frame row by row."""
+
+    def __init__(self, bboxes: np.ndarray, cell_size: float):
+        if len(bboxes) > 0:
+            self.origin = bboxes[:, :2].min(axis=0)
+            extent = (bboxes[:, 2:].max(axis=0) - self.origin).max()
+        else:
+            self.origin = np.zeros(2)
+            extent = 0
+        self.cell_size = max(cell_size, extent / (_MAX_CELLS_PER_AXIS - 1))
+        self.n_cells_per_axis = int(extent // self.cell_size) + 1
+
+    def cells(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Column and row of the cell containing each point, -1 or
+        ``n_cells_per_axis`` for points outside the grid."""
+        cells = np.floor((points - self.origin) / self.cell_size)
+        # Clip far away points to just outside the grid to avoid overflows
+        cells = np.clip(cells, -1, self.n_cells_per_axis).astype(np.int64)
+        return cells[:, 0], cells[:, 1]
+
+    def keys(
+        self, frame_idxs: np.ndarray, cell_xs: np.ndarray, cell_ys: np.ndarray
+    ) -> np.ndarray:
+        return (
+            frame_idxs * self.n_cells_per_axis + cell_ys
+        ) * self.n_cells_per_axis + cell_xs
+
+    def sort_keys(
+        self,
+        frame_idxs: np.ndarray,
+        objects: np.ndarray,
+        cell_xs: np.ndarray,
+        cell_ys: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Sort objects by the key of their frame and cell.
+
+        Returns:
+            The sorted keys, and the objects in the same order.
+        """
+        keys = self.keys(frame_idxs, cell_xs, cell_ys)
+        order = np.argsort(keys, kind="stable")
+        return keys[order], objects[order]
+
+
+def _as_queries(
+    frame_idxs: np.ndarray, points: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    frame_idxs = np.asarray(frame_idxs, dtype=np.int64).reshape(-1)
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(frame_idxs) != len(points):
+        raise ValueError(
+            f"Expected a frame index per point but got {len(frame_idxs)} frame "
+            f"indices and {len(points)} points"
+        )
+    return frame_idxs, points
+
+
+def _expand_ranges(
+    starts: np.ndarray, counts: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Expand ranges ``starts[i]:starts[i] + counts[i]`` into flat arrays.
+
+    Returns:
+        The index of the range each element belongs to, and the elements.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    range_idxs = np.repeat(np.arange(len(counts)), counts)
+    range_starts = np.cumsum(counts) - counts
+    within_range = np.arange(counts.sum()) - range_starts[range_idxs]
+    elements = np.asarray(starts, dtype=np.int64)[range_idxs] + within_range
+    return range_idxs, elements
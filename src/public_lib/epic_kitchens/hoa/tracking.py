@@ -0,0 +1,246 @@
+"""Link detections across consecutive frames into tracks, giving each hand and
+object detection a track ID shared with the detections of the same hand or object
+in neighbouring frames.
+
+Detections are linked by solving a one-to-one assignment between the detections
+of every pair of consecutive frames, batched over the whole video: hands of the
+same side are linked by IoU, objects by IoU and center distance.
+"""
+
+from typing import Callable, Iterator, Tuple
+
+import numpy as np
+from dataclasses import replace
+
+from .assignment import match_pairs
+from .columnar import VideoDetectionArrays
+
+__all__ = [
+    "track",
+    "track_hands",
+    "track_objects",
+    "bbox_iou",
+]
+
+# Maximum number of candidate pairs of detections held in memory at once
+_MAX_PAIRS = 1 << 22
+
+
+def track(
+    detections: VideoDetectionArrays,
+    hand_threshold: float = 0,
+    object_threshold: float = 0,
+    hand_iou_threshold: float = 0.3,
+    object_iou_threshold: float = 0.1,
+    max_center_distance: float = 0.1,
+    method: str = "greedy",
+) -> VideoDetectionArrays:
+    """Track the hands and objects of a video, see :func:`track_hands` and
+    :func:`track_objects`.
+
+    Returns:
+        The detections with :attr:`VideoDetectionArrays.hand_track_ids` and
+        :attr:`VideoDetectionArrays.object_track_ids` set.
+    """
+    return replace(
+        detections,
+        hand_track_ids=track_hands(
+            detections,
+            hand_threshold=hand_threshold,
+            iou_threshold=hand_iou_threshold,
+            method=method,
+        ),
+        object_track_ids=track_objects(
+            detections,
+            object_threshold=object_threshold,
+            iou_threshold=object_iou_threshold,
+            max_center_distance=max_center_distance,
+            method=method,
+        ),
+    )
+
+
+def track_hands(
+    detections: VideoDetectionArrays,
+    hand_threshold: float = 0,
+    iou_threshold: float = 0.3,
+    method: str = "greedy",
+) -> np.ndarray:
+    """Link hands of the same side across consecutive frames by the IoU of their
+    bounding boxes.
+
+    Args:
+        detections: A video's detections.
+        hand_threshold: Hand score threshold above which to track hands.
+        iou_threshold: Minimum IoU of two hands' bounding boxes for them to be
+            linked.
+        method: ``"greedy"`` to link the pairs of hands with the highest IoU first,
+            or ``"optimal"`` to maximise the number of links then their total IoU,
+            see :func:`epic_kitchens.hoa.assignment.match_pairs`.
+
+    Returns:
+        ``(H,)`` track ID of each hand, numbered from 0 in order of each track's
+        first hand, or -1 for hands at or below ``hand_threshold``.
+    """
+    rows = np.flatnonzero(detections.hand_scores > hand_threshold)
+
+    def link_costs(rows: np.ndarray, next_rows: np.ndarray) -> np.ndarray:
+        ious = bbox_iou(
+            detections.hand_bboxes[rows], detections.hand_bboxes[next_rows]
+        )
+        is_candidate = (ious >= iou_threshold) & (
+            detections.hand_sides[rows] == detections.hand_sides[next_rows]
+        )
+        return np.where(is_candidate, 1 - ious, np.nan)
+
+    return _track(
+        rows, detections.hand_frame_idxs, detections.n_frames, link_costs, method
+    )
+
+
+def track_objects(
+    detections: VideoDetectionArrays,
+    object_threshold: float = 0,
+    iou_threshold: float = 0.1,
+    max_center_distance: float = 0.1,
+    method: str = "greedy",
+) -> np.ndarray:
+    """Link objects across consecutive frames by the IoU of their bounding boxes
+    and the distance between their centers.
+
+    Linking two objects costs ``(1 - IoU) + distance / max_center_distance``.
+
+    Args:
+        detections: A video's detections.
+        object_threshold: Object score threshold at or above which to track
+            objects.
+        iou_threshold: Minimum IoU of two objects' bounding boxes for them to be
+            linked.
+        max_center_distance: Maximum distance between two objects' centers for them
+            to be linked.
+        method: ``"greedy"`` to link the cheapest pairs of objects first, or
+            ``"optimal"`` to maximise the number of links then minimise their total
+            cost, see :func:`epic_kitchens.hoa.assignment.match_pairs`.
+
+    Returns:
+        ``(O,)`` track ID of each object, numbered from 0 in order of each track's
+        first object, or -1 for objects below ``object_threshold``.
+    """
+    rows = np.flatnonzero(detections.object_scores >= object_threshold)
+    centers = detections.object_centers
+
+    def link_costs(rows: np.ndarray, next_rows: np.ndarray) -> np.ndarray:
+        ious = bbox_iou(
+            detections.object_bboxes[rows], detections.object_bboxes[next_rows]
+        )
+        distances = np.linalg.norm(centers[rows] - centers[next_rows], axis=-1)
+        is_candidate = (ious >= iou_threshold) & (distances <= max_center_distance)
+        return np.where(
+            is_candidate, (1 - ious) + distances / max_center_distance, np.nan
+        )
+
+    return _track(
+        rows, detections.object_frame_idxs, detections.n_frames, link_costs, method
+    )
+
+
+def bbox_iou(bboxes: np.ndarray, other_bboxes: np.ndarray) -> np.ndarray:
+    """Compute the intersection over union of pairs of bounding boxes.
+
+    Args:
+        bboxes: ``(N, 4)`` bounding boxes as ``(left, top, right, bottom)``.
+        other_bboxes: ``(N, 4)`` bounding boxes to compare to.
+
+    Returns:
+        ``(N,)`` IoU of each pair of bounding boxes, 0 for empty boxes.
+    """
+    bboxes = bboxes.astype(np.float64)
+    other_bboxes = other_bboxes.astype(np.float64)
+    intersection_size = np.clip(
+        np.minimum(bboxes[:, 2:], other_bboxes[:, 2:])
+        - np.maximum(bboxes[:, :2], other_bboxes[:, :2]),
+        0,
+        None,
+    )
+    intersection = intersection_size.prod(axis=-1)
+    areas = (bboxes[:, 2:] - bboxes[:, :2]).prod(axis=-1)
+    other_areas = (other_bboxes[:, 2:] - other_bboxes[:, :2]).prod(axis=-1)
+    union = areas + other_areas - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, intersection / union, 0)
+
+
+def _track(
+    rows: np.ndarray,
+    frame_idxs: np.ndarray,
+    n_frames: int,
+    link_costs: Callable[[np.ndarray, np.ndarray], np.ndarray],
+    method: str,
+) -> np.ndarray:
+    """Link ``rows`` to rows of the next frame with the lowest ``link_costs``,
+    NaN costs marking pairs that can't be linked, and number the resulting
+    chains of links."""
+    # Position in rows of the row linked to each row in the previous frame
+    previous = np.full(len(rows), -1, dtype=np.int64)
+    for positions, next_positions in _consecutive_frame_pairs(
+        frame_idxs[rows], n_frames
+    ):
+        costs = link_costs(rows[positions], rows[next_positions])
+        is_candidate = ~np.isnan(costs)
+        positions = positions[is_candidate]
+        next_positions = next_positions[is_candidate]
+        matched = match_pairs(
+            frame_idxs[rows[positions]],
+            positions,
+            next_positions,
+            costs[is_candidate],
+            method=method,
+        )
+        previous[next_positions[matched]] = positions[matched]
+
+    # Find the first row of each chain by pointer jumping, which takes log2 of the
+    # longest chain's length iterations
+    first = np.where(previous >= 0, previous, np.arange(len(rows)))
+    while True:
+        next_first = first[first]
+        if np.array_equal(next_first, first):
+            break
+        first = next_first
+    track_ids = np.full(len(frame_idxs), -1, dtype=np.int64)
+    track_ids[rows] = np.unique(first, return_inverse=True)[1]
+    return track_ids
+
+
+def _consecutive_frame_pairs(
+    frame_idxs: np.ndarray, n_frames: int
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Enumerate all pairs of positions in ``frame_idxs`` whose frames are
+    consecutive, in chunks of at most about ``_MAX_PAIRS`` pairs.
+
+    Args:
+        frame_idxs: Sorted frame index of each detection.
+        n_frames: Number of frames in the video.
+
+    Yields:
+        Positions of the first detection of each pair, and positions of the
+        detections in the next frame they're paired with.
+    """
+    offsets = np.searchsorted(frame_idxs, np.arange(n_frames + 1))
+    counts = np.diff(offsets)
+    next_counts = np.append(counts[1:], 0)
+    cumulative_pairs = np.cumsum(counts * next_counts)
+    start_frame = 0
+    while start_frame < n_frames - 1:
+        done_pairs = cumulative_pairs[start_frame - 1] if start_frame > 0 else 0
+        end_frame = np.searchsorted(
+            cumulative_pairs, done_pairs + _MAX_PAIRS, side="right"
+        )
+        end_frame = min(max(end_frame, start_frame + 1), n_frames - 1)
+        positions = np.arange(offsets[start_frame], offsets[end_frame])
+        pair_counts = next_counts[frame_idxs[positions]]
+        first_positions = np.repeat(positions, pair_counts)
+        run_starts = np.cumsum(pair_counts) - pair_counts
+        within_run = np.arange(pair_counts.sum()) - np.repeat(run_starts, pair_counts)
+        next_starts = offsets[frame_idxs[positions] + 1]
+        yield first_positions, np.repeat(next_starts, pair_counts) + within_run
+        start_frame = end_frame
@@ -2,13 +2,15 @@
 
 from enum import Enum, unique
 from itertools import chain
-from typing import Dict, Iterator, List, Tuple, cast
+from typing import Dict, Iterator, List, Optional, Tuple, cast
 
 import numpy as np
 from dataclasses import dataclass
 
 import epic_kitchens.hoa.types_pb2 as pb
 
+from . import profiling
+
 __all__ = [
     "HandSide",
     "HandState",
@@ -17,8 +19,13 @@ __all__ = [
     "HandDetection",
     "ObjectDetection",
     "FrameDetections",
+    "HAND_OBJECT_MATCHING_METHODS",
 ]
 
+#: Methods of matching hands to the objects they interact with, see
+#: :meth:`FrameDetections.get_hand_object_interactions`
+HAND_OBJECT_MATCHING_METHODS = ("nearest", "optimal")
+
 
 @unique
 class HandSide(Enum):
@@ -274,7 +281,11 @@ class FrameDetections:
         return FrameDetections.from_protobuf(pb_detection)
 
     def get_hand_object_interactions(
-        self, object_threshold: float = 0, hand_threshold: float = 0
+        self,
+        object_threshold: float = 0,
+        hand_threshold: float = 0,
+        max_distance: Optional[float] = None,
+        method: str = "nearest",
     ) -> Dict[int, int]:
         """Match the hands to objects based on the hand offset vector that the model
         uses to predict the location of the interacted object.
@@ -284,30 +295,72 @@ class FrameDetections:
                 for matching
             hand_threshold: Hand score threshold above which to consider hands for
                 matching.
+            max_distance: Maximum distance between an object's center and the
+                position predicted by the hand's offset vector for them to be
+                matched.
+            method: ``"nearest"`` to match each hand to the closest object, even if
+                another hand is matched to it too, or ``"optimal"`` to match hands
+                to distinct objects, matching as many hands as possible with the
+                least total distance.
 
         Returns:
             A dictionary mapping hand detections to objects by indices
         """
+        if method not in HAND_OBJECT_MATCHING_METHODS:
+            raise ValueError(
+                f"Unknown matching method {method!r}, expected one of "
+                f"{', '.join(HAND_OBJECT_MATCHING_METHODS)}"
+            )
         interactions = dict()
         object_idxs = [
             i for i, obj in enumerate(self.objects) if obj.score >= object_threshold
         ]
+        if len(object_idxs) == 0:
+            return interactions
         object_centers = np.array(
             [self.objects[object_id].bbox.center for object_id in object_idxs]
         )
-        for hand_idx, hand_detection in enumerate(self.hands):
-            if (
-                hand_detection.state.value == HandState.NO_CONTACT.value
-                or hand_detection.score <= hand_threshold
-            ):
-                continue
-            estimated_object_position = (
-                np.array(hand_detection.bbox.center) +
-                np.array(hand_detection.object_offset.coord)
-            )
-            distances = ((object_centers - estimated_object_position) ** 2).sum(
-                    axis=-1)
-            interactions[hand_idx] = object_idxs[cast(int, np.argmin(distances))]
+        hand_idxs = [
+            hand_idx
+            for hand_idx, hand_detection in enumerate(self.hands)
+            if hand_detection.state.value != HandState.NO_CONTACT.value
+            and hand_detection.score > hand_threshold
+        ]
+        if len(hand_idxs) == 0:
+            return interactions
+        estimated_object_positions = np.array(
+            [
+                np.array(self.hands[hand_idx].bbox.center)
+                + np.array(self.hands[hand_idx].object_offset.coord)
+                for hand_idx in hand_idxs
+            ]
+        )
+        squared_distances = (
+            (object_centers[None, :] - estimated_object_positions[:, None]) ** 2
+        ).sum(axis=-1)
+        if max_distance is None:
+            is_candidate = np.ones(squared_distances.shape, dtype=bool)
+        else:
+            is_candidate = squared_distances <= max_distance ** 2
+        if method == "nearest":
+            for i, hand_idx in enumerate(hand_idxs):
+                nearest = cast(int, np.argmin(squared_distances[i]))
+                if is_candidate[i, nearest]:
+                    interactions[hand_idx] = object_idxs[nearest]
+            return interactions
+        from .assignment import match_pairs
+
+        distances = np.sqrt(squared_distances)
+        pair_hands, pair_objects = np.nonzero(is_candidate)
+        matched = match_pairs(
+            np.zeros(len(pair_hands), dtype=np.int64),
+            pair_hands,
+            pair_objects,
+            distances[pair_hands, pair_objects],
+            method="optimal",
+        )
+        for i, j in zip(pair_hands[matched], pair_objects[matched]):
+            interactions[hand_idxs[i]] = object_idxs[j]
         return interactions
 
     def scale(self, width_factor: float = 1, height_factor: float = 1) -> None:
@@ -324,3 +377,13 @@ class FrameDetections:
         """
         for det in chain(self.hands, self.objects):
             det.center_scale(width_factor=width_factor, height_factor=height_factor)
+
+
+profiling.register_methods(BBox, "scale", "center_scale")
+profiling.register_methods(
+    FrameDetections,
+    "from_protobuf_str",
+    "get_hand_object_interactions",
+    "scale",
+    "center_scale",
+)
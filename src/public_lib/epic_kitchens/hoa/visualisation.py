@@ -1,12 +1,16 @@
 """Tools for visualising hand-object detections"""
 import os
+import threading
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
-from typing import Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import PIL.Image
 from PIL import ImageFont, ImageDraw
 
+from . import profiling
 from .types import FrameDetections, HandDetection, HandSide, HandState, ObjectDetection
 
 
@@ -35,6 +39,7 @@ class DetectionRenderer:
         self.hand_threshold = hand_threshold
         self.object_threshold = object_threshold
         self.only_interacted_objects = only_interacted_objects
+        self.font_size = font_size
 
         try:
             self.font = ImageFont.truetype(
@@ -70,6 +75,19 @@ class DetectionRenderer:
             HandState.STATIONARY_OBJECT.name: "F",
         }
 
+    @property
+    def config(self) -> Dict[str, Any]:
+        """The keyword arguments needed to construct an identically configured
+        renderer."""
+        return {
+            "hand_threshold": self.hand_threshold,
+            "object_threshold": self.object_threshold,
+            "only_interacted_objects": self.only_interacted_objects,
+            "font_size": self.font_size,
+            "border": self.border,
+            "text_padding": self.text_padding,
+        }
+
     def render_detections(
         self, frame: PIL.Image.Image, detections: FrameDetections
     ) -> PIL.Image.Image:
@@ -200,3 +218,184 @@ class DetectionRenderer:
             y + self.border + padding - offset_y + 1,
         )
         draw.text(text_coordinate, text, font=self.font, fill=text_color)
+
+
+profiling.register_methods(DetectionRenderer, "render_detections")
+
+
+def render_thumbnail(
+    renderer: DetectionRenderer,
+    frame: PIL.Image.Image,
+    detections: FrameDetections,
+    size: Tuple[int, int],
+) -> PIL.Image.Image:
+    """Downscale a frame and annotate it. The detections are scaled from normalised
+    coordinates straight to the thumbnail resolution rather than rendered at full
+    resolution and resized.
+
+    Args:
+        renderer: Renderer to annotate the thumbnail with
+        frame: Frame to downscale
+        detections: Detections for the frame
+        size: The ``(width, height)`` of the thumbnail
+
+    Returns:
+        The annotated thumbnail.
+    """
+    filename = getattr(frame, "filename", None)
+    if frame.format == "JPEG" and filename:
+        # Let the decoder downscale in the DCT domain. Drafting changes the size and
+        # mode of the image it is called on, so draft our own handle on the file
+        # rather than the caller's frame.
+        with PIL.Image.open(filename) as source:
+            source.draft("RGB", size)
+            thumbnail = source.convert("RGB").resize(size, PIL.Image.BILINEAR)
+    else:
+        thumbnail = frame.convert("RGB").resize(size, PIL.Image.BILINEAR)
+    return renderer.render_detections(thumbnail, detections)
+
+
+class MontageRenderer:
+    """A class to render many frames as annotated thumbnails tiled into contact
+    sheets, e.g. for reviewing sampled frames from a video at a glance."""
+
+    def __init__(
+        self,
+        renderer: Optional[DetectionRenderer] = None,
+        thumbnail_size: Tuple[int, int] = (228, 128),
+        columns: int = 10,
+        rows: int = 10,
+        n_workers: Optional[int] = None,
+        label_frames: bool = True,
+        background_color: Tuple[int, int, int] = (0, 0, 0),
+    ):
+        """
+
+        Args:
+            renderer: Renderer used to annotate each thumbnail. Its font size, border
+                and padding are applied at thumbnail resolution, so they should be
+                smaller than those used for full-size frames. Defaults to a renderer
+                suited to the default thumbnail size.
+            thumbnail_size: The ``(width, height)`` of each thumbnail in the sheet.
+            columns: Number of thumbnails per row of a sheet.
+            rows: Number of thumbnail rows per sheet.
+            n_workers: Number of threads used to render thumbnails, defaults to the
+                :class:`concurrent.futures.ThreadPoolExecutor` default.
+            label_frames: Write the frame number in the corner of each thumbnail.
+            background_color: Color of sheet area not covered by thumbnails.
+        """
+        if renderer is None:
+            renderer = DetectionRenderer(font_size=10, border=1, text_padding=1)
+        self.renderer = renderer
+        self.thumbnail_size = thumbnail_size
+        self.columns = columns
+        self.rows = rows
+        self.n_workers = n_workers
+        self.label_frames = label_frames
+        self.background_color = background_color
+        self.label_font = ImageFont.load_default()
+        # DetectionRenderer keeps per-render state on the instance, so each worker
+        # thread gets its own identically configured copy.
+        self._local = threading.local()
+
+    @property
+    def frames_per_sheet(self) -> int:
+        return self.columns * self.rows
+
+    def render_montages(
+        self, frames_and_detections: Iterable[Tuple[PIL.Image.Image, FrameDetections]]
+    ) -> List[PIL.Image.Image]:
+        """
+        Args:
+            frames_and_detections: Pairs of frames and their corresponding
+                detections, in the order they should appear in the sheets.
+
+        Returns:
+            A list of sheets, each containing up to :attr:`frames_per_sheet`
+            annotated thumbnails laid out row by row.
+        """
+        items = list(frames_and_detections)
+        with ThreadPoolExecutor(max_workers=self.n_workers) as pool:
+            thumbnails = list(pool.map(self.render_thumbnail, items))
+        frame_numbers = [detections.frame_number for _, detections in items]
+        return [
+            self._tile(
+                thumbnails[start : start + self.frames_per_sheet],
+                frame_numbers[start : start + self.frames_per_sheet],
+            )
+            for start in range(0, len(thumbnails), self.frames_per_sheet)
+        ]
+
+    def render_thumbnail(
+        self, frame_and_detections: Tuple[PIL.Image.Image, FrameDetections]
+    ) -> PIL.Image.Image:
+        """Downscale a frame to :attr:`thumbnail_size` and annotate it, see
+        :func:`render_thumbnail`.
+
+        Args:
+            frame_and_detections: A frame and its detections.
+
+        Returns:
+            The annotated thumbnail.
+        """
+        frame, detections = frame_and_detections
+        return render_thumbnail(
+            self._get_renderer(), frame, detections, self.thumbnail_size
+        )
+
+    def _get_renderer(self) -> DetectionRenderer:
+        renderer = getattr(self._local, "renderer", None)
+        if renderer is None:
+            renderer = self._local.renderer = DetectionRenderer(**self.renderer.config)
+        return renderer
+
+    def _tile(
+        self, thumbnails: List[PIL.Image.Image], frame_numbers: List[int]
+    ) -> PIL.Image.Image:
+        width, height = self.thumbnail_size
+        sheet = PIL.Image.new(
+            "RGB", (width * self.columns, height * self.rows), self.background_color
+        )
+        draw = ImageDraw.Draw(sheet)
+        for i, (thumbnail, frame_number) in enumerate(zip(thumbnails, frame_numbers)):
+            row, column = divmod(i, self.columns)
+            x, y = column * width, row * height
+            sheet.paste(thumbnail, (x, y))
+            if self.label_frames:
+                draw.text(
+                    (x + 2, y + height - 12),
+                    str(frame_number),
+                    font=self.label_font,
+                    fill=(255, 255, 255),
+                )
+        return sheet
+
+
+def overlay_heatmap(
+    frame: PIL.Image.Image,
+    heatmap: np.ndarray,
+    color: Tuple[int, int, int] = (220, 50, 32),
+    max_alpha: float = 0.7,
+) -> PIL.Image.Image:
+    """Overlay a heatmap, such as those from
+    :class:`epic_kitchens.hoa.heatmaps.OccupancyHeatmaps`, onto a frame.
+
+    Args:
+        frame: Frame to draw the heatmap on
+        heatmap: ``(height, width)`` array of non-negative values covering the whole
+            frame. It is resized to the frame.
+        color: Color of the overlay
+        max_alpha: Opacity of the overlay where the heatmap is at its maximum.
+
+    Returns:
+        A copy of ``frame`` with the heatmap blended on top.
+    """
+    peak = heatmap.max()
+    if peak > 0:
+        heatmap = heatmap / peak
+    alpha = PIL.Image.fromarray(
+        np.round(heatmap * max_alpha * 255).astype(np.uint8), mode="L"
+    ).resize(frame.size, PIL.Image.BILINEAR)
+    img = frame.convert("RGB")
+    img.paste(PIL.Image.new("RGB", frame.size, color), (0, 0), alpha)
+    return img
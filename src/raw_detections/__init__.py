@@ -1,4 +1,14 @@
-from .io import load_detections, save_detections
+from .columnar import RawVideoDetectionArrays
+from .io import (
+    load_archive_frame_detections,
+    load_archive_frame_detections_bytes,
+    load_detection_arrays,
+    load_detections,
+    load_frame_detections,
+    load_frame_detections_bytes,
+    save_detections,
+    save_detections_bytes,
+)
 from .types import (
     OffsetVector,
     FrameDetections,
@@ -0,0 +1,101 @@
+"""Per-video tar/zip archives of raw per-frame detections. Reading a video's frames
+as a single sequential stream avoids the filesystem overhead of opening one small
+file per frame."""
+
+import re
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Iterator, List, Tuple, Union
+
+__all__ = [
+    "is_archive",
+    "get_archive_stem",
+    "get_frame_sort_key",
+    "iter_archive_members",
+    "pack_frame_files",
+]
+
+ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".zip")
+
+_FRAME_NUMBER_PATTERN = re.compile(r".*?(\d+)\.pkl$")
+
+
+def is_archive(path: Union[str, Path]) -> bool:
+    return str(path).endswith(ARCHIVE_SUFFIXES)
+
+
+def get_archive_stem(path: Union[str, Path]) -> str:
+    """Get the name of an archive without its suffix, e.g. P01_101 for
+    P01_101.tar.gz"""
+    name = Path(path).name
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    raise ValueError(f"{path} is not an archive")
+
+
+def get_frame_sort_key(name: str) -> int:
+    """Sort key ordering per-frame detection files by the frame number at the end
+    of their name."""
+    return int(_FRAME_NUMBER_PATTERN.match(name).group(1))
+
+
+def iter_archive_members(path: Union[str, Path]) -> Iterator[Tuple[str, bytes]]:
+    """Iterate over the per-frame ``.pkl`` files in an archive in the order they are
+    stored, reading the archive in a single pass.
+
+    Args:
+        path: Path to a tar (optionally gzipped) or zip archive.
+
+    Yields:
+        The name (without any directories) and contents of each member.
+    """
+    path = Path(path)
+    if path.name.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                name = info.filename.rsplit("/", 1)[-1]
+                if not info.is_dir() and name.endswith(".pkl"):
+                    yield name, archive.read(info)
+    else:
+        # Stream mode reads members strictly sequentially without seeking
+        with tarfile.open(path, mode="r|*") as archive:
+            for member in archive:
+                name = member.name.rsplit("/", 1)[-1]
+                if member.isfile() and name.endswith(".pkl"):
+                    yield name, archive.extractfile(member).read()
+
+
+def pack_frame_files(paths: List[Path], archive_path: Union[str, Path]) -> None:
+    """Pack per-frame detection files into an archive, in frame number order.
+
+    The archive format is chosen by the suffix of ``archive_path``. Members are
+    stored under their file names without any directories. The archive is written
+    to a temporary file first so an interrupted run never leaves a truncated
+    archive behind.
+
+    Args:
+        paths: Per-frame detection files to pack.
+        archive_path: Path of the archive to write.
+    """
+    archive_path = Path(archive_path)
+    if not is_archive(archive_path):
+        raise ValueError(
+            f"Expected archive path ending in one of {ARCHIVE_SUFFIXES}, but got "
+            f"{archive_path}"
+        )
+    paths = sorted(paths, key=lambda p: get_frame_sort_key(p.name))
+    tmp_path = archive_path.with_name(archive_path.name + ".tmp")
+    if archive_path.name.endswith(".zip"):
+        # Frames are tiny pickles of already compact protobufs, compressing them
+        # buys little and slows reading down.
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_STORED) as archive:
+            for p in paths:
+                archive.write(p, arcname=p.name)
+    else:
+        mode = "w:gz" if archive_path.name.endswith((".gz", ".tgz")) else "w"
+        with tarfile.open(tmp_path, mode) as archive:
+            for p in paths:
+                archive.add(p, arcname=p.name, recursive=False)
+    tmp_path.replace(archive_path)
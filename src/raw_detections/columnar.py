@@ -0,0 +1,143 @@
+"""A columnar (struct-of-arrays) representation of a video's raw detections"""
+
+from typing import Iterable, List
+
+import numpy as np
+from dataclasses import dataclass
+
+from . import raw_types_pb2 as pb
+from .types import FrameDetections
+
+__all__ = [
+    "RawVideoDetectionArrays",
+]
+
+
+@dataclass
+class RawVideoDetectionArrays:
+    """Dataclass holding all the raw detections of a video as flat arrays, one row
+    per hand/object detection. Rows are ordered by frame, and each row references
+    its frame through an index into :attr:`frame_numbers`. Coordinates are in
+    pixels of the frame the detector was run on."""
+
+    video_id: str
+    #: ``(F,)`` frame numbers of the video's frames
+    frame_numbers: np.ndarray
+    #: ``(H,)`` index into :attr:`frame_numbers` of each hand's frame
+    hand_frame_idxs: np.ndarray
+    #: ``(H, 2)`` ``(x, y)`` of the top left of the hand bounding boxes
+    hand_top_lefts: np.ndarray
+    #: ``(H, 2)`` ``(width, height)`` of the hand bounding boxes
+    hand_sizes: np.ndarray
+    #: ``(H,)`` hand scores
+    hand_scores: np.ndarray
+    #: ``(H,)`` :class:`HandState` values
+    hand_states: np.ndarray
+    #: ``(H,)`` :class:`HandSide` values
+    hand_sides: np.ndarray
+    #: ``(H, 2)`` unit vectors from the hand center towards the interacted object
+    hand_offset_directions: np.ndarray
+    #: ``(H,)`` magnitude of the hand offset vectors
+    hand_offset_magnitudes: np.ndarray
+    #: ``(O,)`` index into :attr:`frame_numbers` of each object's frame
+    object_frame_idxs: np.ndarray
+    #: ``(O, 2)`` ``(x, y)`` of the top left of the object bounding boxes
+    object_top_lefts: np.ndarray
+    #: ``(O, 2)`` ``(width, height)`` of the object bounding boxes
+    object_sizes: np.ndarray
+    #: ``(O,)`` object scores
+    object_scores: np.ndarray
+
+    @property
+    def n_frames(self) -> int:
+        return len(self.frame_numbers)
+
+    @staticmethod
+    def from_protobuf_strs(pb_strs: Iterable[bytes]) -> "RawVideoDetectionArrays":
+        """Build the arrays straight from serialized raw protobuf detections without
+        creating the intermediate dataclasses.
+
+        Args:
+            pb_strs: Serialized raw :class:`pb.Detections`, ordered by frame.
+
+        Returns:
+            The detections in columnar form.
+        """
+        video_id = None
+        frame_numbers: List[int] = []
+        hand_frame_idxs: List[int] = []
+        hand_rows: List[tuple] = []
+        object_frame_idxs: List[int] = []
+        object_rows: List[tuple] = []
+        pb_detections = pb.Detections()
+        for frame_idx, pb_str in enumerate(pb_strs):
+            pb_detections.Clear()
+            pb_detections.MergeFromString(pb_str)
+            if video_id is None:
+                video_id = pb_detections.video_id
+            frame_numbers.append(pb_detections.frame_number)
+            for hand in pb_detections.hands:
+                bbox = hand.bbox
+                offset = hand.offset
+                hand_frame_idxs.append(frame_idx)
+                hand_rows.append(
+                    (
+                        bbox.top_left.x,
+                        bbox.top_left.y,
+                        bbox.width,
+                        bbox.height,
+                        hand.score,
+                        hand.state,
+                        hand.side,
+                        offset.position.x,
+                        offset.position.y,
+                        offset.magnitude,
+                    )
+                )
+            for obj in pb_detections.objects:
+                bbox = obj.bbox
+                object_frame_idxs.append(frame_idx)
+                object_rows.append(
+                    (
+                        bbox.top_left.x,
+                        bbox.top_left.y,
+                        bbox.width,
+                        bbox.height,
+                        obj.score,
+                    )
+                )
+        if video_id is None:
+            raise ValueError("Expected at least one frame of detections")
+        hands = np.array(hand_rows, dtype=np.float64).reshape(-1, 10)
+        objects = np.array(object_rows, dtype=np.float64).reshape(-1, 5)
+        return RawVideoDetectionArrays(
+            video_id=video_id,
+            frame_numbers=np.array(frame_numbers, dtype=np.int32),
+            hand_frame_idxs=np.array(hand_frame_idxs, dtype=np.int64),
+            hand_top_lefts=hands[:, 0:2].astype(np.int32),
+            hand_sizes=hands[:, 2:4].astype(np.int32),
+            hand_scores=hands[:, 4].astype(np.float32),
+            hand_states=hands[:, 5].astype(np.int8),
+            hand_sides=hands[:, 6].astype(np.int8),
+            hand_offset_directions=hands[:, 7:9].astype(np.float32),
+            hand_offset_magnitudes=hands[:, 9].astype(np.float32),
+            object_frame_idxs=np.array(object_frame_idxs, dtype=np.int64),
+            object_top_lefts=objects[:, 0:2].astype(np.int32),
+            object_sizes=objects[:, 2:4].astype(np.int32),
+            object_scores=objects[:, 4].astype(np.float32),
+        )
+
+    @staticmethod
+    def from_frame_detections(
+        detections: List[FrameDetections],
+    ) -> "RawVideoDetectionArrays":
+        """
+        Args:
+            detections: A video's raw detections, ordered by frame.
+
+        Returns:
+            The detections in columnar form.
+        """
+        return RawVideoDetectionArrays.from_protobuf_strs(
+            d.to_protobuf().SerializeToString() for d in detections
+        )
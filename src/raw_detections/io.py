@@ -1,6 +1,8 @@
 from pathlib import Path
 from typing import List, Union
 
+from .archive import get_frame_sort_key, iter_archive_members
+from .columnar import RawVideoDetectionArrays
 from .types import FrameDetections
 
 
@@ -11,6 +13,13 @@ def load_detections(filename: Union[str, Path]) -> List[FrameDetections]:
         return [FrameDetections.from_protobuf_str(s) for s in pickle.load(f)]
 
 
+def load_detection_arrays(filename: Union[str, Path]) -> RawVideoDetectionArrays:
+    import pickle
+
+    with open(filename, "rb") as f:
+        return RawVideoDetectionArrays.from_protobuf_strs(pickle.load(f))
+
+
 def load_frame_detections(filename: Union[str, Path]) -> FrameDetections:
     import pickle
 
@@ -18,8 +27,48 @@ def load_frame_detections(filename: Union[str, Path]) -> FrameDetections:
         return FrameDetections.from_protobuf_str(pickle.load(f))
 
 
+def load_frame_detections_bytes(filename: Union[str, Path]) -> bytes:
+    """Load the serialized protobuf of a frame's detections without decoding it."""
+    import pickle
+
+    with open(filename, "rb") as f:
+        return pickle.load(f)
+
+
+def load_archive_frame_detections_bytes(filename: Union[str, Path]) -> List[bytes]:
+    """Load the serialized protobufs of every frame in a per-video tar/zip archive of
+    per-frame detections, ordered by frame number. The archive is read in a single
+    sequential pass.
+    """
+    import pickle
+
+    members = sorted(
+        iter_archive_members(filename), key=lambda member: get_frame_sort_key(member[0])
+    )
+    return [pickle.loads(data) for _, data in members]
+
+
+def load_archive_frame_detections(
+    filename: Union[str, Path]
+) -> List[FrameDetections]:
+    """Load the detections of every frame in a per-video tar/zip archive of
+    per-frame detections, ordered by frame number."""
+    return [
+        FrameDetections.from_protobuf_str(pb_str)
+        for pb_str in load_archive_frame_detections_bytes(filename)
+    ]
+
+
 def save_detections(detections: List[FrameDetections], filepath: Union[str, Path]) -> None:
     import pickle
 
     with open(filepath, "wb") as f:
-        pickle.dump([d.to_protobuf().SerializeToString() for d in detections], f)
\ No newline at end of file
+        pickle.dump([d.to_protobuf().SerializeToString() for d in detections], f)
+
+
+def save_detections_bytes(pb_strs: List[bytes], filepath: Union[str, Path]) -> None:
+    """Save already serialized protobuf detections, ordered by frame."""
+    import pickle
+
+    with open(filepath, "wb") as f:
+        pickle.dump(pb_strs, f)
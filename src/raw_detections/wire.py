@@ -0,0 +1,114 @@
+"""Helpers for reading and patching top-level fields of serialized ``Detections``
+messages directly in the protobuf wire format, avoiding a full decode/re-encode
+of every hand and object detection."""
+
+from typing import Iterator, Tuple
+
+__all__ = [
+    "read_frame_number",
+    "set_video_id",
+]
+
+# Field numbers of Detections in raw_types.proto
+VIDEO_ID_FIELD = 1
+FRAME_NUMBER_FIELD = 2
+
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_FIXED32 = 5
+
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _iter_fields(pb_str: bytes) -> Iterator[Tuple[int, int, int, int]]:
+    """Yield ``(field_number, start, value_start, end)`` of every top-level field,
+    where ``pb_str[start:end]`` is the whole field including its tag and
+    ``pb_str[value_start:end]`` its payload (the varint itself for varint fields)."""
+    pos = 0
+    while pos < len(pb_str):
+        start = pos
+        tag, pos = _read_varint(pb_str, pos)
+        field_number, wire_type = tag >> 3, tag & 0x7
+        value_start = pos
+        if wire_type == _VARINT:
+            _, pos = _read_varint(pb_str, pos)
+        elif wire_type == _FIXED64:
+            pos += 8
+        elif wire_type == _LENGTH_DELIMITED:
+            length, value_start = _read_varint(pb_str, pos)
+            pos = value_start + length
+        elif wire_type == _FIXED32:
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire_type}")
+        if pos > len(pb_str):
+            raise ValueError("Truncated protobuf message")
+        yield field_number, start, value_start, pos
+
+
+def read_frame_number(pb_str: bytes) -> int:
+    """Read the frame number of a serialized ``Detections`` message."""
+    frame_number = 0
+    for field_number, _, value_start, _ in _iter_fields(pb_str):
+        if field_number == FRAME_NUMBER_FIELD:
+            # Last value wins, as when parsing.
+            frame_number, _ = _read_varint(pb_str, value_start)
+    # int32 is encoded as a 64-bit two's complement varint
+    if frame_number >= 1 << 63:
+        frame_number -= 1 << 64
+    return frame_number
+
+
+def set_video_id(pb_str: bytes, video_id: str) -> bytes:
+    """Replace the video ID of a serialized ``Detections`` message, leaving the
+    serialized hands and objects untouched.
+
+    Args:
+        pb_str: Serialized ``Detections`` message
+        video_id: Video ID to set
+
+    Returns:
+        The serialized message with its video ID replaced. The video ID is
+        written first, as protobuf serializers do.
+    """
+    encoded_id = video_id.encode("utf8")
+    chunks = []
+    # proto3 doesn't serialize empty strings
+    if encoded_id:
+        chunks.extend(
+            [
+                _encode_varint((VIDEO_ID_FIELD << 3) | _LENGTH_DELIMITED),
+                _encode_varint(len(encoded_id)),
+                encoded_id,
+            ]
+        )
+    pos = 0
+    for field_number, start, _, end in _iter_fields(pb_str):
+        if field_number == VIDEO_ID_FIELD:
+            chunks.append(pb_str[pos:start])
+            pos = end
+    chunks.append(pb_str[pos:])
+    return b"".join(chunks)
@@ -0,0 +1,124 @@
+import argparse
+import os.path
+import re
+import sys
+from pathlib import Path
+from typing import Optional
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # isort:skip
+sys.path.insert(0, project_root)  # isort:skip
+sys.path.insert(0, os.path.join(project_root, "public_lib"))  # isort:skip
+
+from aggregate_raw_detections import get_video_id, load_input_detections
+from convert_raw_to_releasable_detections import (
+    VectorisedConverter,
+    save_releasable_video_detection_arrays,
+)
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from raw_detections.columnar import RawVideoDetectionArrays
+from raw_detections.io import save_detections_bytes
+
+parser = argparse.ArgumentParser(
+    description="Aggregate per-frame raw detections and convert them to releasable "
+    "per-video detections in one pass, without writing and re-reading the interim "
+    "raw per-video detections",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "input_dir",
+    type=Path,
+    help="Directory, or tar/zip archive, containing a video's raw per-frame "
+    "detections",
+)
+parser.add_argument(
+    "releasable_video_annotations_pkl",
+    type=Path,
+    help="Path to write the pickled list of releasable FrameDetection protobuf "
+    "strings to",
+)
+parser.add_argument(
+    "--interim-pkl",
+    type=Path,
+    help="Also write the aggregated raw detections here, as "
+    "aggregate_raw_detections.py would",
+)
+parser.add_argument(
+    "--frame-height", type=int, default=256, help="Height of frame detector was run on"
+)
+parser.add_argument(
+    "--frame-width", type=int, default=456, help="Width of frame detector was run on"
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="Number of processes to load per-frame detections with",
+)
+parser.add_argument(
+    "--chunk-size",
+    type=int,
+    default=256,
+    help="Number of frame files handed to a worker process at once",
+)
+
+
+def main(args):
+    video_id = get_video_id(args.input_dir)
+    if not re.match(r"P\d+_\d+", video_id):
+        print("Input directory name must be the video ID (e.g. P01_101)")
+        sys.exit(1)
+    converter = VectorisedConverter(
+        frame_height=args.frame_height, frame_width=args.frame_width
+    )
+    releasable_detections = aggregate_and_convert(
+        args.input_dir,
+        converter,
+        interim_pkl=args.interim_pkl,
+        n_workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+    args.releasable_video_annotations_pkl.parent.mkdir(exist_ok=True, parents=True)
+    print(f"Saving detections to {args.releasable_video_annotations_pkl}")
+    save_releasable_video_detection_arrays(
+        args.releasable_video_annotations_pkl, releasable_detections
+    )
+
+
+def aggregate_and_convert(
+    input_dir: Path,
+    converter: VectorisedConverter,
+    interim_pkl: Optional[Path] = None,
+    n_workers: int = 1,
+    chunk_size: int = 256,
+) -> VideoDetectionArrays:
+    """Aggregate the per-frame raw detections in ``input_dir`` and convert them to
+    releasable detections.
+
+    Args:
+        input_dir: Directory, or tar/zip archive, of per-frame raw detections named
+            after the video.
+        converter: Converter from raw to releasable detections.
+        interim_pkl: If given, the aggregated raw detections are also written here.
+        n_workers: Number of processes to load per-frame detections with.
+        chunk_size: Number of frame files handed to a worker process at once.
+
+    Returns:
+        The video's releasable detections.
+    """
+    _, raw_detections = load_input_detections(
+        input_dir,
+        get_video_id(input_dir),
+        n_workers=n_workers,
+        chunk_size=chunk_size,
+    )
+    if interim_pkl is not None:
+        interim_pkl.parent.mkdir(exist_ok=True, parents=True)
+        print(f"Saving interim detections to {interim_pkl}")
+        save_detections_bytes(raw_detections, interim_pkl)
+    return converter.convert_video_arrays(
+        RawVideoDetectionArrays.from_protobuf_strs(raw_detections)
+    )
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
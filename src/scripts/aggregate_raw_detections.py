@@ -1,70 +1,331 @@
 import argparse
+import functools
+import hashlib
+import json
 import os.path
 import pickle
 import re
 import sys
+from dataclasses import asdict, dataclass
+from multiprocessing import Pool
 from pathlib import Path
-from typing import Any, List
+from typing import Dict, List, Optional, Tuple
 
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # isort:skip
 sys.path.insert(0, project_root)  # isort:skip
 
-from raw_detections import FrameDetections
+from pipeline.instrumentation import (
+    Instrumentation,
+    StageStats,
+    add_instrumentation_arguments,
+)
+from pipeline.videos import get_video_id
+from raw_detections.archive import (
+    get_frame_sort_key,
+    is_archive,
+    iter_archive_members,
+)
+from raw_detections.io import save_detections_bytes
+from raw_detections.wire import read_frame_number, set_video_id
 
 parser = argparse.ArgumentParser(
     description="Aggregate raw detections from per-frame to per-video",
     formatter_class=argparse.ArgumentDefaultsHelpFormatter,
 )
-parser.add_argument("input_dir", type=Path, help="Directory containing raw detections")
+parser.add_argument(
+    "input_dir",
+    type=Path,
+    help="Directory, or tar/zip archive, containing a video's raw per-frame "
+    "detections",
+)
 parser.add_argument(
     "output_pkl", type=Path, help="Path to write aggregate detections pickle to."
 )
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="Number of processes to load per-frame detections with",
+)
+parser.add_argument(
+    "--chunk-size",
+    type=int,
+    default=256,
+    help="Number of frame files handed to a worker process at once",
+)
+parser.add_argument(
+    "--incremental",
+    action="store_true",
+    help="Only re-read frame files that changed since the last aggregation, "
+    "patching the existing output. A manifest of the frame files is kept next "
+    "to the output to detect changes.",
+)
+parser.add_argument(
+    "--manifest",
+    type=Path,
+    help="Path of the manifest used by --incremental, defaults to the output path "
+    "with a .manifest.json suffix",
+)
+add_instrumentation_arguments(parser)
 
 
 def main(args):
-    video_id = args.input_dir.name
+    instrumentation = Instrumentation("aggregate_raw_detections")
+    video_id = get_video_id(args.input_dir)
     if not re.match("P\d+_\d+", video_id):
         print("Input directory name must be the video ID (e.g. P01_101)")
         sys.exit(1)
-    video_detections: List[FrameDetections] = [
-        load_frame_detections(path) for path in get_detection_paths(args.input_dir)
-    ]
-
-    fixup_detections(video_detections, video_id)
-    video_detections = sorted(video_detections, key=lambda det: det.frame_number)
+    if args.incremental and is_archive(args.input_dir):
+        print("--incremental is only supported for directories of frame files")
+        sys.exit(1)
+    # Frame files are read and their metadata fixed up together, in the worker
+    # processes when there are several, so both are timed as the load stage.
+    with instrumentation.stage("load") as stats:
+        if args.incremental:
+            manifest_path = args.manifest
+            if manifest_path is None:
+                manifest_path = get_default_manifest_path(args.output_pkl)
+            manifest, video_detections = aggregate_incrementally(
+                get_detection_paths(args.input_dir),
+                video_id,
+                args.output_pkl,
+                manifest_path,
+                n_workers=args.workers,
+                chunk_size=args.chunk_size,
+                stats=stats,
+            )
+        else:
+            manifest, video_detections = load_input_detections(
+                args.input_dir,
+                video_id,
+                n_workers=args.workers,
+                chunk_size=args.chunk_size,
+            )
+            _count_loaded_frames(stats, manifest)
     args.output_pkl.parent.mkdir(exist_ok=True, parents=True)
+    if args.incremental and manifest_path.exists():
+        # Don't leave a manifest describing the previous output if we're interrupted
+        # while writing the new one.
+        manifest_path.unlink()
     print(f"Saving detections to {args.output_pkl}")
-    save_video_detections(args.output_pkl, video_detections)
+    with instrumentation.stage("write") as stats:
+        save_detections_bytes(video_detections, args.output_pkl)
+        stats.frames += len(video_detections)
+        stats.bytes_written += args.output_pkl.stat().st_size
+    if args.incremental:
+        save_manifest(manifest_path, video_id, manifest)
+    instrumentation.save(args.metrics, args.prometheus_metrics)
 
 
-def fixup_detections(video_detections: List[FrameDetections], video_id: str) -> None:
-    """Correct incorrect metadata in the detections"""
-    for frame_detections in video_detections:
-        # Video IDs were incorrectly set to the participant_id, so we need to
-        # override them here.
-        frame_detections.video_id = video_id
+@dataclass
+class ManifestEntry:
+    """Record of the frame file a frame's detections were read from"""
 
+    file: str
+    frame_number: int
+    mtime_ns: int
+    size: int
+    sha1: str
 
-def get_detection_paths(root_dir: Path) -> List[Path]:
-    def get_sort_key(p: Path) -> int:
-        return int(re.match(r".*?(\d+)\.pkl$", str(p)).group(1))
+    def is_unchanged(self, stat: os.stat_result) -> bool:
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
 
-    return sorted(
-        [child for child in root_dir.iterdir() if child.name.endswith(".pkl")],
-        key=get_sort_key,
+
+def get_default_manifest_path(output_pkl: Path) -> Path:
+    return output_pkl.with_suffix(".manifest.json")
+
+
+def load_manifest(p: Path, video_id: str) -> Optional[List[ManifestEntry]]:
+    """Load the manifest of a previous aggregation, or ``None`` if there isn't a
+    usable one. Entries are in the same order as the aggregated detections."""
+    try:
+        with open(p) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if manifest.get("video_id") != video_id:
+        return None
+    return [ManifestEntry(**entry) for entry in manifest["frames"]]
+
+
+def save_manifest(p: Path, video_id: str, entries: List[ManifestEntry]) -> None:
+    p.parent.mkdir(exist_ok=True, parents=True)
+    tmp_path = p.with_name(p.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(
+            {"video_id": video_id, "frames": [asdict(entry) for entry in entries]}, f
+        )
+    os.replace(tmp_path, p)
+
+
+def aggregate_incrementally(
+    paths: List[Path],
+    video_id: str,
+    output_pkl: Path,
+    manifest_path: Path,
+    n_workers: int = 1,
+    chunk_size: int = 256,
+    stats: Optional[StageStats] = None,
+) -> Tuple[List[ManifestEntry], List[bytes]]:
+    """Patch a previous aggregation, only loading frame files that are new or whose
+    size or modification time differ from those recorded in the manifest. Falls back
+    to loading every frame if there is no usable previous aggregation.
+
+    Args:
+        stats: Stats to count the frames loaded from frame files and the bytes
+            read, including the previous output, in. Reused frames aren't counted.
+
+    Returns:
+        The manifest entries and serialized detections, sorted by frame number.
+    """
+    previous_entries = load_manifest(manifest_path, video_id)
+    previous_detections: List[bytes] = []
+    if previous_entries is not None and output_pkl.exists():
+        with open(output_pkl, "rb") as f:
+            previous_detections = pickle.load(f)
+        if stats is not None:
+            stats.bytes_read += output_pkl.stat().st_size
+    if previous_entries is None or len(previous_entries) != len(previous_detections):
+        print("No usable manifest found, aggregating all frames")
+        entries, detections = load_video_detections(
+            paths, video_id, n_workers, chunk_size
+        )
+        _count_loaded_frames(stats, entries)
+        return entries, detections
+
+    previous: Dict[str, Tuple[ManifestEntry, bytes]] = {
+        entry.file: (entry, pb_str)
+        for entry, pb_str in zip(previous_entries, previous_detections)
+    }
+    frames: List[Tuple[ManifestEntry, bytes]] = []
+    changed_paths = []
+    for path in paths:
+        previous_frame = previous.get(path.name)
+        if previous_frame is not None and previous_frame[0].is_unchanged(path.stat()):
+            frames.append(previous_frame)
+        else:
+            changed_paths.append(path)
+    loaded_frames = _load_frames(changed_paths, video_id, n_workers, chunk_size)
+    _count_loaded_frames(stats, [entry for entry, _ in loaded_frames])
+    n_identical = sum(
+        1
+        for entry, _ in loaded_frames
+        if entry.file in previous and previous[entry.file][0].sha1 == entry.sha1
+    )
+    n_removed = len(set(previous) - {path.name for path in paths})
+    print(
+        f"Reused {len(frames)} unchanged frames, loaded {len(loaded_frames)} new or "
+        f"modified frames ({n_identical} with unchanged contents), dropped "
+        f"{n_removed} removed frames"
+    )
+    frames.extend(loaded_frames)
+    return _sort_frames(frames)
+
+
+def load_video_detections(
+    paths: List[Path], video_id: str, n_workers: int = 1, chunk_size: int = 256
+) -> Tuple[List[ManifestEntry], List[bytes]]:
+    """Load the serialized detections of each frame, fixing up their metadata.
+
+    Returns:
+        The manifest entries and serialized detections, sorted by frame number.
+    """
+    return _sort_frames(_load_frames(paths, video_id, n_workers, chunk_size))
+
+
+def _load_frames(
+    paths: List[Path], video_id: str, n_workers: int, chunk_size: int
+) -> List[Tuple[ManifestEntry, bytes]]:
+    load = functools.partial(load_fixed_up_frame_detections, video_id=video_id)
+    if n_workers > 1 and len(paths) > 1:
+        with Pool(n_workers) as pool:
+            return pool.map(load, paths, chunksize=chunk_size)
+    return list(map(load, paths))
+
+
+def _count_loaded_frames(
+    stats: Optional[StageStats], entries: List[ManifestEntry]
+) -> None:
+    if stats is not None:
+        stats.frames += len(entries)
+        stats.bytes_read += sum(entry.size for entry in entries)
+
+
+def _sort_frames(
+    frames: List[Tuple[ManifestEntry, bytes]]
+) -> Tuple[List[ManifestEntry], List[bytes]]:
+    frames = sorted(frames, key=lambda frame: frame[0].frame_number)
+    return [entry for entry, _ in frames], [pb_str for _, pb_str in frames]
+
+
+def load_archive_video_detections(
+    archive_path: Path, video_id: str
+) -> Tuple[List[ManifestEntry], List[bytes]]:
+    """Load the serialized detections of each frame from a per-video tar/zip
+    archive, reading it in a single sequential pass.
+
+    Returns:
+        The manifest entries and serialized detections, sorted by frame number.
+    """
+    return _sort_frames(
+        [
+            _fix_up_frame(name, data, video_id, mtime_ns=0)
+            for name, data in iter_archive_members(archive_path)
+        ]
     )
 
 
-def load_frame_detections(p: Path) -> Any:
+def load_fixed_up_frame_detections(
+    p: Path, video_id: str
+) -> Tuple[ManifestEntry, bytes]:
     with open(p, "rb") as f:
-        return FrameDetections.from_protobuf_str(pickle.load(f))
+        data = f.read()
+    return _fix_up_frame(p.name, data, video_id, mtime_ns=p.stat().st_mtime_ns)
 
 
-def save_video_detections(p: Path, video_detections: List[FrameDetections]) -> None:
-    with open(p, "wb") as f:
-        pickle.dump(
-            [det.to_protobuf().SerializeToString() for det in video_detections], f
-        )
+def _fix_up_frame(
+    name: str, data: bytes, video_id: str, mtime_ns: int
+) -> Tuple[ManifestEntry, bytes]:
+    pb_str = fixup_detections(pickle.loads(data), video_id)
+    entry = ManifestEntry(
+        file=name,
+        frame_number=read_frame_number(pb_str),
+        mtime_ns=mtime_ns,
+        size=len(data),
+        sha1=hashlib.sha1(data).hexdigest(),
+    )
+    return entry, pb_str
+
+
+def fixup_detections(pb_str: bytes, video_id: str) -> bytes:
+    """Correct incorrect metadata in serialized detections"""
+    # Video IDs were incorrectly set to the participant_id, so we need to
+    # override them here. This is patched in the serialized message so the hand
+    # and object detections don't need decoding and re-encoding.
+    return set_video_id(pb_str, video_id)
+
+
+def load_input_detections(
+    input_path: Path, video_id: str, n_workers: int = 1, chunk_size: int = 256
+) -> Tuple[List[ManifestEntry], List[bytes]]:
+    """Load the serialized detections of each frame from either a directory or an
+    archive of per-frame detections.
+
+    Returns:
+        The manifest entries and serialized detections, sorted by frame number.
+    """
+    if is_archive(input_path):
+        return load_archive_video_detections(input_path, video_id)
+    return load_video_detections(
+        get_detection_paths(input_path), video_id, n_workers, chunk_size
+    )
+
+
+def get_detection_paths(root_dir: Path) -> List[Path]:
+    return sorted(
+        [child for child in root_dir.iterdir() if child.name.endswith(".pkl")],
+        key=lambda p: get_frame_sort_key(p.name),
+    )
 
 
 if __name__ == "__main__":
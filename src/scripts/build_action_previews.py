@@ -0,0 +1,122 @@
+import argparse
+import csv
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import PIL.Image
+
+from epic_kitchens.hoa import FrameDetections
+from epic_kitchens.hoa.io import load_detections
+from epic_kitchens.hoa.previews import PreviewBuilder
+
+
+parser = argparse.ArgumentParser(
+    description="Build animated detection previews for every action segment in an "
+    "annotations CSV",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "annotations_csv",
+    type=Path,
+    help="CSV with narration_id, participant_id, video_id, start_frame and "
+    "stop_frame columns, e.g. EPIC_100_train.csv",
+)
+parser.add_argument(
+    "detections_root",
+    type=Path,
+    help="Directory containing detections laid out as {participant_id}/{video_id}.pkl",
+)
+parser.add_argument(
+    "frames_root",
+    type=Path,
+    help="Directory containing frames laid out as "
+    "{participant_id}/{video_id}/frame_{frame_number:010d}.jpg",
+)
+parser.add_argument("output_dir", type=Path, help="Directory to write previews to")
+parser.add_argument("--fps", type=float, default=5, help="Frame rate of previews")
+parser.add_argument(
+    "--source-fps", type=float, default=50, help="Frame rate frames were extracted at"
+)
+parser.add_argument("--width", type=int, default=228, help="Width of previews")
+parser.add_argument("--height", type=int, default=128, help="Height of previews")
+parser.add_argument(
+    "--format", choices=["gif", "webp"], default="gif", help="Animation format"
+)
+parser.add_argument(
+    "--workers", type=int, default=None, help="Number of worker processes"
+)
+parser.add_argument(
+    "--chunk-size",
+    type=int,
+    default=16,
+    help="Number of consecutive segments handed to a worker at once. Segments are "
+    "sorted by video so larger chunks mean fewer detection reloads.",
+)
+
+
+class LazyFrameLoader:
+    def __init__(self, path: Path, frame_template: str = "frame_{:010d}.jpg"):
+        self.path = path
+        self.frame_template = frame_template
+
+    def __getitem__(self, idx: int) -> PIL.Image.Image:
+        return PIL.Image.open(str(self.path / self.frame_template.format(idx + 1)))
+
+
+def main(args):
+    with open(args.annotations_csv, newline="") as f:
+        segments = sorted(
+            csv.DictReader(f), key=lambda s: (s["video_id"], int(s["start_frame"]))
+        )
+    builder = PreviewBuilder(
+        fps=args.fps, source_fps=args.source_fps, size=(args.width, args.height)
+    )
+    build = functools.partial(
+        build_segment_preview,
+        builder=builder,
+        detections_root=args.detections_root,
+        frames_root=args.frames_root,
+        output_dir=args.output_dir,
+        extension=args.format,
+    )
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for path in pool.map(build, segments, chunksize=args.chunk_size):
+            print(f"Saved preview to {path}")
+
+
+@functools.lru_cache(maxsize=2)
+def load_video_detections(path: Path) -> List[FrameDetections]:
+    return load_detections(path)
+
+
+def build_segment_preview(
+    segment: Dict[str, str],
+    builder: PreviewBuilder,
+    detections_root: Path,
+    frames_root: Path,
+    output_dir: Path,
+    extension: str,
+) -> Path:
+    participant_id = segment["participant_id"]
+    video_id = segment["video_id"]
+    detections = load_video_detections(
+        detections_root / participant_id / (video_id + ".pkl")
+    )
+    frames = LazyFrameLoader(frames_root / participant_id / video_id)
+    preview = builder.build(
+        frames,
+        detections,
+        start_frame=int(segment["start_frame"]),
+        stop_frame=int(segment["stop_frame"]),
+    )
+    path = output_dir / participant_id / video_id / (
+        f"{segment['narration_id']}.{extension}"
+    )
+    builder.save(preview, path)
+    return path
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
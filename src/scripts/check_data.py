@@ -1,117 +1,454 @@
 import argparse
+import json
+import os.path
+import pickle
+import sys
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from epic_kitchens.hoa.types import BBox, FloatVector, HandSide, HandState
+import numpy as np
 
-from epic_kitchens.hoa import FrameDetections, HandDetection, ObjectDetection
-
-from epic_kitchens.hoa.io import load_detections
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # isort:skip
+sys.path.insert(0, project_root)  # isort:skip
 
+from epic_kitchens.hoa import FrameDetections
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from epic_kitchens.hoa.io import load_detection_arrays
+from epic_kitchens.hoa.types import HandSide, HandState
+from pipeline.instrumentation import Instrumentation, add_instrumentation_arguments
+from pipeline.videos import is_video_id, load_frame_counts
 
 parser = argparse.ArgumentParser(
-    description="Sanity check hand-object detections",
+    description="Sanity check hand-object detections of a single video, or of every "
+    "video in a directory of processed detections",
     formatter_class=argparse.ArgumentDefaultsHelpFormatter,
 )
 parser.add_argument(
-    "detections_pkl", type=Path, help="Path to hand-object detections pkl."
+    "detections_pkl",
+    type=Path,
+    help="Path to hand-object detections pkl, or to a directory of detections laid "
+    "out as {participant_id}/{video_id}.pkl to check the whole dataset",
 )
 parser.add_argument(
     "-n", "--n-frames", type=int, help="Expected number of frames in video"
 )
+parser.add_argument(
+    "--max-samples",
+    type=int,
+    default=5,
+    help="Number of example frames to report for each failed check",
+)
+parser.add_argument(
+    "--frame-counts",
+    type=Path,
+    default=Path("EPIC_100_frame_counts.csv"),
+    help="CSV of frame counts per video, used when checking a directory",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=None,
+    help="Number of processes to check videos with when checking a directory",
+)
+parser.add_argument(
+    "--report", type=Path, help="Path to write the check report to as JSON"
+)
+add_instrumentation_arguments(parser)
+
+
+@dataclass
+class CheckFailure:
+    """A check that failed for some detections of a video"""
+
+    #: Name of the check, e.g. ``hand_score_range``
+    check: str
+    #: Description of what was expected
+    message: str
+    #: Number of frames/detections failing the check
+    count: int
+    #: Frame numbers of the first few failing frames/detections
+    sample_frames: List[int] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        description = f"{self.check}: {self.message} ({self.count} failures"
+        if self.sample_frames:
+            description += ", e.g. in frames " + ", ".join(
+                map(str, self.sample_frames)
+            )
+        return description + ")"
+
+
+@dataclass
+class CheckReport:
+    """The outcome of checking all the detections of a video"""
+
+    video_id: str
+    n_frames: int
+    n_hands: int
+    n_objects: int
+    failures: List[CheckFailure] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return len(self.failures) == 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def __str__(self) -> str:
+        summary = (
+            f"{self.video_id}: {self.n_frames} frames, {self.n_hands} hands, "
+            f"{self.n_objects} objects, "
+        )
+        if self.ok:
+            return summary + "all checks passed"
+        return "\n  ".join(
+            [summary + f"{len(self.failures)} checks failed"]
+            + [str(failure) for failure in self.failures]
+        )
 
 
 class DetectionChecker:
-    def __init__(self, n_frames: Optional[int]):
+    """Checks a whole video's detections at once in columnar form, collecting every
+    violation rather than stopping at the first.
+
+    Args:
+        n_frames: Expected number of frames in the video, if known. Frame numbers
+            are then expected to be between 1 and ``n_frames``.
+        max_samples: Number of example frames to report for each failed check.
+    """
+
+    def __init__(self, n_frames: Optional[int], max_samples: int = 5):
         self.n_frames = n_frames
+        self.max_samples = max_samples
 
-    def check(self, video_detections: List[FrameDetections]) -> None:
-        if self.n_frames is not None:
-            if len(video_detections) != self.n_frames:
-                raise ValueError(
-                    f"Expected video_detections to contain {self.n_frames} "
-                    f"detections, but contained {len(video_detections)}."
-                )
-        for frame_detections in video_detections:
-            self.check_frame_detections(frame_detections)
+    def check(
+        self, video_detections: Union[List[FrameDetections], VideoDetectionArrays]
+    ) -> CheckReport:
+        """Check the detections, raising if any check fails.
+
+        Raises:
+            ValueError: If any check fails, describing every failure.
+        """
+        report = self.validate(video_detections)
+        if not report.ok:
+            raise ValueError(str(report))
+        return report
+
+    def validate(
+        self, video_detections: Union[List[FrameDetections], VideoDetectionArrays]
+    ) -> CheckReport:
+        """Check the detections, reporting every failed check.
+
+        Args:
+            video_detections: A video's detections, either per frame or in columnar
+                form.
+
+        Returns:
+            A report listing each failed check with the number of failures and
+            example frames.
+        """
+        if isinstance(video_detections, VideoDetectionArrays):
+            arrays = video_detections
+        else:
+            arrays = VideoDetectionArrays.from_frame_detections(video_detections)
+        report = CheckReport(
+            video_id=arrays.video_id,
+            n_frames=arrays.n_frames,
+            n_hands=arrays.n_hands,
+            n_objects=arrays.n_objects,
+        )
+        frame_numbers = arrays.frame_numbers
+        hand_frame_numbers = frame_numbers[arrays.hand_frame_idxs]
+        object_frame_numbers = frame_numbers[arrays.object_frame_idxs]
 
-    def check_frame_detections(self, frame_detections: FrameDetections) -> None:
         if self.n_frames is not None:
-            if not (1 <= frame_detections.frame_number <= self.n_frames):
-                raise ValueError(
-                    "Expected frame_detections to have frame_number "
-                    f"between 1 and {self.n_frames}, but was "
-                    f"{frame_detections.frame_number}"
+            if arrays.n_frames != self.n_frames:
+                report.failures.append(
+                    CheckFailure(
+                        "frame_count",
+                        f"expected {self.n_frames} frames of detections, but got "
+                        f"{arrays.n_frames}",
+                        count=abs(arrays.n_frames - self.n_frames),
+                    )
                 )
-        for obj in frame_detections.objects:
-            self.check_object_detection(obj)
-
-        for hand in frame_detections.hands:
-            self.check_hand_detection(hand)
-
-    def check_object_detection(self, object_detection: ObjectDetection) -> None:
-        self.check_bbox(object_detection.bbox)
-        self.check_score(object_detection.score)
-
-    def check_hand_detection(self, hand_detection: HandDetection) -> None:
-        self.check_bbox(hand_detection.bbox)
-        self.check_score(hand_detection.score)
-        self.check_vector(hand_detection.object_offset)
-        if not isinstance(hand_detection.side, HandSide):
-            raise ValueError(
-                f"Expected hand side to be an instance of HandSide but "
-                f"was {hand_detection.side}"
+            self._add_failure(
+                report,
+                "frame_number_range",
+                f"frame numbers should be between 1 and {self.n_frames}",
+                ~_in_range(frame_numbers, 1, self.n_frames),
+                frame_numbers,
             )
-        if not isinstance(hand_detection.state, HandState):
-            raise ValueError(
-                f"Expected hand state to be an instance of HandState but "
-                f"was {hand_detection.state}"
-            )
-
-    def check_score(self, score: float) -> None:
-        if not (0 <= score <= 1):
-            raise ValueError(f"Expected score to be between 0--1 but was {score}")
+        unique_frame_numbers, counts = np.unique(frame_numbers, return_counts=True)
+        duplicated = unique_frame_numbers[counts > 1]
+        self._add_failure(
+            report,
+            "duplicate_frame_numbers",
+            "frame numbers should be unique",
+            np.isin(frame_numbers, duplicated),
+            frame_numbers,
+        )
 
-    def check_bbox(self, bbox: BBox) -> None:
-
-        for coord in [
-            "top_left_x",
-            "top",
-            "right",
-            "bottom",
+        for kind, bboxes, scores, row_frame_numbers in [
+            ("hand", arrays.hand_bboxes, arrays.hand_scores, hand_frame_numbers),
+            (
+                "object",
+                arrays.object_bboxes,
+                arrays.object_scores,
+                object_frame_numbers,
+            ),
         ]:
-            value = getattr(bbox, coord)
-            if not (0 <= value <= 1):
-                raise ValueError(f"Expected bbox {coord} ({value}) to be between 0--1.")
-
-        if not (bbox.left <= bbox.right):
-            raise ValueError(
-                f"Expected bbox top_left_x ({bbox.left}) to be "
-                f"less than or equal to right ({bbox.right}"
+            self._add_failure(
+                report,
+                f"{kind}_bbox_range",
+                "bbox coordinates should be between 0--1",
+                ~_in_range(bboxes, 0, 1).all(axis=1),
+                row_frame_numbers,
+            )
+            self._add_failure(
+                report,
+                f"{kind}_bbox_left_right",
+                "bbox left should be less than or equal to right",
+                ~(bboxes[:, 0] <= bboxes[:, 2]),
+                row_frame_numbers,
+            )
+            self._add_failure(
+                report,
+                f"{kind}_bbox_top_bottom",
+                "bbox top should be less than or equal to bottom",
+                ~(bboxes[:, 1] <= bboxes[:, 3]),
+                row_frame_numbers,
+            )
+            self._add_failure(
+                report,
+                f"{kind}_score_range",
+                "scores should be between 0--1",
+                ~_in_range(scores, 0, 1),
+                row_frame_numbers,
             )
 
-        if not (bbox.top <= bbox.bottom):
-            raise ValueError(
-                f"Expected bbox top ({bbox.top}) to be "
-                f"less than or equal to bottom ({bbox.bottom}"
+        self._add_failure(
+            report,
+            "hand_offset_range",
+            "offset components should be between -1 -- 1",
+            ~_in_range(arrays.hand_offsets, -1, 1).all(axis=1),
+            hand_frame_numbers,
+        )
+        for name, values, enum in [
+            ("hand_side", arrays.hand_sides, HandSide),
+            ("hand_state", arrays.hand_states, HandState),
+        ]:
+            self._add_failure(
+                report,
+                f"{name}_enum",
+                f"values should be a valid {enum.__name__}",
+                ~np.isin(values, [member.value for member in enum]),
+                hand_frame_numbers,
             )
+        return report
 
-    def check_vector(self, vector: FloatVector) -> None:
-        if not (-1 <= vector.x <= 1):
-            raise ValueError(
-                f"Expected vector x component to be between -1 -- 1 but was {vector.x}"
+    def _add_failure(
+        self,
+        report: CheckReport,
+        check: str,
+        message: str,
+        failed: np.ndarray,
+        row_frame_numbers: np.ndarray,
+    ) -> None:
+        count = int(np.count_nonzero(failed))
+        if count == 0:
+            return
+        sample_frames = np.unique(row_frame_numbers[failed])[: self.max_samples]
+        report.failures.append(
+            CheckFailure(check, message, count, sample_frames.tolist())
+        )
+
+
+@dataclass
+class DatasetReport:
+    """The outcome of checking every video of the dataset"""
+
+    n_videos: int
+    #: Total number of frames of detections checked
+    n_frames: int = 0
+    #: Videos in the frame counts without any detections
+    missing_video_ids: List[str] = field(default_factory=list)
+    #: Videos with detections that aren't in the frame counts
+    unexpected_video_ids: List[str] = field(default_factory=list)
+    #: ``(expected, actual)`` number of frames of videos with the wrong frame count
+    frame_count_mismatches: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    #: Total number of failures of each check across every video
+    failure_counts: Dict[str, int] = field(default_factory=dict)
+    #: Videos failing each check
+    failed_video_ids: Dict[str, List[str]] = field(default_factory=dict)
+    #: Tracebacks of videos whose detections couldn't be loaded
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not (
+            self.missing_video_ids
+            or self.unexpected_video_ids
+            or self.failure_counts
+            or self.errors
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def __str__(self) -> str:
+        lines = [f"Checked {self.n_videos} videos ({self.n_frames} frames)"]
+        if self.ok:
+            return lines[0] + ", all checks passed"
+        if self.missing_video_ids:
+            lines.append(
+                f"{len(self.missing_video_ids)} videos missing: "
+                + _format_video_ids(self.missing_video_ids)
+            )
+        if self.unexpected_video_ids:
+            lines.append(
+                f"{len(self.unexpected_video_ids)} videos without frame counts: "
+                + _format_video_ids(self.unexpected_video_ids)
             )
-        if not (-1 <= vector.y <= 1):
-            raise ValueError(
-                    f"Expected vector y component to be between -1 -- 1 but was"
-                    f" {vector.y}"
+        for video_id, (expected, actual) in self.frame_count_mismatches.items():
+            lines.append(f"{video_id}: expected {expected} frames, but got {actual}")
+        for check, count in self.failure_counts.items():
+            video_ids = self.failed_video_ids[check]
+            lines.append(
+                f"{check}: {count} failures in {len(video_ids)} videos: "
+                + _format_video_ids(video_ids)
             )
+        for video_id, error in self.errors.items():
+            lines.append(f"{video_id} could not be checked:\n{error}")
+        return "\n".join(lines)
+
+
+def _format_video_ids(video_ids: List[str], limit: int = 10) -> str:
+    formatted = ", ".join(video_ids[:limit])
+    if len(video_ids) > limit:
+        formatted += f", ... ({len(video_ids) - limit} more)"
+    return formatted
+
+
+def find_video_detections(processed_dir: Path) -> Dict[str, Path]:
+    """Find the detections of each video laid out as
+    ``{processed_dir}/{participant_id}/{video_id}.pkl``"""
+    return {
+        pkl.stem: pkl
+        for pkl in sorted(processed_dir.glob("P*/*.pkl"))
+        if is_video_id(pkl.stem)
+    }
+
+
+def check_dataset(
+    processed_dir: Path,
+    frame_counts: Dict[str, int],
+    n_workers: Optional[int] = None,
+    max_samples: int = 5,
+) -> DatasetReport:
+    """Check every video's detections in a pool of processes.
+
+    Args:
+        processed_dir: Directory of detections laid out as
+            ``{participant_id}/{video_id}.pkl``.
+        frame_counts: Expected number of frames of each video in the dataset.
+        n_workers: Number of processes to check videos with.
+        max_samples: Number of example frames to report for each failed check.
+
+    Returns:
+        A summary of the problems found across the whole dataset.
+    """
+    pkls = find_video_detections(processed_dir)
+    report = DatasetReport(
+        n_videos=len(pkls),
+        missing_video_ids=sorted(set(frame_counts) - set(pkls)),
+        unexpected_video_ids=sorted(set(pkls) - set(frame_counts)),
+    )
+    jobs = [
+        (pkl, frame_counts.get(video_id), max_samples)
+        for video_id, pkl in pkls.items()
+    ]
+    failure_counts = Counter()
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        for video_id, (video_report, error) in zip(
+            pkls, pool.map(_check_video, jobs, chunksize=4)
+        ):
+            if error is not None:
+                report.errors[video_id] = error
+                continue
+            report.n_frames += video_report.n_frames
+            for failure in video_report.failures:
+                failure_counts[failure.check] += failure.count
+                report.failed_video_ids.setdefault(failure.check, []).append(video_id)
+                if failure.check == "frame_count":
+                    report.frame_count_mismatches[video_id] = (
+                        frame_counts[video_id],
+                        video_report.n_frames,
+                    )
+    report.failure_counts = dict(sorted(failure_counts.items()))
+    report.failed_video_ids = dict(sorted(report.failed_video_ids.items()))
+    return report
+
+
+def _check_video(
+    job: Tuple[Path, Optional[int], int]
+) -> Tuple[Optional[CheckReport], Optional[str]]:
+    pkl, n_frames, max_samples = job
+    try:
+        detections = load_detection_arrays(pkl)
+    except Exception:
+        return None, traceback.format_exc()
+    checker = DetectionChecker(n_frames=n_frames, max_samples=max_samples)
+    return checker.validate(detections), None
+
+
+def _in_range(values: np.ndarray, low: float, high: float) -> np.ndarray:
+    # Written so that NaNs are out of range
+    return (values >= low) & (values <= high)
 
 
 def main(args):
-    detections: List[FrameDetections] = load_detections(args.detections_pkl)
-    checker = DetectionChecker(n_frames=args.n_frames)
-    checker.check(detections)
+    instrumentation = Instrumentation("check_data")
+    if args.detections_pkl.is_dir():
+        # Videos are loaded, decoded and checked in the worker processes
+        with instrumentation.stage("check") as stats:
+            report = check_dataset(
+                args.detections_pkl,
+                load_frame_counts(args.frame_counts),
+                n_workers=args.workers,
+                max_samples=args.max_samples,
+            )
+            stats.frames += report.n_frames
+            stats.bytes_read += sum(
+                pkl.stat().st_size
+                for pkl in find_video_detections(args.detections_pkl).values()
+            )
+    else:
+        with instrumentation.stage("load") as stats:
+            with open(args.detections_pkl, "rb") as f:
+                pb_strs = pickle.load(f)
+            stats.frames += len(pb_strs)
+            stats.bytes_read += args.detections_pkl.stat().st_size
+        with instrumentation.stage("decode") as stats:
+            detections = VideoDetectionArrays.from_protobuf_strs(pb_strs)
+            stats.frames += detections.n_frames
+        checker = DetectionChecker(
+            n_frames=args.n_frames, max_samples=args.max_samples
+        )
+        with instrumentation.stage("check") as stats:
+            report = checker.validate(detections)
+            stats.frames += detections.n_frames
+    instrumentation.save(args.metrics, args.prometheus_metrics)
+    print(report)
+    if args.report is not None:
+        with open(args.report, "w") as f:
+            json.dump(report.to_dict(), f, indent=2)
+    if not report.ok:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
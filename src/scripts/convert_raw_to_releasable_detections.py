@@ -11,6 +11,7 @@ sys.path.insert(0, os.path.join(project_root, 'public_lib'))  # isort:skip
 
 import numpy as np
 
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
 from epic_kitchens.hoa.types import BBox as ReleasableBBox
 from epic_kitchens.hoa.types import FloatVector
 from epic_kitchens.hoa.types import FrameDetections as ReleasableFrameDetections
@@ -18,6 +19,9 @@ from epic_kitchens.hoa.types import HandDetection as ReleasableHandDetection
 from epic_kitchens.hoa.types import HandSide as ReleasableHandSide
 from epic_kitchens.hoa.types import HandState as ReleasableHandState
 from epic_kitchens.hoa.types import ObjectDetection as ReleasableObjectDetection
+from pipeline.instrumentation import Instrumentation, add_instrumentation_arguments
+from raw_detections.columnar import RawVideoDetectionArrays
+from raw_detections.io import save_detections_bytes
 from raw_detections.types import BBox as RawBBox
 from raw_detections.types import FrameDetections as RawFrameDetections
 from raw_detections.types import HandDetection as RawHandDetection
@@ -49,17 +53,35 @@ parser.add_argument(
 parser.add_argument(
     "--frame-width", type=int, default=456, help="Width of frame detector was run on"
 )
+add_instrumentation_arguments(parser)
 
 
 def main(args):
-    raw_video_annotations = load_raw_video_detections(args.raw_video_annotations_pkl)
-    converter = Converter(frame_height=args.frame_height, frame_width=args.frame_width)
-    releasable_video_annotations = converter.convert_video_annotations(
-        raw_video_annotations
-    )
-    save_releasable_video_detections(
-        args.releasable_video_annotations_pkl, releasable_video_annotations
+    instrumentation = Instrumentation("convert_raw_to_releasable_detections")
+    with instrumentation.stage("load") as stats:
+        with open(args.raw_video_annotations_pkl, "rb") as f:
+            raw_pb_strs = pickle.load(f)
+        stats.frames += len(raw_pb_strs)
+        stats.bytes_read += args.raw_video_annotations_pkl.stat().st_size
+    with instrumentation.stage("decode") as stats:
+        raw_video_annotations = RawVideoDetectionArrays.from_protobuf_strs(raw_pb_strs)
+        stats.frames += raw_video_annotations.n_frames
+    converter = VectorisedConverter(
+        frame_height=args.frame_height, frame_width=args.frame_width
     )
+    with instrumentation.stage("convert") as stats:
+        releasable_video_annotations = converter.convert_video_arrays(
+            raw_video_annotations
+        )
+        stats.frames += releasable_video_annotations.n_frames
+    with instrumentation.stage("encode") as stats:
+        releasable_pb_strs = releasable_video_annotations.to_protobuf_strs()
+        stats.frames += len(releasable_pb_strs)
+    with instrumentation.stage("write") as stats:
+        save_detections_bytes(releasable_pb_strs, args.releasable_video_annotations_pkl)
+        stats.frames += len(releasable_pb_strs)
+        stats.bytes_written += args.releasable_video_annotations_pkl.stat().st_size
+    instrumentation.save(args.metrics, args.prometheus_metrics)
 
 
 class Converter:
@@ -135,18 +157,62 @@ class Converter:
         return FloatVector(x=x, y=y)
 
 
-def load_raw_video_detections(p: Path) -> List[RawFrameDetections]:
-    with open(p, "rb") as f:
-        return [RawFrameDetections.from_protobuf_str(s) for s in pickle.load(f)]
+class VectorisedConverter:
+    """Equivalent of :class:`Converter` operating on a whole video's columnar
+    detections at once rather than detection by detection."""
+
+    def __init__(self, frame_height: int, frame_width: int):
+        self.frame_height = frame_height
+        self.frame_width = frame_width
 
+    def convert_video_arrays(
+        self, raw_video_arrays: RawVideoDetectionArrays
+    ) -> VideoDetectionArrays:
+        frame_size = np.array([self.frame_width, self.frame_height], dtype=np.float64)
+        return VideoDetectionArrays(
+            video_id=raw_video_arrays.video_id,
+            frame_numbers=raw_video_arrays.frame_numbers,
+            hand_frame_idxs=raw_video_arrays.hand_frame_idxs,
+            hand_bboxes=self.convert_bboxes(
+                raw_video_arrays.hand_top_lefts, raw_video_arrays.hand_sizes
+            ),
+            hand_scores=raw_video_arrays.hand_scores,
+            hand_states=raw_video_arrays.hand_states,
+            hand_sides=raw_video_arrays.hand_sides,
+            hand_offsets=np.clip(
+                raw_video_arrays.hand_offset_directions.astype(np.float64)
+                * raw_video_arrays.hand_offset_magnitudes[:, None]
+                / frame_size,
+                -1,
+                1,
+            ).astype(np.float32),
+            object_frame_idxs=raw_video_arrays.object_frame_idxs,
+            object_bboxes=self.convert_bboxes(
+                raw_video_arrays.object_top_lefts, raw_video_arrays.object_sizes
+            ),
+            object_scores=raw_video_arrays.object_scores,
+        )
 
-def save_releasable_video_detections(
-    p: Path, video_detections: List[ReleasableFrameDetections]
+    def convert_bboxes(self, top_lefts: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        """Convert ``(N, 2)`` pixel top-left coordinates and ``(N, 2)`` pixel
+        sizes into ``(N, 4)`` normalised ``(left, top, right, bottom)`` boxes clipped
+        to the frame."""
+        frame_size = np.array([self.frame_width, self.frame_height], dtype=np.float64)
+        top_lefts = top_lefts.astype(np.float64)
+        return np.clip(
+            np.concatenate(
+                [top_lefts / frame_size, (top_lefts + sizes) / frame_size], axis=1
+            ),
+            0,
+            1,
+        ).astype(np.float32)
+
+
+def save_releasable_video_detection_arrays(
+    p: Path, video_detections: VideoDetectionArrays
 ) -> None:
     with open(p, "wb") as f:
-        pickle.dump(
-            [det.to_protobuf().SerializeToString() for det in video_detections], f
-        )
+        pickle.dump(video_detections.to_protobuf_strs(), f)
 
 
 if __name__ == "__main__":
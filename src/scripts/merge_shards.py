@@ -0,0 +1,137 @@
+import argparse
+import os.path
+import shutil
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # isort:skip
+sys.path.insert(0, project_root)  # isort:skip
+
+from pipeline.sharding import load_shard_manifests
+from pipeline.videos import get_participant_id, load_frame_counts
+
+parser = argparse.ArgumentParser(
+    description="Check the outputs of a sharded run of run_pipeline.py cover every "
+    "video exactly once and optionally merge them into a single directory",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "shard_dirs",
+    type=Path,
+    nargs="+",
+    help="--processed-dir of each shard",
+)
+parser.add_argument(
+    "--output-dir",
+    type=Path,
+    help="If given and the shards are complete, move the per-video detections of "
+    "every shard here",
+)
+parser.add_argument(
+    "--frame-counts",
+    type=Path,
+    help="CSV of frame counts per video, if given every video listed must have been "
+    "produced",
+)
+
+
+def main(args):
+    expected_video_ids = None
+    if args.frame_counts is not None:
+        expected_video_ids = set(load_frame_counts(args.frame_counts))
+    producers = find_shard_outputs(args.shard_dirs)
+    problems = check_shard_outputs(args.shard_dirs, producers, expected_video_ids)
+    if problems:
+        for problem in problems:
+            print(problem)
+        sys.exit(1)
+    print(f"{len(producers)} videos produced by {len(args.shard_dirs)} shards")
+    if args.output_dir is not None:
+        for video_id, (shard_dir,) in sorted(producers.items()):
+            relative_pkl = get_relative_pkl(video_id)
+            output_pkl = args.output_dir / relative_pkl
+            output_pkl.parent.mkdir(exist_ok=True, parents=True)
+            shutil.move(str(shard_dir / relative_pkl), str(output_pkl))
+        print(f"Merged detections into {args.output_dir}")
+
+
+def get_relative_pkl(video_id: str) -> Path:
+    return Path(get_participant_id(video_id)) / (video_id + ".pkl")
+
+
+def find_shard_outputs(shard_dirs: List[Path]) -> Dict[str, List[Path]]:
+    """Find which shard directories contain detections for each video."""
+    producers = defaultdict(list)
+    for shard_dir in shard_dirs:
+        for pkl in shard_dir.glob("P*/P*_*.pkl"):
+            producers[pkl.stem].append(shard_dir)
+    return dict(producers)
+
+
+def check_shard_outputs(
+    shard_dirs: List[Path],
+    producers: Dict[str, List[Path]],
+    expected_video_ids=None,
+) -> List[str]:
+    """Check every video assigned to a shard was produced by exactly that shard.
+
+    Args:
+        shard_dirs: Output directories of the shards.
+        producers: Shard directories containing detections for each video, see
+            :func:`find_shard_outputs`.
+        expected_video_ids: If given, videos that must have been produced.
+
+    Returns:
+        A description of each problem found, empty if the shards are complete.
+    """
+    problems = []
+    assigned = {}
+    num_shards = set()
+    for shard_dir in shard_dirs:
+        manifests = load_shard_manifests(shard_dir)
+        if len(manifests) != 1:
+            problems.append(
+                f"Expected one shard manifest in {shard_dir}, but found "
+                f"{len(manifests)}"
+            )
+            continue
+        manifest = manifests[0]
+        num_shards.add(manifest["num_shards"])
+        for video_id in manifest["video_ids"]:
+            if video_id in assigned:
+                problems.append(
+                    f"{video_id} assigned to both {assigned[video_id]} and {shard_dir}"
+                )
+            assigned[video_id] = shard_dir
+    if len(num_shards) > 1:
+        problems.append(
+            f"Shards were run with different --num-shards: {sorted(num_shards)}"
+        )
+    elif num_shards and len(shard_dirs) != next(iter(num_shards)):
+        problems.append(
+            f"Expected {next(iter(num_shards))} shards, but got {len(shard_dirs)}"
+        )
+
+    for video_id, video_shard_dirs in sorted(producers.items()):
+        if len(video_shard_dirs) > 1:
+            problems.append(
+                f"{video_id} produced by several shards: "
+                + ", ".join(map(str, video_shard_dirs))
+            )
+        elif video_id in assigned and video_shard_dirs[0] != assigned[video_id]:
+            problems.append(
+                f"{video_id} produced by {video_shard_dirs[0]} but assigned to "
+                f"{assigned[video_id]}"
+            )
+    required_video_ids = set(assigned)
+    if expected_video_ids is not None:
+        required_video_ids |= expected_video_ids
+    for video_id in sorted(required_video_ids - set(producers)):
+        problems.append(f"{video_id} missing from every shard")
+    return problems
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
@@ -0,0 +1,62 @@
+import argparse
+import os.path
+import sys
+from pathlib import Path
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # isort:skip
+sys.path.insert(0, project_root)  # isort:skip
+
+from aggregate_raw_detections import get_detection_paths
+from pipeline.videos import get_participant_id, iter_video_dirs
+from raw_detections.archive import pack_frame_files
+
+parser = argparse.ArgumentParser(
+    description="Pack per-video directories of raw per-frame detections into one "
+    "archive per video, which aggregate_raw_detections.py can read in a single "
+    "sequential pass",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "raw_detection_root",
+    type=Path,
+    help="Directory containing raw detections laid out as "
+    "{participant_id}/{video_id}/*.pkl",
+)
+parser.add_argument(
+    "output_root",
+    type=Path,
+    help="Directory to write archives to, laid out as "
+    "{participant_id}/{video_id}{suffix}",
+)
+parser.add_argument(
+    "--format",
+    choices=["tar", "tar.gz", "zip"],
+    default="tar",
+    help="Archive format",
+)
+parser.add_argument(
+    "--overwrite", action="store_true", help="Repack videos that already have an archive"
+)
+
+
+def main(args):
+    for video_dir in iter_video_dirs(args.raw_detection_root):
+        if not video_dir.is_dir():
+            continue
+        video_id = video_dir.name
+        archive_path = (
+            args.output_root
+            / get_participant_id(video_id)
+            / f"{video_id}.{args.format}"
+        )
+        if archive_path.exists() and not args.overwrite:
+            print(f"Skipping {video_id}, {archive_path} already exists")
+            continue
+        paths = get_detection_paths(video_dir)
+        archive_path.parent.mkdir(exist_ok=True, parents=True)
+        pack_frame_files(paths, archive_path)
+        print(f"Packed {len(paths)} frames of {video_id} into {archive_path}")
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
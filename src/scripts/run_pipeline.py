@@ -0,0 +1,248 @@
+import argparse
+import os.path
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # isort:skip
+sys.path.insert(0, project_root)  # isort:skip
+sys.path.insert(0, os.path.join(project_root, "public_lib"))  # isort:skip
+
+from aggregate_and_convert_raw_detections import aggregate_and_convert
+from check_data import DetectionChecker
+from convert_raw_to_releasable_detections import (
+    VectorisedConverter,
+    save_releasable_video_detection_arrays,
+)
+from pipeline.checkpoint import Checkpoint
+from pipeline.sharding import select_shard, write_shard_manifest
+from pipeline.videos import (
+    get_participant_id,
+    get_video_id,
+    iter_video_dirs,
+    load_frame_counts,
+)
+
+parser = argparse.ArgumentParser(
+    description="Aggregate, convert and validate the raw detections of every video "
+    "in a pool of worker processes, resuming from a checkpoint of completed videos",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument(
+    "raw_detection_root",
+    type=Path,
+    help="Directory containing raw detections laid out as "
+    "{participant_id}/{video_id}/*.pkl",
+)
+parser.add_argument(
+    "--processed-dir",
+    type=Path,
+    default=Path("data/processed"),
+    help="Directory to write releasable per-video detections to",
+)
+parser.add_argument(
+    "--interim-dir",
+    type=Path,
+    help="If given, aggregated raw per-video detections are also written here",
+)
+parser.add_argument(
+    "--frame-counts",
+    type=Path,
+    default=Path("EPIC_100_frame_counts.csv"),
+    help="CSV of frame counts per video, used to schedule the longest videos first "
+    "and to validate detections",
+)
+parser.add_argument(
+    "--checkpoint",
+    type=Path,
+    help="File recording completed videos, defaults to .pipeline-checkpoint in "
+    "--processed-dir",
+)
+parser.add_argument(
+    "--workers", type=int, default=None, help="Number of worker processes"
+)
+parser.add_argument(
+    "--no-validate", action="store_true", help="Skip validating converted detections"
+)
+parser.add_argument(
+    "--shard-index",
+    type=int,
+    default=0,
+    help="Index of the shard of videos to process when splitting the dataset "
+    "across machines",
+)
+parser.add_argument(
+    "--num-shards",
+    type=int,
+    default=1,
+    help="Number of shards the dataset is split into, shards are balanced by total "
+    "frame count",
+)
+parser.add_argument(
+    "--frame-height", type=int, default=256, help="Height of frame detector was run on"
+)
+parser.add_argument(
+    "--frame-width", type=int, default=456, help="Width of frame detector was run on"
+)
+
+
+@dataclass
+class VideoJob:
+    video_dir: Path
+    processed_pkl: Path
+    interim_pkl: Optional[Path]
+    n_frames: Optional[int]
+
+    @property
+    def video_id(self) -> str:
+        return get_video_id(self.video_dir)
+
+
+@dataclass
+class VideoResult:
+    video_id: str
+    seconds: float
+    error: Optional[str] = None
+
+
+def main(args):
+    frame_counts = load_frame_counts(args.frame_counts)
+    checkpoint_path = args.checkpoint
+    if checkpoint_path is None:
+        checkpoint_path = args.processed_dir / ".pipeline-checkpoint"
+    checkpoint = Checkpoint(checkpoint_path)
+
+    video_dirs = {
+        get_video_id(video_dir): video_dir
+        for video_dir in iter_video_dirs(args.raw_detection_root)
+    }
+    video_ids = select_shard(
+        video_dirs, frame_counts, args.shard_index, args.num_shards
+    )
+    if args.num_shards > 1:
+        print(
+            f"Processing shard {args.shard_index + 1}/{args.num_shards}: "
+            f"{len(video_ids)} of {len(video_dirs)} videos"
+        )
+        write_shard_manifest(
+            args.processed_dir, args.shard_index, args.num_shards, video_ids
+        )
+    jobs = make_jobs(
+        [video_dirs[video_id] for video_id in video_ids],
+        frame_counts,
+        processed_dir=args.processed_dir,
+        interim_dir=args.interim_dir,
+    )
+    pending_jobs = [job for job in jobs if job.video_id not in checkpoint]
+    print(
+        f"{len(jobs)} videos found, {len(jobs) - len(pending_jobs)} already "
+        f"completed, {len(pending_jobs)} to process"
+    )
+    converter = VectorisedConverter(
+        frame_height=args.frame_height, frame_width=args.frame_width
+    )
+    failures = run_jobs(
+        pending_jobs,
+        converter,
+        checkpoint,
+        validate=not args.no_validate,
+        n_workers=args.workers,
+    )
+    if failures:
+        print(f"{len(failures)} videos failed:")
+        for result in failures:
+            print(f"{result.video_id}:\n{result.error}")
+        sys.exit(1)
+
+
+def make_jobs(
+    video_dirs,
+    frame_counts: Dict[str, int],
+    processed_dir: Path,
+    interim_dir: Optional[Path] = None,
+) -> List[VideoJob]:
+    """Create a job per video, longest videos first so that they don't end up
+    running alone at the end. Videos with unknown lengths go last."""
+    jobs = []
+    for video_dir in video_dirs:
+        video_id = get_video_id(video_dir)
+        relative_pkl = Path(get_participant_id(video_id)) / (video_id + ".pkl")
+        jobs.append(
+            VideoJob(
+                video_dir=video_dir,
+                processed_pkl=processed_dir / relative_pkl,
+                interim_pkl=None if interim_dir is None else interim_dir / relative_pkl,
+                n_frames=frame_counts.get(video_id),
+            )
+        )
+    jobs.sort(key=lambda job: -(job.n_frames or 0))
+    return jobs
+
+
+def run_jobs(
+    jobs: List[VideoJob],
+    converter: VectorisedConverter,
+    checkpoint: Checkpoint,
+    validate: bool = True,
+    n_workers: Optional[int] = None,
+) -> List[VideoResult]:
+    """Process jobs in a pool of long-lived worker processes, recording each
+    completed video in ``checkpoint``.
+
+    Returns:
+        The results of the jobs that failed.
+    """
+    failures = []
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = [
+            pool.submit(process_video, job, converter, validate) for job in jobs
+        ]
+        for i, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            if result.error is None:
+                checkpoint.record(result.video_id)
+                status = "done"
+            else:
+                failures.append(result)
+                status = "FAILED"
+            print(
+                f"[{i}/{len(jobs)}] {result.video_id} {status} in "
+                f"{result.seconds:.1f}s"
+            )
+    return failures
+
+
+def process_video(
+    job: VideoJob, converter: VectorisedConverter, validate: bool
+) -> VideoResult:
+    start = time.perf_counter()
+    try:
+        releasable_detections = aggregate_and_convert(
+            job.video_dir, converter, interim_pkl=job.interim_pkl
+        )
+        if validate:
+            checker = DetectionChecker(n_frames=job.n_frames)
+            checker.check(releasable_detections)
+        job.processed_pkl.parent.mkdir(exist_ok=True, parents=True)
+        # Write to a temporary file first so a crash never leaves a truncated
+        # output behind.
+        tmp_pkl = job.processed_pkl.with_name(job.processed_pkl.name + ".tmp")
+        try:
+            save_releasable_video_detection_arrays(tmp_pkl, releasable_detections)
+            os.replace(tmp_pkl, job.processed_pkl)
+        finally:
+            if tmp_pkl.exists():
+                tmp_pkl.unlink()
+    except Exception:
+        return VideoResult(
+            job.video_id, time.perf_counter() - start, error=traceback.format_exc()
+        )
+    return VideoResult(job.video_id, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
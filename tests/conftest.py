@@ -0,0 +1,9 @@
+import os.path
+import sys
+
+# The internal raw detection processing packages and pipeline scripts live alongside
+# the public library rather than being installed with it.
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+src_root = os.path.join(project_root, "src")
+sys.path.insert(0, src_root)
+sys.path.insert(0, os.path.join(src_root, "scripts"))
@@ -0,0 +1,61 @@
+import pytest
+
+import aggregate_and_convert_raw_detections
+import aggregate_raw_detections
+import convert_raw_to_releasable_detections
+from raw_detections.archive import pack_frame_files
+from test_aggregate_raw_detections import write_frame
+
+
+@pytest.fixture
+def video_dir(tmp_path):
+    video_dir = tmp_path / "raw" / "P01" / "P01_101"
+    video_dir.mkdir(parents=True)
+    for frame_number in range(1, 13):
+        write_frame(video_dir, frame_number)
+    return video_dir
+
+
+def run_script(module, *args):
+    module.main(module.parser.parse_args([str(arg) for arg in args]))
+
+
+def run_two_step(input_path, interim_pkl, processed_pkl):
+    run_script(aggregate_raw_detections, input_path, interim_pkl)
+    run_script(convert_raw_to_releasable_detections, interim_pkl, processed_pkl)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_fused_outputs_match_two_step_outputs(tmp_path, video_dir, workers):
+    run_two_step(video_dir, tmp_path / "interim.pkl", tmp_path / "processed.pkl")
+
+    run_script(
+        aggregate_and_convert_raw_detections,
+        video_dir,
+        tmp_path / "fused.pkl",
+        "--interim-pkl",
+        tmp_path / "fused-interim.pkl",
+        "--workers",
+        workers,
+    )
+
+    assert (tmp_path / "fused.pkl").read_bytes() == (
+        tmp_path / "processed.pkl"
+    ).read_bytes()
+    assert (tmp_path / "fused-interim.pkl").read_bytes() == (
+        tmp_path / "interim.pkl"
+    ).read_bytes()
+
+
+def test_fused_output_of_archive_matches_two_step_output(tmp_path, video_dir):
+    archive_path = tmp_path / "P01_101.tar"
+    pack_frame_files(sorted(video_dir.iterdir()), archive_path)
+    run_two_step(archive_path, tmp_path / "interim.pkl", tmp_path / "processed.pkl")
+
+    run_script(
+        aggregate_and_convert_raw_detections, archive_path, tmp_path / "fused.pkl"
+    )
+
+    assert (tmp_path / "fused.pkl").read_bytes() == (
+        tmp_path / "processed.pkl"
+    ).read_bytes()
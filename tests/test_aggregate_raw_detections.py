@@ -0,0 +1,152 @@
+import json
+import os
+import pickle
+
+import pytest
+
+import aggregate_raw_detections
+from aggregate_raw_detections import get_default_manifest_path, main, parser
+from raw_detections.wire import read_frame_number
+from test_raw_wire import make_raw_frame_detections
+
+
+def write_frame(video_dir, frame_number, video_id="P01"):
+    detections = make_raw_frame_detections(video_id, frame_number)
+    with open(video_dir / f"frame_{frame_number}.pkl", "wb") as f:
+        pickle.dump(detections.to_protobuf().SerializeToString(), f)
+
+
+@pytest.fixture
+def video_dir(tmp_path):
+    video_dir = tmp_path / "P01_101"
+    video_dir.mkdir()
+    for frame_number in [1, 2, 3, 10, 11]:
+        write_frame(video_dir, frame_number)
+    return video_dir
+
+
+def aggregate(video_dir, output_pkl, *args):
+    main(parser.parse_args([str(video_dir), str(output_pkl), *args]))
+    with open(output_pkl, "rb") as f:
+        return pickle.load(f)
+
+
+def test_incremental_load_stage_only_counts_loaded_frames(tmp_path, video_dir):
+    output_pkl = tmp_path / "P01_101.pkl"
+    metrics_path = tmp_path / "metrics.json"
+    aggregate(video_dir, output_pkl, "--incremental")
+    previous_size = output_pkl.stat().st_size
+    write_frame(video_dir, 12)
+
+    aggregate(video_dir, output_pkl, "--incremental", "--metrics", str(metrics_path))
+
+    with open(metrics_path) as f:
+        stages = {stats["name"]: stats for stats in json.load(f)["stages"]}
+    assert stages["load"]["frames"] == 1
+    assert stages["load"]["bytes_read"] == (
+        previous_size + (video_dir / "frame_12.pkl").stat().st_size
+    )
+
+
+@pytest.fixture
+def loaded_files(monkeypatch):
+    """Names of the frame files read by aggregation"""
+    loaded_files = []
+    load = aggregate_raw_detections.load_fixed_up_frame_detections
+
+    def recording_load(p, video_id):
+        loaded_files.append(p.name)
+        return load(p, video_id)
+
+    monkeypatch.setattr(
+        aggregate_raw_detections, "load_fixed_up_frame_detections", recording_load
+    )
+    return loaded_files
+
+
+def touch(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_incremental_aggregation_only_loads_changed_frames(
+    tmp_path, video_dir, loaded_files
+):
+    output_pkl = tmp_path / "P01_101.pkl"
+    aggregate(video_dir, output_pkl, "--incremental")
+    assert sorted(loaded_files) == sorted(p.name for p in video_dir.iterdir())
+    touch(video_dir / "frame_2.pkl")
+    write_frame(video_dir, 12)
+    (video_dir / "frame_10.pkl").unlink()
+    loaded_files.clear()
+
+    detections = aggregate(video_dir, output_pkl, "--incremental")
+
+    assert sorted(loaded_files) == ["frame_12.pkl", "frame_2.pkl"]
+    assert [read_frame_number(pb_str) for pb_str in detections] == [1, 2, 3, 11, 12]
+    assert detections == aggregate(video_dir, tmp_path / "full.pkl")
+    with open(get_default_manifest_path(output_pkl)) as f:
+        manifest = json.load(f)
+    assert [entry["frame_number"] for entry in manifest["frames"]] == [1, 2, 3, 11, 12]
+
+
+def test_incremental_aggregation_without_changes_loads_nothing(
+    tmp_path, video_dir, loaded_files
+):
+    output_pkl = tmp_path / "P01_101.pkl"
+    expected = aggregate(video_dir, output_pkl, "--incremental")
+    loaded_files.clear()
+
+    assert aggregate(video_dir, output_pkl, "--incremental") == expected
+    assert loaded_files == []
+
+
+def remove_manifest(output_pkl):
+    get_default_manifest_path(output_pkl).unlink()
+
+
+def use_other_video_manifest(output_pkl):
+    manifest_path = get_default_manifest_path(output_pkl)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest["video_id"] = "P01_102"
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+
+def remove_output(output_pkl):
+    output_pkl.unlink()
+
+
+def truncate_output(output_pkl):
+    with open(output_pkl, "rb") as f:
+        detections = pickle.load(f)
+    with open(output_pkl, "wb") as f:
+        pickle.dump(detections[:-1], f)
+
+
+@pytest.mark.parametrize(
+    "break_previous_aggregation",
+    [remove_manifest, use_other_video_manifest, remove_output, truncate_output],
+)
+def test_incremental_aggregation_falls_back_to_full_aggregation(
+    tmp_path, video_dir, loaded_files, break_previous_aggregation
+):
+    output_pkl = tmp_path / "P01_101.pkl"
+    expected = aggregate(video_dir, output_pkl, "--incremental")
+    break_previous_aggregation(output_pkl)
+    loaded_files.clear()
+
+    assert aggregate(video_dir, output_pkl, "--incremental") == expected
+    assert sorted(loaded_files) == sorted(p.name for p in video_dir.iterdir())
+    assert get_default_manifest_path(output_pkl).exists()
+
+
+def test_parallel_aggregation_matches_serial_aggregation(tmp_path, video_dir):
+    serial_pkl = tmp_path / "serial.pkl"
+    parallel_pkl = tmp_path / "parallel.pkl"
+    aggregate(video_dir, serial_pkl)
+
+    aggregate(video_dir, parallel_pkl, "--workers", "2", "--chunk-size", "2")
+
+    assert parallel_pkl.read_bytes() == serial_pkl.read_bytes()
@@ -0,0 +1,104 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from epic_kitchens.hoa.assignment import linear_sum_assignment, match_pairs
+
+
+def brute_force_assignment_cost(cost):
+    if cost.shape[0] > cost.shape[1]:
+        cost = cost.T
+    return min(
+        cost[np.arange(cost.shape[0]), list(cols)].sum()
+        for cols in itertools.permutations(range(cost.shape[1]), cost.shape[0])
+    )
+
+
+def sequential_greedy(rows, cols, costs):
+    matched = np.zeros(len(rows), dtype=bool)
+    used_rows, used_cols = set(), set()
+    for i in np.lexsort((cols, rows, costs)):
+        if rows[i] not in used_rows and cols[i] not in used_cols:
+            matched[i] = True
+            used_rows.add(rows[i])
+            used_cols.add(cols[i])
+    return matched
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (3, 3), (2, 5), (5, 2), (4, 4)])
+def test_linear_sum_assignment_is_optimal(shape):
+    rng = np.random.RandomState(0)
+    for _ in range(20):
+        # Rounding creates ties
+        cost = np.round(rng.uniform(0, 1, size=shape), 1)
+
+        rows, cols = linear_sum_assignment(cost)
+
+        assert len(rows) == min(shape)
+        assert len(set(cols)) == len(cols)
+        assert np.all(np.diff(rows) > 0)
+        assert cost[rows, cols].sum() == pytest.approx(
+            brute_force_assignment_cost(cost)
+        )
+        rows, cols = linear_sum_assignment(cost, maximize=True)
+        assert cost[rows, cols].sum() == pytest.approx(
+            -brute_force_assignment_cost(-cost)
+        )
+
+
+def test_linear_sum_assignment_infeasible():
+    with pytest.raises(ValueError):
+        linear_sum_assignment(np.array([[1, np.inf], [2, np.inf]]))
+
+
+def random_pairs(rng, n_groups=50, max_size=7):
+    groups, rows, cols = [], [], []
+    for group in range(n_groups):
+        n_rows, n_cols = rng.randint(1, max_size + 1, size=2)
+        for row, col in itertools.product(range(n_rows), range(n_cols)):
+            if rng.uniform() < 0.6:
+                groups.append(group)
+                rows.append(group * 100 + row)
+                cols.append(group * 100 + col)
+    costs = np.round(rng.uniform(0, 1, size=len(rows)), 2)
+    return np.array(groups), np.array(rows), np.array(cols), costs
+
+
+def test_greedy_matches_sequential_greedy():
+    groups, rows, cols, costs = random_pairs(np.random.RandomState(0))
+
+    matched = match_pairs(groups, rows, cols, costs, method="greedy")
+
+    np.testing.assert_array_equal(matched, sequential_greedy(rows, cols, costs))
+
+
+def test_optimal_matches_most_pairs_with_least_cost():
+    groups, rows, cols, costs = random_pairs(np.random.RandomState(1))
+
+    matched = match_pairs(groups, rows, cols, costs, method="optimal")
+    greedy = match_pairs(groups, rows, cols, costs, method="greedy")
+
+    for group in np.unique(groups):
+        in_group = groups == group
+        group_matched = matched[in_group]
+        assert len(set(rows[in_group][group_matched])) == group_matched.sum()
+        assert len(set(cols[in_group][group_matched])) == group_matched.sum()
+        # Compare to the optimal assignment over all pairs, forbidding
+        # non-candidates with a prohibitive cost
+        group_rows, local_rows = np.unique(rows[in_group], return_inverse=True)
+        group_cols, local_cols = np.unique(cols[in_group], return_inverse=True)
+        cost = np.full((len(group_rows), len(group_cols)), 1000.0)
+        cost[local_rows, local_cols] = costs[in_group]
+        expected_cost = brute_force_assignment_cost(cost) if cost.size <= 30 else None
+        n_forbidden = min(cost.shape) - group_matched.sum()
+        if expected_cost is not None:
+            assert costs[in_group][group_matched].sum() + 1000 * n_forbidden == (
+                pytest.approx(expected_cost)
+            )
+        assert group_matched.sum() >= greedy[in_group].sum()
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        match_pairs(np.zeros(1), np.zeros(1), np.zeros(1), np.zeros(1), "random")
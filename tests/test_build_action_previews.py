@@ -0,0 +1,90 @@
+import PIL.Image
+import pytest
+
+import build_action_previews
+from epic_kitchens.hoa.io import save_detections
+from test_aggregate_and_convert_raw_detections import run_script
+from test_visualisation import make_detections
+
+SEGMENTS = [
+    # narration_id, video_id, start_frame, stop_frame
+    ("P01_101_1", "P01_101", 21, 30),
+    ("P01_101_0", "P01_101", 1, 20),
+    ("P01_102_0", "P01_102", 5, 15),
+]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """Paths to an annotations CSV and the detections and frames of its videos"""
+    detections_root = tmp_path / "detections"
+    frames_root = tmp_path / "frames"
+    for video_id, n_frames in [("P01_101", 30), ("P01_102", 15)]:
+        detections = [make_detections(i) for i in range(1, n_frames + 1)]
+        for frame_detections in detections:
+            frame_detections.video_id = video_id
+        (detections_root / "P01").mkdir(parents=True, exist_ok=True)
+        save_detections(detections, detections_root / "P01" / f"{video_id}.pkl")
+        video_frames_dir = frames_root / "P01" / video_id
+        video_frames_dir.mkdir(parents=True)
+        for i in range(1, n_frames + 1):
+            PIL.Image.new("RGB", (96, 54), (i * 8, 0, 0)).save(
+                video_frames_dir / f"frame_{i:010d}.jpg"
+            )
+    annotations_csv = tmp_path / "annotations.csv"
+    annotations_csv.write_text(
+        "narration_id,participant_id,video_id,start_frame,stop_frame\n"
+        + "".join(f"{n},P01,{v},{start},{stop}\n" for n, v, start, stop in SEGMENTS)
+    )
+    return annotations_csv, detections_root, frames_root
+
+
+def test_builds_a_preview_per_segment(tmp_path, dataset, capsys):
+    output_dir = tmp_path / "previews"
+
+    run_script(
+        build_action_previews,
+        *dataset,
+        output_dir,
+        "--width",
+        40,
+        "--height",
+        20,
+        "--workers",
+        2,
+        "--chunk-size",
+        1,
+    )
+
+    assert capsys.readouterr().out.count("Saved preview to") == len(SEGMENTS)
+    for narration_id, video_id, start_frame, stop_frame in SEGMENTS:
+        path = output_dir / "P01" / video_id / f"{narration_id}.gif"
+        with PIL.Image.open(path) as gif:
+            # Sampled at 5 of the source 50 fps
+            assert gif.n_frames == (stop_frame - start_frame) // 10 + 1
+            assert gif.size == (40, 20)
+
+
+def test_segments_of_a_video_share_loaded_detections(tmp_path, dataset):
+    _, detections_root, frames_root = dataset
+    load_video_detections = build_action_previews.load_video_detections
+    load_video_detections.cache_clear()
+    builder = build_action_previews.PreviewBuilder(size=(40, 20))
+
+    for narration_id, video_id, start_frame, stop_frame in sorted(
+        SEGMENTS, key=lambda segment: segment[1]
+    ):
+        segment = {
+            "narration_id": narration_id,
+            "participant_id": "P01",
+            "video_id": video_id,
+            "start_frame": str(start_frame),
+            "stop_frame": str(stop_frame),
+        }
+        build_action_previews.build_segment_preview(
+            segment, builder, detections_root, frames_root, tmp_path, "gif"
+        )
+
+    cache_info = load_video_detections.cache_info()
+    assert (cache_info.hits, cache_info.misses) == (1, 2)
+    load_video_detections.cache_clear()
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from check_data import DetectionChecker, check_dataset
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from epic_kitchens.hoa.io import save_detections
+from test_columnar import random_video_detections
+
+
+def test_valid_detections_pass_every_check():
+    detections = random_video_detections(n_frames=50)
+
+    report = DetectionChecker(n_frames=50).check(detections)
+
+    assert report.ok
+    assert report.n_frames == 50
+
+
+def test_every_violation_is_reported():
+    arrays = VideoDetectionArrays.from_frame_detections(
+        random_video_detections(n_frames=50)
+    )
+    arrays.frame_numbers[3] = arrays.frame_numbers[2]
+    arrays.hand_bboxes[0, 0] = -0.1
+    arrays.hand_bboxes[1, [1, 3]] = [0.9, 0.2]
+    arrays.object_scores[[2, 5]] = [1.5, np.nan]
+    arrays.hand_offsets[4] = [0, 2]
+    arrays.hand_states[5] = 42
+
+    report = DetectionChecker(n_frames=60).validate(arrays)
+
+    failures = {failure.check: failure for failure in report.failures}
+    assert set(failures) == {
+        "frame_count",
+        "duplicate_frame_numbers",
+        "hand_bbox_range",
+        "hand_bbox_top_bottom",
+        "object_score_range",
+        "hand_offset_range",
+        "hand_state_enum",
+    }
+    assert failures["duplicate_frame_numbers"].count == 2
+    assert failures["duplicate_frame_numbers"].sample_frames == [3]
+    assert failures["object_score_range"].count == 2
+    expected_frame = arrays.frame_numbers[arrays.hand_frame_idxs[5]]
+    assert failures["hand_state_enum"].sample_frames == [expected_frame]
+
+
+def test_check_raises_on_failure():
+    detections = random_video_detections(n_frames=10)
+
+    with pytest.raises(ValueError, match="frame_number_range"):
+        DetectionChecker(n_frames=5).check(detections)
+
+
+def test_check_dataset_summarises_every_video(tmp_path):
+    for video_id, n_frames in [("P01_01", 10), ("P01_02", 12), ("P02_01", 5)]:
+        detections = random_video_detections(n_frames=n_frames)
+        for frame_detections in detections:
+            frame_detections.video_id = video_id
+        pkl = tmp_path / video_id.split("_")[0] / f"{video_id}.pkl"
+        pkl.parent.mkdir(exist_ok=True)
+        save_detections(detections, pkl)
+    frame_counts = {"P01_01": 10, "P01_02": 15, "P03_01": 20}
+
+    report = check_dataset(tmp_path, frame_counts, n_workers=2)
+
+    assert report.n_videos == 3
+    assert report.missing_video_ids == ["P03_01"]
+    assert report.unexpected_video_ids == ["P02_01"]
+    assert report.frame_count_mismatches == {"P01_02": (15, 12)}
+    assert report.failure_counts == {"frame_count": 3}
+    assert not report.ok
@@ -0,0 +1,162 @@
+import numpy as np
+import pytest
+from numpy.ma.testutils import assert_close
+
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from epic_kitchens.hoa.types import (
+    BBox,
+    FloatVector,
+    FrameDetections,
+    HandDetection,
+    HandSide,
+    HandState,
+    ObjectDetection,
+)
+
+
+def random_bbox(rng: np.random.RandomState) -> BBox:
+    left, right = sorted(rng.uniform(0, 1, size=2))
+    top, bottom = sorted(rng.uniform(0, 1, size=2))
+    return BBox(left, top, right, bottom)
+
+
+def random_video_detections(n_frames: int = 50, seed: int = 0):
+    rng = np.random.RandomState(seed)
+    return [
+        FrameDetections(
+            video_id="P01_101",
+            frame_number=frame_number,
+            hands=[
+                HandDetection(
+                    bbox=random_bbox(rng),
+                    score=rng.uniform(0, 1),
+                    state=HandState(rng.randint(len(HandState))),
+                    side=HandSide(rng.randint(len(HandSide))),
+                    object_offset=FloatVector(*rng.uniform(-0.5, 0.5, size=2)),
+                )
+                for _ in range(rng.randint(0, 3))
+            ],
+            objects=[
+                ObjectDetection(bbox=random_bbox(rng), score=rng.uniform(0, 1))
+                for _ in range(rng.randint(0, 6))
+            ],
+        )
+        for frame_number in range(1, n_frames + 1)
+    ]
+
+
+def test_frame_detections_round_trip():
+    detections = random_video_detections()
+
+    round_tripped = VideoDetectionArrays.from_frame_detections(
+        detections
+    ).to_frame_detections()
+
+    assert len(round_tripped) == len(detections)
+    for expected, actual in zip(detections, round_tripped):
+        assert expected.frame_number == actual.frame_number
+        assert len(expected.hands) == len(actual.hands)
+        assert len(expected.objects) == len(actual.objects)
+        for expected_hand, actual_hand in zip(expected.hands, actual.hands):
+            assert expected_hand.side == actual_hand.side
+            assert expected_hand.state == actual_hand.state
+            assert_close(expected_hand.bbox.left, actual_hand.bbox.left)
+            assert_close(expected_hand.object_offset.y, actual_hand.object_offset.y)
+
+
+def test_from_protobuf_strs_matches_from_frame_detections():
+    detections = random_video_detections()
+    pb_strs = [d.to_protobuf().SerializeToString() for d in detections]
+
+    expected = VideoDetectionArrays.from_frame_detections(detections)
+    actual = VideoDetectionArrays.from_protobuf_strs(pb_strs)
+
+    assert actual.video_id == expected.video_id
+    np.testing.assert_array_equal(actual.hand_frame_idxs, expected.hand_frame_idxs)
+    np.testing.assert_array_equal(actual.hand_states, expected.hand_states)
+    np.testing.assert_allclose(actual.object_bboxes, expected.object_bboxes)
+
+
+def test_batched_interactions_match_per_frame_interactions():
+    detections = random_video_detections(n_frames=200)
+    arrays = VideoDetectionArrays.from_frame_detections(detections)
+
+    matches = arrays.get_hand_object_interactions(
+        object_threshold=0.3, hand_threshold=0.2
+    )
+
+    hand_offsets = arrays.hand_frame_offsets
+    object_offsets = arrays.object_frame_offsets
+    for frame_idx, frame_detections in enumerate(detections):
+        expected = frame_detections.get_hand_object_interactions(
+            object_threshold=0.3, hand_threshold=0.2
+        )
+        frame_matches = matches[hand_offsets[frame_idx] : hand_offsets[frame_idx + 1]]
+        actual = {
+            hand_idx: object_row - object_offsets[frame_idx]
+            for hand_idx, object_row in enumerate(frame_matches)
+            if object_row >= 0
+        }
+        assert actual == expected
+
+
+@pytest.mark.parametrize("method", ["nearest", "optimal"])
+@pytest.mark.parametrize("max_distance", [None, 0.3])
+def test_batched_interaction_modes_match_per_frame_interactions(method, max_distance):
+    detections = random_video_detections(n_frames=200)
+    arrays = VideoDetectionArrays.from_frame_detections(detections)
+
+    matches = arrays.get_hand_object_interactions(
+        object_threshold=0.3, max_distance=max_distance, method=method
+    )
+
+    hand_offsets = arrays.hand_frame_offsets
+    object_offsets = arrays.object_frame_offsets
+    for frame_idx, frame_detections in enumerate(detections):
+        expected = frame_detections.get_hand_object_interactions(
+            object_threshold=0.3, max_distance=max_distance, method=method
+        )
+        frame_matches = matches[hand_offsets[frame_idx] : hand_offsets[frame_idx + 1]]
+        actual = {
+            hand_idx: object_row - object_offsets[frame_idx]
+            for hand_idx, object_row in enumerate(frame_matches)
+            if object_row >= 0
+        }
+        assert actual == expected
+
+
+def test_optimal_interactions_match_hands_to_distinct_objects():
+    hands = [
+        HandDetection(
+            bbox=BBox(0.1, 0.1, 0.2, 0.2),
+            score=0.9,
+            state=HandState.PORTABLE_OBJECT,
+            side=side,
+            object_offset=FloatVector(0.1, 0),
+        )
+        for side in HandSide
+    ]
+    objects = [
+        ObjectDetection(bbox=BBox(0.2, 0.1, 0.3, 0.2), score=0.9),
+        ObjectDetection(bbox=BBox(0.2, 0.3, 0.3, 0.4), score=0.9),
+        ObjectDetection(bbox=BBox(0.8, 0.8, 0.9, 0.9), score=0.9),
+    ]
+    frame_detections = FrameDetections("P01_101", 1, hands=hands, objects=objects)
+    arrays = VideoDetectionArrays.from_frame_detections([frame_detections])
+
+    assert frame_detections.get_hand_object_interactions() == {0: 0, 1: 0}
+    assert frame_detections.get_hand_object_interactions(method="optimal") == {
+        0: 0,
+        1: 1,
+    }
+    assert frame_detections.get_hand_object_interactions(
+        max_distance=0.1, method="optimal"
+    ) == {0: 0}
+    np.testing.assert_array_equal(
+        arrays.get_hand_object_interactions(method="optimal"), [0, 1]
+    )
+    np.testing.assert_array_equal(
+        arrays.get_hand_object_interactions(max_distance=0.1), [0, 0]
+    )
+    with pytest.raises(ValueError):
+        arrays.get_hand_object_interactions(method="hungarian")
@@ -0,0 +1,93 @@
+import numpy as np
+
+from convert_raw_to_releasable_detections import Converter, VectorisedConverter
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from raw_detections.columnar import RawVideoDetectionArrays
+from raw_detections.types import FrameDetections as RawFrameDetections
+
+
+def make_raw_video_detections(n_frames: int = 100, seed: int = 0):
+    rng = np.random.RandomState(seed)
+
+    def make_detection():
+        # Boxes may extend beyond the 456x256 frame and offsets may point out of it
+        # to exercise clipping.
+        left, top = rng.randint(-20, 450), rng.randint(-20, 250)
+        right, bottom = left + rng.randint(1, 200), top + rng.randint(1, 200)
+        return np.array(
+            [
+                left,
+                top,
+                right,
+                bottom,
+                rng.uniform(0, 1),
+                rng.randint(5),
+                rng.uniform(0, 0.6),
+                rng.uniform(-0.1, 0.1),
+                rng.uniform(-0.1, 0.1),
+                rng.randint(2),
+            ],
+            dtype=np.float32,
+        )
+
+    # Round trip through protobuf as the raw detections are always loaded from files
+    return [
+        RawFrameDetections.from_protobuf_str(
+            RawFrameDetections.from_detections(
+                video_id="P01_101",
+                frame_number=frame_number,
+                hand_detections=[make_detection() for _ in range(rng.randint(3))]
+                or None,
+                object_detections=[make_detection() for _ in range(rng.randint(6))]
+                or None,
+            )
+            .to_protobuf()
+            .SerializeToString()
+        )
+        for frame_number in range(1, n_frames + 1)
+    ]
+
+
+def test_vectorised_converter_matches_converter():
+    raw_detections = make_raw_video_detections()
+    expected = VideoDetectionArrays.from_frame_detections(
+        Converter(frame_height=256, frame_width=456).convert_video_annotations(
+            raw_detections
+        )
+    )
+
+    actual = VectorisedConverter(
+        frame_height=256, frame_width=456
+    ).convert_video_arrays(RawVideoDetectionArrays.from_frame_detections(raw_detections))
+
+    assert actual.video_id == expected.video_id
+    np.testing.assert_array_equal(actual.frame_numbers, expected.frame_numbers)
+    np.testing.assert_array_equal(actual.hand_frame_idxs, expected.hand_frame_idxs)
+    np.testing.assert_array_equal(actual.hand_states, expected.hand_states)
+    np.testing.assert_array_equal(actual.hand_sides, expected.hand_sides)
+    np.testing.assert_array_equal(actual.object_frame_idxs, expected.object_frame_idxs)
+    np.testing.assert_allclose(actual.hand_bboxes, expected.hand_bboxes, atol=1e-6)
+    np.testing.assert_allclose(actual.hand_offsets, expected.hand_offsets, atol=1e-6)
+    np.testing.assert_allclose(actual.hand_scores, expected.hand_scores)
+    np.testing.assert_allclose(actual.object_bboxes, expected.object_bboxes, atol=1e-6)
+    np.testing.assert_allclose(actual.object_scores, expected.object_scores)
+
+
+def test_converted_arrays_serialize_like_converted_detections():
+    raw_detections = make_raw_video_detections(n_frames=20)
+    expected = [
+        d.to_protobuf().SerializeToString()
+        for d in Converter(frame_height=256, frame_width=456).convert_video_annotations(
+            raw_detections
+        )
+    ]
+
+    actual = (
+        VectorisedConverter(frame_height=256, frame_width=456)
+        .convert_video_arrays(
+            RawVideoDetectionArrays.from_frame_detections(raw_detections)
+        )
+        .to_protobuf_strs()
+    )
+
+    assert actual == expected
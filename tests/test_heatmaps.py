@@ -0,0 +1,75 @@
+import numpy as np
+
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from epic_kitchens.hoa.heatmaps import OccupancyHeatmaps
+from epic_kitchens.hoa.types import (
+    BBox,
+    FloatVector,
+    FrameDetections,
+    HandDetection,
+    HandSide,
+    HandState,
+    ObjectDetection,
+)
+
+
+def make_video_detections() -> VideoDetectionArrays:
+    return VideoDetectionArrays.from_frame_detections(
+        [
+            FrameDetections(
+                video_id="P01_101",
+                frame_number=1,
+                objects=[ObjectDetection(bbox=BBox(0.6, 0.6, 0.8, 0.8), score=0.9)],
+                hands=[
+                    HandDetection(
+                        bbox=BBox(0.0, 0.0, 0.2, 0.2),
+                        score=0.9,
+                        state=HandState.PORTABLE_OBJECT,
+                        side=HandSide.LEFT,
+                        object_offset=FloatVector(x=0.6, y=0.6),
+                    )
+                ],
+            )
+        ]
+    )
+
+
+class TestOccupancyHeatmaps:
+    def test_accumulate_bins_hand_and_interacted_object(self):
+        heatmaps = OccupancyHeatmaps.empty(height=10, width=10)
+
+        heatmaps.accumulate(make_video_detections())
+
+        left_portable = heatmaps.hand_heatmap(
+            side=HandSide.LEFT, state=HandState.PORTABLE_OBJECT
+        )
+        assert left_portable[1, 1] == 1
+        assert heatmaps.hand_heatmap().sum() == 1
+        assert heatmaps.hand_heatmap(side=HandSide.RIGHT).sum() == 0
+        assert heatmaps.objects[7, 7] == 1
+        assert heatmaps.n_frames == 1
+
+    def test_merge(self):
+        heatmaps = []
+        for _ in range(3):
+            heatmap = OccupancyHeatmaps.empty(height=10, width=10)
+            heatmap.accumulate(make_video_detections())
+            heatmaps.append(heatmap)
+
+        merged = OccupancyHeatmaps.merge(heatmaps)
+
+        assert merged.hand_heatmap().sum() == 3
+        assert merged.objects.sum() == 3
+        assert merged.n_frames == 3
+
+    def test_save_load_round_trip(self, tmp_path):
+        heatmaps = OccupancyHeatmaps.empty(height=10, width=10)
+        heatmaps.accumulate(make_video_detections())
+        path = tmp_path / "heatmaps.npz"
+
+        heatmaps.save(path)
+        loaded = OccupancyHeatmaps.load(path)
+
+        np.testing.assert_array_equal(loaded.hands, heatmaps.hands)
+        np.testing.assert_array_equal(loaded.objects, heatmaps.objects)
+        assert loaded.n_frames == heatmaps.n_frames
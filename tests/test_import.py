@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+from typing import Dict
+
+# Cumulative time allowed for `import epic_kitchens.hoa` in a fresh interpreter.
+# Importing the package shouldn't import any of its submodules, so this is
+# generous to leave room for slow machines.
+IMPORT_TIME_BUDGET_US = 100_000
+# Time allowed for `from epic_kitchens.hoa import load_detections` in a fresh
+# interpreter, most of which is importing numpy and protobuf. Again generous for
+# slow machines, the modules it must not import are checked separately.
+LOAD_DETECTIONS_IMPORT_TIME_BUDGET_S = 0.3
+
+
+def run_python(code: str, *args: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+def parse_import_times(stderr: str) -> Dict[str, int]:
+    """Parse the cumulative import times in microseconds reported by
+    ``python -X importtime``"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_package_import_is_within_budget():
+    result = run_python("import epic_kitchens.hoa", "-X", "importtime")
+
+    times = parse_import_times(result.stderr)
+    assert times["epic_kitchens.hoa"] < IMPORT_TIME_BUDGET_US
+    assert "numpy" not in times
+    assert "epic_kitchens.hoa.types_pb2" not in times
+
+
+def test_load_detections_import_is_within_budget():
+    result = run_python(
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "from epic_kitchens.hoa import load_detections\n"
+        "print(time.perf_counter() - start)\n"
+        "print(' '.join(sorted(sys.modules)))"
+    )
+
+    import_time, modules = result.stdout.splitlines()
+    assert float(import_time) < LOAD_DETECTIONS_IMPORT_TIME_BUDGET_S
+    for module in ["columnar", "spatial", "assignment", "visualisation"]:
+        assert f"epic_kitchens.hoa.{module}" not in modules.split()
+
+
+def test_loading_detections_does_not_import_pillow():
+    result = run_python(
+        "import sys\n"
+        "from epic_kitchens.hoa import load_detections, FrameDetections\n"
+        "print('PIL' in sys.modules)"
+    )
+
+    assert result.stdout.strip() == "False"
+
+
+def test_lazy_attributes_resolve_to_submodule_definitions():
+    import epic_kitchens.hoa as hoa
+    from epic_kitchens.hoa.visualisation import DetectionRenderer
+
+    assert hoa.DetectionRenderer is DetectionRenderer
+    assert "load_detections" in dir(hoa)
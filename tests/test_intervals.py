@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from epic_kitchens.hoa.intervals import ContactIntervals, extract_contact_intervals
+from epic_kitchens.hoa.types import (
+    BBox,
+    FloatVector,
+    FrameDetections,
+    HandDetection,
+    HandSide,
+    HandState,
+)
+from test_columnar import random_video_detections
+
+
+def make_video(left_states, right_states=()):
+    """Build a video whose frame i has a left hand in ``left_states[i]``, and a
+    right hand in ``right_states[i]``, ``None`` meaning no hand."""
+    detections = []
+    n_frames = max(len(left_states), len(right_states))
+    for i in range(n_frames):
+        hands = []
+        for side, states in [
+            (HandSide.LEFT, left_states),
+            (HandSide.RIGHT, right_states),
+        ]:
+            if i < len(states) and states[i] is not None:
+                hands.append(
+                    HandDetection(
+                        bbox=BBox(0.1, 0.1, 0.2, 0.2),
+                        score=0.9,
+                        state=states[i],
+                        side=side,
+                        object_offset=FloatVector(0, 0),
+                    )
+                )
+        detections.append(FrameDetections("P01_101", i + 1, hands=hands, objects=[]))
+    return VideoDetectionArrays.from_frame_detections(detections)
+
+
+def intervals_of(intervals, side):
+    rows = intervals.sides == side.value
+    return list(zip(intervals.start_frames[rows], intervals.end_frames[rows]))
+
+
+P = HandState.PORTABLE_OBJECT
+N = HandState.NO_CONTACT
+
+
+def test_get_best_hand_rows_matches_per_frame_max():
+    detections = random_video_detections(n_frames=100)
+    arrays = VideoDetectionArrays.from_frame_detections(detections)
+
+    best_rows = arrays.get_best_hand_rows(hand_threshold=0.2)
+
+    for frame_idx, frame_detections in enumerate(detections):
+        for side in HandSide:
+            scores = [
+                hand.score
+                for hand in frame_detections.hands
+                if hand.side == side and hand.score > 0.2
+            ]
+            row = best_rows[frame_idx, side.value]
+            if scores:
+                assert arrays.hand_scores[row] == np.float32(max(scores))
+                assert arrays.hand_frame_idxs[row] == frame_idx
+            else:
+                assert row == -1
+
+
+def test_gap_bridging_and_min_duration():
+    arrays = make_video(
+        left_states=[P, P, N, P, P, None, None, None, P],
+        right_states=[N, P, P, P, N, N, N, N, P],
+    )
+
+    assert intervals_of(extract_contact_intervals(arrays), HandSide.LEFT) == [
+        (1, 2),
+        (4, 5),
+        (9, 9),
+    ]
+    bridged = extract_contact_intervals(arrays, max_gap=1, min_duration=2)
+    assert intervals_of(bridged, HandSide.LEFT) == [(1, 5)]
+    assert intervals_of(bridged, HandSide.RIGHT) == [(2, 4)]
+    assert set(bridged.states) == {P.value}
+
+
+def test_overlapping_matches_brute_force(tmp_path):
+    arrays = VideoDetectionArrays.from_frame_detections(
+        random_video_detections(n_frames=500)
+    )
+    intervals = extract_contact_intervals(arrays, states=list(HandState), max_gap=2)
+    path = tmp_path / "intervals.npz"
+    intervals.save(path)
+    loaded = ContactIntervals.load(path)
+
+    assert loaded.video_id == intervals.video_id
+    np.testing.assert_array_equal(loaded.start_frames, intervals.start_frames)
+    assert np.all(np.diff(loaded.start_frames) >= 0)
+    for start, end in [(1, 1), (10, 40), (250, 251), (490, 600), (600, 700)]:
+        expected = np.flatnonzero(
+            (intervals.start_frames <= end) & (intervals.end_frames >= start)
+        )
+        np.testing.assert_array_equal(loaded.overlapping(start, end), expected)
+    left = loaded.overlapping(1, 500, side=HandSide.LEFT, state=P)
+    np.testing.assert_array_equal(
+        left,
+        np.flatnonzero(
+            (loaded.sides == HandSide.LEFT.value) & (loaded.states == P.value)
+        ),
+    )
+
+
+def test_invalid_parameters_raise():
+    arrays = make_video([P])
+    with pytest.raises(ValueError):
+        extract_contact_intervals(arrays, min_duration=0)
+    with pytest.raises(ValueError):
+        extract_contact_intervals(arrays, max_gap=-1)
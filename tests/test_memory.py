@@ -0,0 +1,39 @@
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from epic_kitchens.hoa.memory import memory_usage
+from test_columnar import random_video_detections
+
+
+def test_columnar_memory_usage_counts_array_bytes():
+    arrays = VideoDetectionArrays.from_frame_detections(
+        random_video_detections(n_frames=50)
+    )
+
+    usage = memory_usage(arrays)
+
+    assert usage.frames == arrays.frame_numbers.nbytes
+    assert usage.objects == (
+        arrays.object_frame_idxs.nbytes
+        + arrays.object_bboxes.nbytes
+        + arrays.object_scores.nbytes
+    )
+    assert usage.total == usage.hands + usage.objects + usage.frames
+
+
+def test_object_tree_memory_usage_splits_hands_and_objects():
+    detections = random_video_detections(n_frames=50)
+    usage = memory_usage(detections)
+
+    for frame_detections in detections:
+        frame_detections.hands = []
+    usage_without_hands = memory_usage(detections)
+
+    assert usage_without_hands.hands < usage.hands
+    assert usage_without_hands.objects == usage.objects
+    assert usage_without_hands.frames == usage.frames
+
+
+def test_columnar_representation_is_smaller_than_object_tree():
+    detections = random_video_detections(n_frames=50)
+    arrays = VideoDetectionArrays.from_frame_detections(detections)
+
+    assert memory_usage(arrays).total < memory_usage(detections).total / 5
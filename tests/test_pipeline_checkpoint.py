@@ -0,0 +1,25 @@
+from pipeline.checkpoint import Checkpoint
+
+
+def test_records_persist_across_instances(tmp_path):
+    path = tmp_path / "checkpoint"
+    checkpoint = Checkpoint(path)
+    checkpoint.record("P01_101")
+    checkpoint.record("P02_01")
+
+    resumed = Checkpoint(path)
+
+    assert "P01_101" in resumed
+    assert "P02_01" in resumed
+    assert "P03_01" not in resumed
+
+
+def test_partially_written_record_is_discarded(tmp_path):
+    path = tmp_path / "checkpoint"
+    path.write_text("P01_101\nP01_10")
+
+    checkpoint = Checkpoint(path)
+    checkpoint.record("P02_01")
+
+    assert len(checkpoint) == 2
+    assert path.read_text() == "P01_101\nP02_01\n"
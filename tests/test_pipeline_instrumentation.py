@@ -0,0 +1,28 @@
+import json
+
+from pipeline.instrumentation import Instrumentation
+
+
+def test_stage_stats_accumulate_across_runs(tmp_path):
+    instrumentation = Instrumentation("test")
+    for _ in range(2):
+        with instrumentation.stage("load") as stats:
+            stats.frames += 10
+            stats.bytes_read += 100
+    with instrumentation.stage("write") as stats:
+        stats.bytes_written += 50
+
+    instrumentation.save(tmp_path / "metrics.json", tmp_path / "metrics.prom")
+
+    summary = json.loads((tmp_path / "metrics.json").read_text())
+    assert [stage["name"] for stage in summary["stages"]] == ["load", "write"]
+    load = summary["stages"][0]
+    assert (load["calls"], load["frames"], load["bytes_read"]) == (2, 20, 200)
+    assert load["wall_seconds"] > 0
+    prometheus = (tmp_path / "metrics.prom").read_text().splitlines()
+    assert (
+        'hoa_pipeline_stage_bytes_written_total{script="test",stage="write"} 50'
+        in prometheus
+    )
+    assert "# TYPE hoa_pipeline_stage_frames_total counter" in prometheus
+    assert "# TYPE hoa_pipeline_stage_frames_per_second gauge" in prometheus
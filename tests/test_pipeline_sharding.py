@@ -0,0 +1,56 @@
+from merge_shards import check_shard_outputs, find_shard_outputs
+from pipeline.sharding import assign_shards, select_shard, write_shard_manifest
+
+FRAME_COUNTS = {
+    "P01_01": 1000,
+    "P01_02": 900,
+    "P02_01": 500,
+    "P02_02": 400,
+    "P03_01": 300,
+    "P03_02": 100,
+}
+
+
+def test_every_video_is_assigned_to_exactly_one_shard():
+    video_ids = list(FRAME_COUNTS) + ["P99_01"]
+
+    shards = [select_shard(video_ids, FRAME_COUNTS, i, 3) for i in range(3)]
+
+    assert sorted(sum(shards, [])) == sorted(video_ids)
+
+
+def test_assignment_is_independent_of_the_videos_seen():
+    full = assign_shards(FRAME_COUNTS, FRAME_COUNTS, 2)
+    partial = assign_shards(["P03_02", "P01_01"], FRAME_COUNTS, 2)
+
+    assert partial == {"P03_02": full["P03_02"], "P01_01": full["P01_01"]}
+
+
+def test_shards_are_balanced_by_frame_count():
+    assignment = assign_shards(FRAME_COUNTS, FRAME_COUNTS, 2)
+
+    totals = [0, 0]
+    for video_id, shard_index in assignment.items():
+        totals[shard_index] += FRAME_COUNTS[video_id]
+
+    # Longest first onto the emptiest shard: 1000+400+300 vs 900+500+100
+    assert totals == [1700, 1500]
+
+
+def test_check_shard_outputs_reports_missing_and_duplicate_videos(tmp_path):
+    shard_dirs = [tmp_path / "shard-0", tmp_path / "shard-1"]
+    write_shard_manifest(shard_dirs[0], 0, 2, ["P01_01"])
+    write_shard_manifest(shard_dirs[1], 1, 2, ["P01_02", "P02_01"])
+    for shard_dir, video_id in [
+        (shard_dirs[0], "P01_01"),
+        (shard_dirs[0], "P01_02"),
+        (shard_dirs[1], "P01_02"),
+    ]:
+        (shard_dir / "P01").mkdir(exist_ok=True)
+        (shard_dir / "P01" / f"{video_id}.pkl").touch()
+
+    problems = check_shard_outputs(shard_dirs, find_shard_outputs(shard_dirs))
+
+    assert len(problems) == 2
+    assert problems[0].startswith("P01_02 produced by several shards")
+    assert problems[1] == "P02_01 missing from every shard"
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+from pipeline.videos import get_video_id, is_video_id, iter_video_dirs
+from raw_detections.archive import pack_frame_files
+from run_pipeline import make_jobs
+
+
+def make_raw_tree(root):
+    """Raw detections of P01_101 and P02_101 as directories and of P01_102 and
+    P01_103 as archives, alongside files that aren't videos."""
+    for video_dir in [root / "P01" / "P01_101", root / "P02" / "P02_101"]:
+        video_dir.mkdir(parents=True)
+        (video_dir / "frame_1.pkl").write_bytes(b"")
+    frame_paths = [root / "P01" / "P01_101" / "frame_1.pkl"]
+    pack_frame_files(frame_paths, root / "P01" / "P01_102.tar")
+    pack_frame_files(frame_paths, root / "P01" / "P01_103.zip")
+    # An archive of a video that also has a directory
+    pack_frame_files(frame_paths, root / "P01" / "P01_101.tar")
+    (root / "P01" / "P01_104.tar.bak").write_bytes(b"")
+    (root / "P01" / "P01_105_notes.txt").write_bytes(b"")
+    (root / "P01" / "P01_106").write_bytes(b"")
+    (root / "P01_backup").mkdir()
+
+
+def test_is_video_id_matches_whole_name():
+    assert is_video_id("P01_101")
+    assert not is_video_id("P01_101.tar")
+    assert not is_video_id("P01_101_notes")
+
+
+def test_get_video_id():
+    assert get_video_id(Path("P01/P01_101")) == "P01_101"
+    assert get_video_id(Path("P01/P01_101.tar.gz")) == "P01_101"
+    assert get_video_id("P01/P01_101.zip") == "P01_101"
+
+
+def test_iter_video_dirs_finds_directories_and_archives(tmp_path):
+    make_raw_tree(tmp_path)
+
+    video_dirs = list(iter_video_dirs(tmp_path))
+
+    assert [p.relative_to(tmp_path) for p in video_dirs] == [
+        Path("P01/P01_101"),
+        Path("P01/P01_102.tar"),
+        Path("P01/P01_103.zip"),
+        Path("P02/P02_101"),
+    ]
+
+
+def test_jobs_of_archives_are_named_by_video_id(tmp_path):
+    make_raw_tree(tmp_path / "raw")
+    frame_counts = {"P01_101": 10, "P01_102": 30, "P01_103": 20}
+
+    jobs = make_jobs(
+        iter_video_dirs(tmp_path / "raw"),
+        frame_counts,
+        processed_dir=tmp_path / "processed",
+        interim_dir=tmp_path / "interim",
+    )
+
+    assert [job.video_id for job in jobs] == [
+        "P01_102",
+        "P01_103",
+        "P01_101",
+        "P02_101",
+    ]
+    assert [job.n_frames for job in jobs] == [30, 20, 10, None]
+    assert jobs[0].processed_pkl == tmp_path / "processed" / "P01" / "P01_102.pkl"
+    assert jobs[0].interim_pkl == tmp_path / "interim" / "P01" / "P01_102.pkl"
@@ -0,0 +1,46 @@
+import PIL.Image
+import pytest
+
+from epic_kitchens.hoa.previews import PreviewBuilder
+from epic_kitchens.hoa.types import FrameDetections
+
+
+class TestPreviewBuilder:
+    def test_select_frame_numbers_samples_at_target_fps(self):
+        builder = PreviewBuilder(fps=5, source_fps=50)
+
+        assert builder.select_frame_numbers(11, 40) == [11, 21, 31]
+
+    def test_select_frame_numbers_never_upsamples(self):
+        builder = PreviewBuilder(fps=100, source_fps=50)
+
+        assert builder.select_frame_numbers(1, 4) == [1, 2, 3, 4]
+
+    def test_build_and_save(self, tmp_path):
+        builder = PreviewBuilder(fps=5, source_fps=50, size=(40, 20))
+        frames = [PIL.Image.new("RGB", (456, 256), (i * 8, 0, 0)) for i in range(30)]
+        detections = [
+            FrameDetections(video_id="P01_101", frame_number=i, objects=[], hands=[])
+            for i in range(1, 31)
+        ]
+
+        preview = builder.build(frames, detections, start_frame=1, stop_frame=30)
+        path = tmp_path / "P01_101" / "preview.gif"
+        builder.save(preview, path)
+
+        assert len(preview) == 3
+        with PIL.Image.open(path) as gif:
+            assert gif.n_frames == 3
+            assert gif.size == (40, 20)
+
+    def test_build_rejects_misaligned_detections(self):
+        builder = PreviewBuilder(fps=5, source_fps=50, size=(40, 20))
+        frames = [PIL.Image.new("RGB", (456, 256)) for _ in range(10)]
+        # Detections of frames 2 to 11 rather than 1 to 10
+        detections = [
+            FrameDetections(video_id="P01_101", frame_number=i, objects=[], hands=[])
+            for i in range(2, 12)
+        ]
+
+        with pytest.raises(ValueError):
+            builder.build(frames, detections, start_frame=1, stop_frame=10)
@@ -0,0 +1,30 @@
+from epic_kitchens.hoa import profiling
+from epic_kitchens.hoa.io import load_detections, save_detections
+from epic_kitchens.hoa.types import FrameDetections
+from test_columnar import random_video_detections
+
+
+def test_profile_counts_calls_to_hot_paths(tmp_path):
+    path = tmp_path / "detections.pkl"
+    save_detections(random_video_detections(n_frames=20), path)
+
+    with profiling.profile() as stats:
+        detections = load_detections(path)
+        for frame_detections in detections:
+            frame_detections.scale(width_factor=2)
+
+    assert stats["io.load_detections"].calls == 1
+    assert stats["FrameDetections.from_protobuf_str"].calls == 20
+    assert stats["FrameDetections.scale"].calls == 20
+    assert stats["io.load_detections"].total_seconds > 0
+    assert "io.save_detections" not in stats
+
+
+def test_methods_are_restored_when_profiling_is_disabled():
+    original = FrameDetections.__dict__["from_protobuf_str"]
+
+    with profiling.profile():
+        assert FrameDetections.__dict__["from_protobuf_str"] is not original
+
+    assert not profiling.is_enabled()
+    assert FrameDetections.__dict__["from_protobuf_str"] is original
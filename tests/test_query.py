@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from epic_kitchens.hoa.io import save_detections
+from epic_kitchens.hoa.query import (
+    Predicate,
+    find_frames,
+    find_rows,
+    hands,
+    objects,
+    query_dataset,
+)
+from epic_kitchens.hoa.types import HandSide, HandState
+from test_columnar import random_video_detections
+
+
+def test_find_rows_matches_object_tree_filter():
+    detections = random_video_detections(n_frames=200)
+    arrays = VideoDetectionArrays.from_frame_detections(detections)
+    predicate = (
+        (hands.side == HandSide.LEFT)
+        & (hands.state != HandState.NO_CONTACT)
+        & (hands.score >= 0.3)
+    )
+
+    expected = [
+        hand
+        for frame_detections in detections
+        for hand in frame_detections.hands
+        if hand.side == HandSide.LEFT
+        and hand.state != HandState.NO_CONTACT
+        and hand.score >= 0.3
+    ]
+    rows = find_rows(arrays, predicate)
+
+    assert len(rows) == len(expected)
+    np.testing.assert_allclose(
+        arrays.hand_scores[rows], [hand.score for hand in expected], rtol=1e-6
+    )
+
+
+def test_find_frames_with_bbox_constraints():
+    detections = random_video_detections(n_frames=200)
+    arrays = VideoDetectionArrays.from_frame_detections(detections)
+    predicate = objects.area.between(0.1, 0.5) & ~(objects.center_x < 0.5)
+
+    expected = [
+        frame_detections.frame_number
+        for frame_detections in detections
+        if sum(
+            0.1 <= (obj.bbox.right - obj.bbox.left) * (obj.bbox.bottom - obj.bbox.top)
+            <= 0.5
+            and (obj.bbox.left + obj.bbox.right) / 2 >= 0.5
+            for obj in frame_detections.objects
+        )
+        >= 2
+    ]
+
+    np.testing.assert_array_equal(
+        find_frames(arrays, predicate, min_count=2), expected
+    )
+
+
+def test_isin_and_or():
+    arrays = VideoDetectionArrays.from_frame_detections(random_video_detections())
+    portable_or_stationary = hands.state.isin(
+        [HandState.PORTABLE_OBJECT, HandState.STATIONARY_OBJECT]
+    )
+    either = (hands.state == HandState.PORTABLE_OBJECT) | (
+        hands.state == HandState.STATIONARY_OBJECT
+    )
+
+    np.testing.assert_array_equal(
+        find_rows(arrays, portable_or_stationary), find_rows(arrays, either)
+    )
+
+
+def test_invalid_predicates_raise():
+    with pytest.raises(AttributeError):
+        hands.colour
+    with pytest.raises(AttributeError):
+        objects.side
+    with pytest.raises(ValueError):
+        (hands.score > 0.5) & (objects.score > 0.5)
+    with pytest.raises(TypeError):
+        0.1 < hands.score < 0.5
+
+
+def test_predicates_must_implement_evaluate():
+    class IncompletePredicate(Predicate):
+        kind = "hand"
+
+    with pytest.raises(TypeError):
+        IncompletePredicate()
+
+
+def test_query_dataset(tmp_path):
+    predicate = hands.side == HandSide.RIGHT
+    paths = []
+    for seed, video_id in enumerate(["P01_01", "P01_02"]):
+        detections = random_video_detections(n_frames=20, seed=seed)
+        paths.append(tmp_path / f"{video_id}.pkl")
+        save_detections(detections, paths[-1])
+
+    results = query_dataset(paths, predicate)
+
+    assert set(results) == {"P01_01", "P01_02"}
+    for path, video_id in zip(paths, ["P01_01", "P01_02"]):
+        np.testing.assert_array_equal(results[video_id], find_frames(path, predicate))
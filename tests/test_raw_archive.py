@@ -0,0 +1,44 @@
+import pickle
+
+import pytest
+
+from aggregate_raw_detections import (
+    get_detection_paths,
+    load_input_detections,
+    load_video_detections,
+)
+from raw_detections.archive import get_archive_stem, pack_frame_files
+from raw_detections.io import load_archive_frame_detections
+from test_raw_wire import make_raw_frame_detections
+
+
+@pytest.fixture
+def video_dir(tmp_path):
+    video_dir = tmp_path / "P01_101"
+    video_dir.mkdir()
+    # Frame numbers aren't zero padded, so lexicographic order would be wrong
+    for frame_number in [1, 2, 10, 100, 11]:
+        detections = make_raw_frame_detections("P01", frame_number)
+        with open(video_dir / f"frame_{frame_number}.pkl", "wb") as f:
+            pickle.dump(detections.to_protobuf().SerializeToString(), f)
+    return video_dir
+
+
+@pytest.mark.parametrize("suffix", [".tar", ".tar.gz", ".zip"])
+def test_archive_aggregation_matches_directory_aggregation(tmp_path, video_dir, suffix):
+    archive_path = tmp_path / f"P01_101{suffix}"
+    pack_frame_files(get_detection_paths(video_dir), archive_path)
+
+    assert get_archive_stem(archive_path) == "P01_101"
+    _, expected = load_video_detections(get_detection_paths(video_dir), "P01_101")
+    _, actual = load_input_detections(archive_path, "P01_101")
+    assert actual == expected
+
+
+def test_load_archive_frame_detections_orders_by_frame_number(tmp_path, video_dir):
+    archive_path = tmp_path / "P01_101.zip"
+    pack_frame_files(list(video_dir.iterdir()), archive_path)
+
+    detections = load_archive_frame_detections(archive_path)
+
+    assert [d.frame_number for d in detections] == [1, 2, 10, 11, 100]
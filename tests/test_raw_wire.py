@@ -0,0 +1,42 @@
+import numpy as np
+
+from raw_detections.types import FrameDetections
+from raw_detections.wire import read_frame_number, set_video_id
+
+
+def make_raw_frame_detections(video_id: str, frame_number: int) -> FrameDetections:
+    hand = np.array([10, 20, 50, 80, 0.9, 3, 0.05, 0.06, -0.08, 1], dtype=np.float32)
+    obj = np.array([40, 50, 90, 120, 0.5, 0, 0, 0, 0, 0], dtype=np.float32)
+    return FrameDetections.from_detections(
+        video_id=video_id,
+        frame_number=frame_number,
+        hand_detections=[hand],
+        object_detections=[obj, obj],
+    )
+
+
+def test_set_video_id_only_changes_video_id():
+    detections = make_raw_frame_detections("P01", 12345)
+    pb_str = detections.to_protobuf().SerializeToString()
+
+    patched = FrameDetections.from_protobuf_str(set_video_id(pb_str, "P01_101"))
+
+    detections.video_id = "P01_101"
+    assert patched == detections
+
+
+def test_set_video_id_matches_reserialization():
+    detections = make_raw_frame_detections("P01", 3)
+    pb_str = detections.to_protobuf().SerializeToString()
+
+    detections.video_id = "P01_101"
+
+    expected = detections.to_protobuf().SerializeToString()
+    assert set_video_id(pb_str, "P01_101") == expected
+
+
+def test_read_frame_number():
+    for frame_number in [0, 1, 127, 128, 90000]:
+        detections = make_raw_frame_detections("P01", frame_number)
+        pb_str = detections.to_protobuf().SerializeToString()
+        assert read_frame_number(pb_str) == frame_number
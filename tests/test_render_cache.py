@@ -0,0 +1,123 @@
+import PIL.Image
+
+from epic_kitchens.hoa.render_cache import CachedRenderer, RenderCache
+from epic_kitchens.hoa.types import FrameDetections
+from epic_kitchens.hoa.visualisation import DetectionRenderer
+
+
+class CountingRenderer(DetectionRenderer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.n_renders = 0
+
+    def render_detections(self, frame, detections):
+        self.n_renders += 1
+        return super().render_detections(frame, detections)
+
+
+class MissingRenderCache(RenderCache):
+    """Misses the next lookup of each key in ``keys_to_miss``, as if it was looked up
+    just before a prefetch cached it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.keys_to_miss = set()
+
+    def get(self, key):
+        if key in self.keys_to_miss:
+            self.keys_to_miss.remove(key)
+            return None
+        return super().get(key)
+
+
+def make_detections(n_frames: int):
+    return [
+        FrameDetections(video_id="P01_101", frame_number=i, objects=[], hands=[])
+        for i in range(1, n_frames + 1)
+    ]
+
+
+class TestRenderCache:
+    def test_put_then_get(self, tmp_path):
+        cache = RenderCache(tmp_path)
+        key = cache.key("P01_101", 1, "abc")
+
+        assert cache.get(key) is None
+        cache.put(key, PIL.Image.new("RGB", (8, 8), (255, 0, 0)))
+
+        assert key in cache
+        assert cache.get(key).size == (8, 8)
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = RenderCache(tmp_path, image_format="PNG")
+        keys = [cache.key("P01_101", i, "abc") for i in range(3)]
+        cache.put(keys[0], PIL.Image.new("RGB", (8, 8)))
+        cache.max_bytes = cache.n_bytes * 2
+        cache.put(keys[1], PIL.Image.new("RGB", (8, 8)))
+        cache.get(keys[0])
+
+        cache.put(keys[2], PIL.Image.new("RGB", (8, 8)))
+
+        assert keys[0] in cache
+        assert keys[1] not in cache
+        assert keys[2] in cache
+        assert not (tmp_path / (keys[1] + ".png")).exists()
+
+    def test_reuses_existing_entries(self, tmp_path):
+        cache = RenderCache(tmp_path)
+        key = cache.key("P01_101", 1, "abc")
+        cache.put(key, PIL.Image.new("RGB", (8, 8)))
+
+        assert key in RenderCache(tmp_path)
+
+
+class TestCachedRenderer:
+    def test_revisits_do_not_render(self, tmp_path):
+        renderer = CountingRenderer()
+        frames = [PIL.Image.new("RGB", (16, 8)) for _ in range(3)]
+        with CachedRenderer(
+            renderer, frames, make_detections(3), RenderCache(tmp_path), prefetch=0
+        ) as cached_renderer:
+            cached_renderer[1]
+            cached_renderer[1]
+
+        assert renderer.n_renders == 1
+
+    def test_prefetches_following_frames(self, tmp_path):
+        cache = RenderCache(tmp_path)
+        frames = [PIL.Image.new("RGB", (16, 8)) for _ in range(5)]
+        detections = make_detections(5)
+        renderer = DetectionRenderer()
+        with CachedRenderer(
+            renderer, frames, detections, cache, prefetch=2
+        ) as cached_renderer:
+            cached_renderer[0]
+
+        assert len(cache) == 3
+
+    def test_does_not_render_frames_prefetched_since_a_cache_miss(self, tmp_path):
+        cache = MissingRenderCache(tmp_path)
+        renderer = CountingRenderer()
+        frames = [PIL.Image.new("RGB", (16, 8)) for _ in range(2)]
+        detections = make_detections(2)
+        cached_renderer = CachedRenderer(
+            renderer, frames, detections, cache, prefetch=1
+        )
+        cached_renderer[0]
+        # Wait for frame 1 to be prefetched
+        cached_renderer.close()
+        cache.keys_to_miss.add(cached_renderer._key(1))
+
+        assert cached_renderer[1].size == (16, 8)
+        assert renderer.n_renders == 1
+
+    def test_renders_without_prefetching_once_closed(self, tmp_path):
+        cache = RenderCache(tmp_path)
+        frames = [PIL.Image.new("RGB", (16, 8)) for _ in range(5)]
+        cached_renderer = CachedRenderer(
+            DetectionRenderer(), frames, make_detections(5), cache, prefetch=2
+        )
+        cached_renderer.close()
+
+        assert cached_renderer[0].size == (16, 8)
+        assert len(cache) == 1
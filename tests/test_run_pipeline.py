@@ -0,0 +1,141 @@
+import pytest
+
+import aggregate_and_convert_raw_detections
+import run_pipeline
+from pipeline.checkpoint import Checkpoint
+from raw_detections.archive import pack_frame_files
+from test_aggregate_and_convert_raw_detections import run_script
+from test_aggregate_raw_detections import write_frame
+
+# Number of frames of each video in the raw tree, P02_101's length is unknown
+FRAME_COUNTS = {"P01_101": 12, "P01_102": 20}
+
+
+@pytest.fixture
+def raw_root(tmp_path):
+    """Raw detections of P01_101 and P02_101 as directories and of P01_102 as an
+    archive"""
+    raw_root = tmp_path / "raw"
+    for video_id, n_frames in [("P01_101", 12), ("P01_102", 20), ("P02_101", 5)]:
+        video_dir = raw_root / video_id[:3] / video_id
+        video_dir.mkdir(parents=True)
+        for frame_number in range(1, n_frames + 1):
+            write_frame(video_dir, frame_number)
+    archive_dir = raw_root / "P01" / "P01_102"
+    pack_frame_files(sorted(archive_dir.iterdir()), raw_root / "P01" / "P01_102.tar")
+    for path in archive_dir.iterdir():
+        path.unlink()
+    archive_dir.rmdir()
+    return raw_root
+
+
+@pytest.fixture
+def frame_counts_csv(tmp_path):
+    path = tmp_path / "frame_counts.csv"
+    path.write_text(
+        "video_id,rgb_n_frames\n"
+        + "".join(f"{video_id},{n}\n" for video_id, n in FRAME_COUNTS.items())
+    )
+    return path
+
+
+def run(raw_root, processed_dir, frame_counts_csv, *args):
+    run_script(
+        run_pipeline,
+        raw_root,
+        "--processed-dir",
+        processed_dir,
+        "--frame-counts",
+        frame_counts_csv,
+        "--workers",
+        1,
+        *args,
+    )
+
+
+def test_pipeline_output_matches_snakefile_output(
+    tmp_path, raw_root, frame_counts_csv, capsys
+):
+    processed_dir = tmp_path / "processed"
+
+    run(raw_root, processed_dir, frame_counts_csv)
+
+    for input_path in [
+        raw_root / "P01" / "P01_101",
+        raw_root / "P01" / "P01_102.tar",
+        raw_root / "P02" / "P02_101",
+    ]:
+        video_id = input_path.name[:7]
+        expected_pkl = tmp_path / "expected" / f"{video_id}.pkl"
+        run_script(aggregate_and_convert_raw_detections, input_path, expected_pkl)
+        actual_pkl = processed_dir / video_id[:3] / f"{video_id}.pkl"
+        assert actual_pkl.read_bytes() == expected_pkl.read_bytes()
+    assert list(processed_dir.glob("**/*.tmp")) == []
+    assert len(Checkpoint(processed_dir / ".pipeline-checkpoint")) == 3
+    # Longest videos first, those with unknown lengths last
+    progress = [
+        line.split()[1]
+        for line in capsys.readouterr().out.splitlines()
+        if line.startswith("[")
+    ]
+    assert progress == ["P01_102", "P01_101", "P02_101"]
+
+
+def test_resumed_pipeline_skips_completed_videos(
+    tmp_path, raw_root, frame_counts_csv, capsys
+):
+    processed_dir = tmp_path / "processed"
+    Checkpoint(processed_dir / ".pipeline-checkpoint").record("P01_102")
+
+    run(raw_root, processed_dir, frame_counts_csv)
+
+    assert "3 videos found, 1 already completed, 2 to process" in (
+        capsys.readouterr().out
+    )
+    assert not (processed_dir / "P01" / "P01_102.pkl").exists()
+    assert (processed_dir / "P01" / "P01_101.pkl").exists()
+    assert (processed_dir / "P02" / "P02_101.pkl").exists()
+    assert len(Checkpoint(processed_dir / ".pipeline-checkpoint")) == 3
+
+
+def test_failed_videos_are_reported_and_not_checkpointed(
+    tmp_path, raw_root, frame_counts_csv, capsys
+):
+    processed_dir = tmp_path / "processed"
+    (raw_root / "P01" / "P01_101" / "frame_3.pkl").write_bytes(b"not a pickle")
+    # P02_101 has 5 frames, so fails validation
+    frame_counts_csv.write_text(frame_counts_csv.read_text() + "P02_101,6\n")
+
+    with pytest.raises(SystemExit) as exc_info:
+        run(raw_root, processed_dir, frame_counts_csv)
+
+    assert exc_info.value.code == 1
+    out = capsys.readouterr().out
+    assert "2 videos failed:" in out
+    assert "expected 6 frames of detections, but got 5" in out
+    checkpoint = Checkpoint(processed_dir / ".pipeline-checkpoint")
+    assert "P01_101" not in checkpoint
+    assert "P02_101" not in checkpoint
+    assert "P01_102" in checkpoint
+    assert [p.name for p in processed_dir.glob("P*/*")] == ["P01_102.pkl"]
+
+
+def test_failed_writes_leave_no_output(
+    tmp_path, raw_root, frame_counts_csv, monkeypatch
+):
+    processed_dir = tmp_path / "processed"
+
+    def failing_save(p, video_detections):
+        p.write_bytes(b"partial")
+        raise OSError("No space left on device")
+
+    # Worker processes are forked, so inherit the patched function
+    monkeypatch.setattr(
+        run_pipeline, "save_releasable_video_detection_arrays", failing_save
+    )
+
+    with pytest.raises(SystemExit):
+        run(raw_root, processed_dir, frame_counts_csv)
+
+    assert list(processed_dir.glob("P*/*")) == []
+    assert len(Checkpoint(processed_dir / ".pipeline-checkpoint")) == 0
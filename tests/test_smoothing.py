@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from epic_kitchens.hoa.smoothing import (
+    make_transition_matrix,
+    smooth_bboxes_ema,
+    smooth_states_majority,
+    smooth_states_viterbi,
+)
+from epic_kitchens.hoa.types import HandSide, HandState
+from test_columnar import random_video_detections
+from test_intervals import make_video
+
+P = HandState.PORTABLE_OBJECT
+S = HandState.STATIONARY_OBJECT
+N = HandState.NO_CONTACT
+
+
+def left_states(arrays):
+    return [
+        HandState(state)
+        for state in arrays.hand_states[arrays.hand_sides == HandSide.LEFT.value]
+    ]
+
+
+def test_majority_vote_removes_flicker():
+    arrays = make_video([P, P, N, P, P, S, S, S, P, S, S], right_states=[N] * 11)
+
+    smoothed = smooth_states_majority(arrays, window=3)
+
+    assert left_states(smoothed) == [P, P, P, P, P, S, S, S, S, S, S]
+    np.testing.assert_array_equal(
+        smoothed.hand_states[smoothed.hand_sides == HandSide.RIGHT.value], N.value
+    )
+    # The input is left untouched
+    assert left_states(arrays)[2] == N
+
+
+def test_majority_vote_with_window_1_is_identity():
+    arrays = VideoDetectionArrays.from_frame_detections(random_video_detections())
+
+    smoothed = smooth_states_majority(arrays, window=1)
+
+    np.testing.assert_array_equal(smoothed.hand_states, arrays.hand_states)
+
+
+def test_viterbi_removes_flicker():
+    arrays = make_video([P] * 5 + [N] + [P] * 5 + [S] * 10)
+
+    smoothed = smooth_states_viterbi(arrays, make_transition_matrix(0.99))
+
+    assert left_states(smoothed) == [P] * 11 + [S] * 10
+
+
+def test_viterbi_with_uniform_transitions_keeps_predictions():
+    arrays = VideoDetectionArrays.from_frame_detections(
+        random_video_detections(n_frames=100)
+    )
+    uniform = np.full((len(HandState), len(HandState)), 1 / len(HandState))
+
+    smoothed = smooth_states_viterbi(arrays, uniform)
+
+    best_rows = arrays.get_best_hand_rows()
+    best_rows = best_rows[best_rows >= 0]
+    np.testing.assert_array_equal(
+        smoothed.hand_states[best_rows], arrays.hand_states[best_rows]
+    )
+
+
+def test_ema_matches_reference_loop():
+    arrays = VideoDetectionArrays.from_frame_detections(
+        random_video_detections(n_frames=300)
+    )
+    alpha = 0.3
+
+    smoothed = smooth_bboxes_ema(arrays, alpha=alpha)
+
+    best_rows = arrays.get_best_hand_rows()
+    for side in HandSide:
+        weighted_sum, weight = np.zeros(4), 0.0
+        for row in best_rows[:, side.value]:
+            weighted_sum *= 1 - alpha
+            weight *= 1 - alpha
+            if row >= 0:
+                weighted_sum += arrays.hand_scores[row] * arrays.hand_bboxes[row]
+                weight += arrays.hand_scores[row]
+                np.testing.assert_allclose(
+                    smoothed.hand_bboxes[row], weighted_sum / weight, rtol=1e-5
+                )
+
+
+def test_ema_long_video_is_stable():
+    arrays = make_video([P] * 5000)
+
+    smoothed = smooth_bboxes_ema(arrays, alpha=0.01)
+
+    np.testing.assert_allclose(smoothed.hand_bboxes, arrays.hand_bboxes, rtol=1e-5)
+
+
+def test_invalid_parameters_raise():
+    arrays = make_video([P])
+    with pytest.raises(ValueError):
+        smooth_states_majority(arrays, window=2)
+    with pytest.raises(ValueError):
+        smooth_states_viterbi(arrays, np.eye(3))
+    with pytest.raises(ValueError):
+        smooth_bboxes_ema(arrays, alpha=0)
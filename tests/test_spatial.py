@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from epic_kitchens.hoa.spatial import ObjectGrid
+from test_columnar import random_video_detections
+
+
+def brute_force_pairs(arrays, frame_idxs, points, is_match):
+    """All (query, object row) pairs of objects in each query's frame for which
+    ``is_match(object_rows, point)`` holds."""
+    queries, rows = [], []
+    for query, (frame_idx, point) in enumerate(zip(frame_idxs, points)):
+        object_rows = np.flatnonzero(arrays.object_frame_idxs == frame_idx)
+        matching_rows = object_rows[is_match(object_rows, point)]
+        queries.extend([query] * len(matching_rows))
+        rows.extend(matching_rows)
+    return np.array(queries, dtype=np.int64), np.array(rows, dtype=np.int64)
+
+
+def random_queries(arrays, n_queries=500, seed=0):
+    rng = np.random.RandomState(seed)
+    frame_idxs = rng.randint(arrays.n_frames, size=n_queries)
+    points = rng.uniform(-0.2, 1.2, size=(n_queries, 2))
+    return frame_idxs, points
+
+
+@pytest.mark.parametrize("cell_size", [0.01, 0.1, 2])
+def test_containing_matches_brute_force(cell_size):
+    arrays = VideoDetectionArrays.from_frame_detections(random_video_detections())
+    grid = ObjectGrid.from_detections(arrays, cell_size=cell_size)
+    frame_idxs, points = random_queries(arrays)
+
+    queries, rows = grid.containing(frame_idxs, points)
+
+    bboxes = arrays.object_bboxes
+    expected_queries, expected_rows = brute_force_pairs(
+        arrays,
+        frame_idxs,
+        points,
+        lambda rows, point: np.all(
+            (bboxes[rows, :2] <= point) & (point <= bboxes[rows, 2:]), axis=1
+        ),
+    )
+    np.testing.assert_array_equal(queries, expected_queries)
+    np.testing.assert_array_equal(rows, expected_rows)
+
+
+@pytest.mark.parametrize("cell_size", [0.01, 0.1, 2])
+@pytest.mark.parametrize("radius", [0, 0.05, 0.3, 5])
+def test_within_radius_matches_brute_force(cell_size, radius):
+    arrays = VideoDetectionArrays.from_frame_detections(random_video_detections())
+    grid = ObjectGrid.from_detections(arrays, cell_size=cell_size)
+    frame_idxs, points = random_queries(arrays)
+
+    queries, rows = grid.within_radius(frame_idxs, points, radius)
+
+    centers = arrays.object_centers
+    expected_queries, expected_rows = brute_force_pairs(
+        arrays,
+        frame_idxs,
+        points,
+        lambda rows, point: ((centers[rows] - point) ** 2).sum(axis=1)
+        <= radius ** 2,
+    )
+    np.testing.assert_array_equal(queries, expected_queries)
+    np.testing.assert_array_equal(rows, expected_rows)
+
+
+def test_from_detections_indexes_scaled_objects_above_threshold():
+    arrays = VideoDetectionArrays.from_frame_detections(random_video_detections())
+    grid = ObjectGrid.from_detections(
+        arrays, object_threshold=0.5, width_factor=456, height_factor=256
+    )
+    frame_idx = arrays.object_frame_idxs[0]
+    left, top, right, bottom = arrays.object_bboxes[0]
+    x, y = (left + right) / 2 * 456, (top + bottom) / 2 * 256
+
+    rows = grid.objects_within_radius(frame_idx, x, y, radius=1e-6)
+    expected_rows = [0] if arrays.object_scores[0] >= 0.5 else []
+    np.testing.assert_array_equal(rows, expected_rows)
+    assert np.all(arrays.object_scores[grid.objects_containing(frame_idx, x, y)] >= 0.5)
+
+
+def test_empty_grid():
+    grid = ObjectGrid(np.zeros(0), np.zeros((0, 4)), n_frames=3)
+
+    assert len(grid.objects_containing(1, 0.5, 0.5)) == 0
+    assert len(grid.objects_within_radius(1, 0.5, 0.5, radius=1)) == 0
+    with pytest.raises(ValueError):
+        grid.within_radius(np.zeros(2), np.zeros((3, 2)), radius=1)
+    with pytest.raises(ValueError):
+        ObjectGrid(np.zeros(0), np.zeros((0, 4)), n_frames=3, cell_size=0)
+
+
+@pytest.mark.parametrize("method", ["nearest", "optimal"])
+@pytest.mark.parametrize("grid_object_threshold", [0, 0.3])
+def test_interactions_with_object_grid_match_interactions_without(
+    method, grid_object_threshold
+):
+    arrays = VideoDetectionArrays.from_frame_detections(
+        random_video_detections(n_frames=200)
+    )
+    grid = ObjectGrid.from_detections(
+        arrays,
+        object_threshold=grid_object_threshold,
+        cell_size=20,
+        width_factor=456,
+        height_factor=256,
+    )
+    kwargs = dict(
+        object_threshold=0.3,
+        width_factor=456,
+        height_factor=256,
+        max_distance=50,
+        method=method,
+    )
+
+    np.testing.assert_array_equal(
+        arrays.get_hand_object_interactions(object_grid=grid, **kwargs),
+        arrays.get_hand_object_interactions(**kwargs),
+    )
+    with pytest.raises(ValueError):
+        arrays.get_hand_object_interactions(object_grid=grid)
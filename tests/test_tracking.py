@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+
+from epic_kitchens.hoa import tracking
+from epic_kitchens.hoa.columnar import VideoDetectionArrays
+from epic_kitchens.hoa.memory import memory_usage
+from epic_kitchens.hoa.tracking import bbox_iou, track, track_hands, track_objects
+from epic_kitchens.hoa.types import (
+    BBox,
+    FloatVector,
+    FrameDetections,
+    HandDetection,
+    HandSide,
+    HandState,
+    ObjectDetection,
+)
+from test_columnar import random_video_detections
+
+
+def make_moving_video(n_frames=20, seed=0):
+    """Two hands and three objects drifting slowly, listed in a random order in
+    each frame, with a low scoring object appearing in every other frame."""
+    rng = np.random.RandomState(seed)
+    hand_starts = [(0.1, 0.5), (0.6, 0.5)]
+    object_starts = [(0.1, 0.1), (0.4, 0.1), (0.7, 0.1)]
+    detections = []
+    for frame_idx in range(n_frames):
+        shift = 0.005 * frame_idx
+        hands = [
+            HandDetection(
+                bbox=BBox(x + shift, y, x + shift + 0.2, y + 0.2),
+                score=0.9,
+                state=HandState.PORTABLE_OBJECT,
+                side=side,
+                object_offset=FloatVector(0, 0),
+            )
+            for (x, y), side in zip(hand_starts, [HandSide.LEFT, HandSide.RIGHT])
+        ]
+        objects = [
+            ObjectDetection(
+                bbox=BBox(x, y + shift, x + 0.1, y + shift + 0.1), score=0.8
+            )
+            for x, y in object_starts
+        ]
+        if frame_idx % 2 == 0:
+            objects.append(ObjectDetection(bbox=BBox(0.4, 0.8, 0.5, 0.9), score=0.01))
+        detections.append(
+            FrameDetections(
+                video_id="P01_101",
+                frame_number=frame_idx + 1,
+                hands=[hands[i] for i in rng.permutation(len(hands))],
+                objects=[objects[i] for i in rng.permutation(len(objects))],
+            )
+        )
+    return detections
+
+
+def track_of_each_detection(detections, track_ids, attribute, key):
+    """Map each detection's key to the track IDs it was given across frames."""
+    track_ids_by_key = {}
+    row = 0
+    for frame_detections in detections:
+        for detection in getattr(frame_detections, attribute):
+            track_ids_by_key.setdefault(key(detection), set()).add(track_ids[row])
+            row += 1
+    return track_ids_by_key
+
+
+@pytest.mark.parametrize("method", ["greedy", "optimal"])
+def test_tracks_follow_moving_detections(method):
+    detections = make_moving_video()
+    arrays = VideoDetectionArrays.from_frame_detections(detections)
+
+    tracked = track(arrays, object_threshold=0.1, method=method)
+
+    hand_tracks = track_of_each_detection(
+        detections, tracked.hand_track_ids, "hands", lambda hand: hand.side
+    )
+    assert hand_tracks == {HandSide.LEFT: {0}, HandSide.RIGHT: {1}} or (
+        hand_tracks == {HandSide.LEFT: {1}, HandSide.RIGHT: {0}}
+    )
+    object_tracks = track_of_each_detection(
+        detections,
+        tracked.object_track_ids,
+        "objects",
+        lambda obj: (round(obj.bbox.left, 3), obj.score),
+    )
+    assert object_tracks.pop((0.4, 0.01)) == {-1}
+    assert sorted(object_tracks.values()) == [{0}, {1}, {2}]
+
+
+def test_sides_are_tracked_separately():
+    detections = make_moving_video()
+    for frame_detections in detections:
+        for hand in frame_detections.hands:
+            hand.bbox = BBox(0.1, 0.1, 0.3, 0.3)
+    arrays = VideoDetectionArrays.from_frame_detections(detections)
+
+    track_ids = track_hands(arrays)
+
+    for side in HandSide:
+        assert len(np.unique(track_ids[arrays.hand_sides == side.value])) == 1
+    assert len(np.unique(track_ids)) == 2
+
+
+def test_chunked_pairs_give_same_tracks(monkeypatch):
+    arrays = VideoDetectionArrays.from_frame_detections(
+        random_video_detections(n_frames=200)
+    )
+    expected = track_objects(arrays, iou_threshold=0, max_center_distance=0.5)
+
+    monkeypatch.setattr(tracking, "_MAX_PAIRS", 7)
+    actual = track_objects(arrays, iou_threshold=0, max_center_distance=0.5)
+
+    np.testing.assert_array_equal(actual, expected)
+    # Consecutive detections of a track are in consecutive frames
+    for track_id in np.unique(expected):
+        frame_idxs = arrays.object_frame_idxs[expected == track_id]
+        assert np.all(np.diff(frame_idxs) == 1)
+
+
+def test_track_ids_are_counted_in_memory_usage():
+    arrays = VideoDetectionArrays.from_frame_detections(make_moving_video())
+
+    tracked = track(arrays)
+
+    assert memory_usage(tracked).hands == (
+        memory_usage(arrays).hands + tracked.hand_track_ids.nbytes
+    )
+
+
+def test_bbox_iou():
+    bboxes = np.array([[0, 0, 1, 1], [0, 0, 1, 1], [0, 0, 1, 1], [0, 0, 0, 0]])
+    other_bboxes = np.array(
+        [[0, 0, 1, 1], [0.5, 0, 1.5, 1], [2, 2, 3, 3], [0, 0, 0, 0]]
+    )
+
+    np.testing.assert_allclose(bbox_iou(bboxes, other_bboxes), [1, 1 / 3, 0, 0])
@@ -1,4 +1,14 @@
-from epic_kitchens.hoa.types import BBox, FloatVector
+import pytest
+
+from epic_kitchens.hoa.types import (
+    BBox,
+    FloatVector,
+    FrameDetections,
+    HandDetection,
+    HandSide,
+    HandState,
+    ObjectDetection,
+)
 
 
 class TestFloatVector:
@@ -83,3 +93,35 @@ class TestBBox:
     def test_bottom_right(self):
         bbox = BBox(1, 2, 3, 5)
         assert bbox.bottom_right == (3, 5)
+
+
+class TestFrameDetections:
+    @pytest.mark.parametrize("method", ["nearest", "optimal"])
+    @pytest.mark.parametrize("object_scores", [[], [0.1, 0.2]])
+    def test_no_interactions_without_objects_above_threshold(
+        self, method, object_scores
+    ):
+        detections = FrameDetections(
+            video_id="P01_101",
+            frame_number=1,
+            objects=[
+                ObjectDetection(bbox=BBox(0.4, 0.4, 0.6, 0.6), score=score)
+                for score in object_scores
+            ],
+            hands=[
+                HandDetection(
+                    bbox=BBox(0.1, 0.2, 0.3, 0.5),
+                    score=0.9,
+                    state=HandState.PORTABLE_OBJECT,
+                    side=HandSide.LEFT,
+                    object_offset=FloatVector(x=0.3, y=0.15),
+                )
+            ],
+        )
+
+        assert (
+            detections.get_hand_object_interactions(
+                object_threshold=0.5, method=method
+            )
+            == {}
+        )
@@ -0,0 +1,87 @@
+import numpy as np
+import PIL.Image
+
+from epic_kitchens.hoa.types import (
+    BBox,
+    FloatVector,
+    FrameDetections,
+    HandDetection,
+    HandSide,
+    HandState,
+    ObjectDetection,
+)
+from epic_kitchens.hoa.visualisation import (
+    DetectionRenderer,
+    MontageRenderer,
+    overlay_heatmap,
+)
+
+
+def make_detections(frame_number: int) -> FrameDetections:
+    return FrameDetections(
+        video_id="P01_101",
+        frame_number=frame_number,
+        objects=[ObjectDetection(bbox=BBox(0.4, 0.4, 0.6, 0.6), score=0.9)],
+        hands=[
+            HandDetection(
+                bbox=BBox(0.1, 0.2, 0.3, 0.5),
+                score=0.9,
+                state=HandState.PORTABLE_OBJECT,
+                side=HandSide.LEFT,
+                object_offset=FloatVector(x=0.3, y=0.15),
+            )
+        ],
+    )
+
+
+class TestDetectionRenderer:
+    def test_config_round_trips(self):
+        renderer = DetectionRenderer(hand_threshold=0.5, font_size=12, border=2)
+        assert DetectionRenderer(**renderer.config).config == renderer.config
+
+
+class TestMontageRenderer:
+    def test_tiles_thumbnails_into_sheets(self):
+        montage_renderer = MontageRenderer(
+            thumbnail_size=(40, 20), columns=2, rows=1, n_workers=2
+        )
+        frames_and_detections = [
+            (PIL.Image.new("RGB", (456, 256)), make_detections(i)) for i in range(3)
+        ]
+
+        sheets = montage_renderer.render_montages(frames_and_detections)
+
+        assert len(sheets) == 2
+        assert all(sheet.size == (80, 20) for sheet in sheets)
+
+    def test_thumbnail_has_thumbnail_size(self):
+        montage_renderer = MontageRenderer(thumbnail_size=(40, 20))
+        thumbnail = montage_renderer.render_thumbnail(
+            (PIL.Image.new("RGB", (1920, 1080)), make_detections(1))
+        )
+        assert thumbnail.size == (40, 20)
+
+    def test_montages_leave_lazily_loaded_frames_unchanged(self, tmp_path):
+        PIL.Image.new("RGB", (1920, 1080)).save(tmp_path / "frame.jpg")
+        frame = PIL.Image.open(tmp_path / "frame.jpg")
+        montage_renderer = MontageRenderer(thumbnail_size=(40, 20))
+
+        (sheet,) = montage_renderer.render_montages([(frame, make_detections(1))])
+
+        assert sheet.size == (400, 200)
+        assert frame.size == (1920, 1080)
+        assert frame.mode == "RGB"
+        frame.load()
+        assert frame.size == (1920, 1080)
+
+
+def test_overlay_heatmap_only_tints_hot_regions():
+    heatmap = np.zeros((2, 2))
+    heatmap[0, 0] = 1
+    frame = PIL.Image.new("RGB", (40, 20))
+
+    overlaid = overlay_heatmap(frame, heatmap, color=(255, 0, 0))
+
+    assert overlaid.size == frame.size
+    assert overlaid.getpixel((0, 0))[0] > 0
+    assert overlaid.getpixel((39, 19)) == (0, 0, 0)